@@ -41,7 +41,7 @@ async function scrappyExample() {
         console.log(`✅ Category: ${result.leafCategory}`);
         console.log(`   Full path: ${result.bestMatch}`);
         console.log(`   API calls: ${result.apiCalls}`);
-        console.log(`   Time: ${result.processingTime}ms`);
+        console.log(`   Time: ${result.processingTime.toFixed(0)}ms`);
       } else {
         console.log(`❌ Failed: ${result.error}`);
       }
@@ -1,5 +1,4 @@
 module.exports = {
-  preset: 'ts-jest',
   testEnvironment: 'node',
   roots: ['<rootDir>/tests'],
   testMatch: ['**/*.test.ts'],
@@ -8,12 +7,13 @@ module.exports = {
     '!src/**/*.d.ts',
     '!src/index.ts'
   ],
+  slowTestThreshold: 1, // Report test files slower than 1s (jest default: 5s)
   moduleFileExtensions: ['ts', 'tsx', 'js', 'jsx', 'json', 'node'],
-  globals: {
-    'ts-jest': {
+  transform: {
+    '^.+\\.tsx?$': ['ts-jest', {
       tsconfig: {
         types: ['jest', 'node']
       }
-    }
+    }]
   }
-}; 
\ No newline at end of file
+};
@@ -66,7 +66,7 @@ async function main() {
       console.log(`Category: ${result.leafCategory}`);
       console.log(`Full Path: ${result.bestMatch}`);
       console.log(`API Calls: ${result.apiCalls}`);
-      console.log(`Time: ${result.processingTime}ms`);
+      console.log(`Time: ${result.processingTime.toFixed(0)}ms`);
     } else {
       console.log(`Classification failed: ${result.error}`);
     }
@@ -35,6 +35,8 @@
  *    - Eliminates spelling errors (e.g., "Televisons" vs "Televisions")
  *    - Faster parsing and validation
  *    - Clear bounds checking (1-N validation)
+ *    - With structuredOutputs, a strict JSON schema makes any non-numeric
+ *      answer impossible
  * 
  * 4. BATCH PROCESSING (Why 100 categories per batch?)
  *    - OpenAI models have context limits
@@ -43,7 +45,8 @@
  *    - Balances API calls vs accuracy
  * 
  * 5. NO FALLBACKS (Why fail fast?)
- *    - API failures indicate serious issues (rate limits, outages)
+ *    - Transient API failures (rate limits, timeouts, 5xx) are retried with
+ *      backoff first; what still fails indicates a serious issue
  *    - Fallback to "first 2 categories" would give terrible results
  *    - Better to retry the product later than miscategorize
  *    - Preserves data quality over throughput
@@ -63,6 +66,9 @@
  *   Output: ["Electronics", "Home & Garden"]
  *   Model:  gpt-4.1-nano
  *   Why:    Narrows from 5,597 to 600-1200 leaves (depending on which L1s selected)
+ *   Note:   With stage1Embeddings, the 2 L1s closest to the summary embedding
+ *           are taken instead; the prompt is only used when that is ambiguous.
+ *           Skipped for taxonomies up to skipStage1MaxLeaves leaves (all L1s searched)
  * 
  * Stage 2A: FIRST L1 LEAF SELECTION
  *   Input:  Summary + ~339 Electronics leaves (in batches of 100)
@@ -75,6 +81,8 @@
  *   Output: ["Home Theater Seating", "TV Stands"...]
  *   Model:  gpt-4.1-nano
  *   Why:    Catches products that span categories
+ *   Note:   Batches of 2A and 2B run concurrently; leaves 2A already found are dropped.
+ *           The last partial batches of 2A and 2B share one call when they fit
  * 
  * Stage 3: FINAL SELECTION
  *   Input:  Summary + combined leaves from 2A/2B
@@ -104,6 +112,33 @@
  *    - Clear examples in prompts
  * 
  * ============================================================================
+ * PROMPT CACHING (prefix ordering)
+ * ============================================================================
+ * 
+ * OpenAI automatically reuses the computation for a prompt prefix it has seen
+ * recently (prompts of 1024+ tokens). Every stage prompt is therefore laid out as:
+ * 
+ *   system message   (fixed per stage)
+ *   instructions     (fixed per stage)
+ *   category list    (fixed per stage / batch, e.g. the 21 L1s or leaves 1-100)
+ *   output format    (fixed per stage)
+ *   Product: ...     (the ONLY part that varies between products - always last)
+ * 
+ * Keep it that way when editing prompts: anything product-specific placed
+ * before the category list breaks the shared prefix and the cache hit.
+ * Category lists also show bare leaf names ("17. Laptops"), never full paths:
+ * the L1 is known from Stage 1, and the prefixes would only add tokens.
+ * 
+ * In practice the Stage 2 batch prompts (100 leaves ≈ 2-3K tokens) are the ones
+ * long enough to be cached, and they make up most of the calls. Stage 2A and 2B
+ * both show the full leaf list of their L1 (2B's exclusions are applied to the
+ * answer, not the list), so every product searching an L1 shares its prefixes.
+ * Only the partial last batches of a two-L1 product may be merged into one
+ * shared call; that prompt depends on the L1 pair, not on the product.
+ * Stage 0/1 prompts stay below the 1024-token threshold, and Stage 3's list
+ * is specific to each product.
+ * 
+ * ============================================================================
  * PERFORMANCE & COST OPTIMIZATION
  * ============================================================================
  * 
@@ -121,16 +156,51 @@
  * ============================================================================
  */
 
-import { readFileSync } from 'fs';
-import OpenAI from 'openai';
+import { existsSync, readFileSync } from 'fs';
+import { performance } from 'perf_hooks';
+import { AsyncLocalStorage } from 'async_hooks';
+import * as crypto from 'crypto';
+import * as https from 'https';
+import * as path from 'path';
+import OpenAI, { APIConnectionError } from 'openai';
 import { 
-  TaxonomyNode, 
   TaxonomyPath, 
   ClassificationResult, 
   TaxonomyNavigatorConfig,
-  BatchProcessingOptions
+  BatchProcessingOptions,
+  CompletionRequest,
+  StageProgressCallback
 } from './types';
 import { getApiKey } from './config';
+import { DEFAULT_EMBEDDING_MODEL, normalizeVector } from './embeddings';
+import { createLimiter, createRateLimiter, RateLimiter } from './concurrency';
+
+/**
+ * One numbered option of a Stage 2 batch.
+ * `source` is the index of its L1 in the Stage 1 selection (0 = 2A, 1 = 2B).
+ */
+interface Stage2Option {
+  number: number;
+  leaf: string;
+  source: number;
+}
+
+/**
+ * The options of one Stage 2 prompt.
+ */
+interface Stage2Batch {
+  /** Shown in the prompt and in errors, e.g. "batch 2 of 4" */
+  title: string;
+  stageName: string;
+  maxSelections: number;
+  options: Stage2Option[];
+  /** The numbered options, one per line (also used by the packed Stage 2) */
+  optionList: string;
+  /** The prompt up to the product summary (identical for every product) */
+  promptPrefix: string;
+  /** A complete answer: maxSelections numbered lines (see stage2SelectFromBatch) */
+  complete: RegExp;
+}
 
 /**
  * Main AI-powered taxonomy classification engine.
@@ -153,25 +223,62 @@ import { getApiKey } from './config';
  * ```
  */
 export class TaxonomyNavigator {
-  /**
-   * Hierarchical tree representation of the Google Product Taxonomy.
-   * Structure: root -> L1 categories -> L2 -> ... -> leaf categories
-   * Used primarily for tree traversal and validation.
-   */
-  private taxonomy: TaxonomyNode;
-  
   /**
    * Flat array of all taxonomy paths for efficient searching.
    * Each path contains the full hierarchy and leaf status.
-   * This is the primary data structure used during classification.
+   * Together with the indices below, this is the only taxonomy structure:
+   * no stage walks a hierarchy, so no node tree is built.
    */
   private allPaths: TaxonomyPath[] = [];
+
+  /**
+   * Index from leaf category name to its taxonomy path.
+   * Built once while loading the taxonomy so that leaf → full path lookups
+   * are O(1) instead of a linear scan over allPaths for every product.
+   * Paths keep both the joined string and the split parts, so callers never
+   * re-split or re-join them.
+   * If a leaf name occurs more than once, the first path wins.
+   */
+  private leafToPath = new Map<string, TaxonomyPath>();
+
+  /**
+   * Distinct L1 categories that contain at least one leaf, in taxonomy order.
+   * Built once while loading the taxonomy (used by Stage 1 and for display).
+   */
+  private l1Categories: string[] = [];
+
+  /**
+   * Leaf category names of each L1 category, in taxonomy order.
+   * Built once while loading the taxonomy so Stage 2 doesn't filter
+   * all paths for every product. Its keys also validate the L1 names
+   * returned in Stage 1, so no set of valid L1s is rebuilt per call.
+   */
+  private l1ToLeaves = new Map<string, string[]>();
+
+  /**
+   * Parsed taxonomies shared by all navigator instances in this process,
+   * keyed by resolved taxonomy file path.
+   * The structures are read-only after loading, so sharing them is safe and
+   * spares every additional navigator the file read and parse.
+   */
+  private static readonly taxonomyCache = new Map<string, {
+    allPaths: TaxonomyPath[];
+    leafToPath: Map<string, TaxonomyPath>;
+    l1Categories: string[];
+    l1ToLeaves: Map<string, string[]>;
+  }>();
   
   /**
    * OpenAI API client instance for making classification requests.
-   * Configured with the API key during construction.
+   * Either config.client or the shared client for the API key.
    */
   private openai: OpenAI;
+
+  /**
+   * OpenAI clients shared by all navigator instances in this process,
+   * keyed by connection limit and API key (see getSharedClient).
+   */
+  private static readonly sharedClients = new Map<string, OpenAI>();
   
   /**
    * Merged configuration with defaults.
@@ -181,9 +288,52 @@ export class TaxonomyNavigator {
   
   /**
    * Tracks API calls per classification for cost monitoring.
-   * Reset at the start of each classifyProduct() call.
+   * Each classifyProduct()/classifyProducts() call runs with its own counter
+   * in async-local storage, so concurrent classifications on one navigator
+   * count only their own calls.
+   */
+  private readonly apiCallCounter = new AsyncLocalStorage<{ count: number }>();
+
+  /**
+   * The Stage 1 prompt up to the product summary. It only depends on the
+   * L1 list, so it is built once in the constructor.
+   */
+  private readonly stage1PromptPrefix: string;
+
+  /** The packed Stage 1 prompt up to the product list, built with stage1PromptPrefix */
+  private readonly packedStage1PromptPrefix: string;
+
+  /**
+   * L1 categories by lowercased, whitespace-collapsed name, built once in
+   * the constructor so Stage 1 answers that differ from the taxonomy only
+   * in case or spacing are matched with a lookup (see matchL1).
+   */
+  private readonly l1ByNormalizedName: Map<string, string>;
+
+  /**
+   * Stage 2 batches (numbered options and prompt prefix) per L1 list, built
+   * on first use and reused for every later product (see stage2Batches).
+   */
+  private readonly stage2BatchCache = new Map<string, Stage2Batch[]>();
+
+  /**
+   * Unit-length embeddings of l1Categories, one row per category, stored
+   * row-major in a single Float32Array. Created on first use when
+   * stage1Embeddings is enabled, then reused for every product.
+   */
+  private l1Embeddings: Promise<{ matrix: Float32Array; dimensions: number }> | null = null;
+
+  /**
+   * Responses of earlier chat completion requests, keyed by request hash,
+   * in least-recently-used order. Only used when responseCacheSize > 0
+   * (see callOpenAI).
+   */
+  private readonly responseCache = new Map<string, Promise<string>>();
+
+  /**
+   * Paces direct API calls to config.rateLimit; null when no limit is set.
    */
-  private apiCallCount = 0;
+  private readonly rateLimiter: RateLimiter | null;
 
   /**
    * Default configuration values.
@@ -196,11 +346,20 @@ export class TaxonomyNavigator {
     model: 'gpt-4.1-nano',      // Used for summary, stage 1, and stage 2
     stage2Model: 'gpt-4.1-nano', // Same as model
     stage3Model: 'gpt-4.1-mini', // Enhanced model for final selection
+    stage3SmallModelMaxCandidates: 0, // Stage 3 always uses stage3Model
     maxRetries: 3,
     enableLogging: true,
-    rateLimit: {
-      requestsPerSecond: 5  // Default to 5 request per second
-    }
+    rateLimit: {},              // No client-side pacing
+    completionHandler: null,    // Send requests directly to OpenAI
+    stage1Embeddings: false,    // Stage 1 by chat prompt
+    stage1EmbeddingMargin: 0.02,
+    responseCacheSize: 10_000,  // Recent responses reused for identical requests
+    maxConnections: 64,         // Pooled keep-alive connections
+    structuredOutputs: false,   // Free-text numeric answers
+    skipStage1MaxLeaves: 0,     // Always run Stage 1
+    maxConcurrentBatches: 20,   // Stage 2 batch calls in flight at once
+    maxPackedProducts: 20,      // Products per packed prompt (classifyProducts)
+    client: null                // Shared client (see getSharedClient)
   };
 
   /**
@@ -213,6 +372,116 @@ export class TaxonomyNavigator {
     maxSelectionsPerBatch: 15    // Max selections per batch
   };
 
+  /**
+   * Backoff limits for retried API calls (see withRetries).
+   */
+  private static readonly RETRY_BASE_DELAY_MS = 500;
+  private static readonly RETRY_MAX_DELAY_MS = 30_000;
+
+  /**
+   * Node network error codes that are worth a retry.
+   */
+  private static readonly TRANSIENT_ERROR_CODES = new Set([
+    'ECONNRESET', 'ECONNREFUSED', 'ETIMEDOUT', 'EPIPE', 'EAI_AGAIN'
+  ]);
+
+  /**
+   * Default number of products classified at the same time by
+   * classifyProductsConcurrently().
+   */
+  private static readonly DEFAULT_CONCURRENCY = 8;
+
+  /**
+   * Leading number of each line of a Stage 2 response (e.g. "3", " 15", "7. Laptops").
+   * Compiled once; matchAll() works on a copy, so the shared instance is never mutated.
+   */
+  private static readonly SELECTION_NUMBER = /^[ \t]*(\d+)/gm;
+
+  /**
+   * Runs of whitespace, collapsed to one space in product dedup keys.
+   * Compiled once (replace() resets lastIndex, so sharing is safe).
+   */
+  private static readonly WHITESPACE_RUN = /\s+/g;
+
+  /**
+   * Stage 3 answers with a single number, which needs only a few tokens.
+   */
+  private static readonly STAGE3_MAX_TOKENS = 5;
+
+  /**
+   * A complete Stage 3 answer: a number followed by anything that cannot
+   * continue it (newline, period, space). The streamed response is cut off
+   * there; an answer that is just the number ends with the stream.
+   */
+  private static readonly STAGE3_ANSWER = /^\s*\d+\D/;
+
+  /**
+   * Structured Outputs variants of the Stage 3 settings: {"choice": 2}.
+   * The answer counts as complete once the number is followed by another
+   * character, so the stream may be cut off before the closing brace.
+   */
+  private static readonly STAGE3_MAX_JSON_TOKENS = 10;
+  private static readonly STAGE3_JSON_ANSWER = /"choice"\s*:\s*(\d+)\D/;
+  private static readonly STAGE3_SCHEMA: NonNullable<CompletionRequest['response_format']> = {
+    type: 'json_schema',
+    json_schema: {
+      name: 'final_selection',
+      strict: true,
+      schema: {
+        type: 'object',
+        properties: { choice: { type: 'integer' } },
+        required: ['choice'],
+        additionalProperties: false
+      }
+    }
+  };
+
+  /**
+   * Structured Outputs schema for Stage 2: {"picks": [3, 7, 15]}.
+   * The number range is checked after parsing, as with free-text answers.
+   */
+  private static readonly STAGE2_SCHEMA: NonNullable<CompletionRequest['response_format']> = {
+    type: 'json_schema',
+    json_schema: {
+      name: 'category_selection',
+      strict: true,
+      schema: {
+        type: 'object',
+        properties: { picks: { type: 'array', items: { type: 'integer' } } },
+        required: ['picks'],
+        additionalProperties: false
+      }
+    }
+  };
+
+  /**
+   * Summary rules shared by the single and packed Stage 0 prompts.
+   */
+  private static readonly SUMMARY_RULES = `1. START with the EXACT common product name (e.g., "television" not "home entertainment display", "lipstick" not "lip color product")
+2. Include 1-2 synonyms or alternative names in parentheses to clarify (e.g., "Television (TV, flat-screen display)")
+3. Core function that defines its category
+4. Key distinguishing features within that category
+5. Primary use context
+
+Use standard product names. Include clarifying synonyms. Be direct and specific.
+IMPORTANT: Identify what the product IS, not what accessories it might need.
+Example: "Television (TV, flat-screen display). Electronic device for viewing video content..."`;
+
+  /**
+   * Main-product vs accessory guidance shared by the single and packed Stage 2 prompts.
+   */
+  private static readonly STAGE2_GUIDANCE = `Think carefully about what the product actually is.
+Be aware: The list may contain both main product categories AND accessories/parts.
+IMPORTANT: If the product is a complete item (like a circular saw), choose the main product category (e.g., 'Handheld Circular Saws'), NOT the accessories category (e.g., 'Handheld Circular Saw Accessories').
+Only choose accessory categories if the product is actually an accessory/part, not the main product itself.
+Examples: A TV should be 'Televisions' not 'TV Mounts'; A laptop should be 'Laptops' not 'Laptop Cases'.`;
+
+  /**
+   * "Most likely, not perfect" guidance shared by the single and packed Stage 3 prompts.
+   */
+  private static readonly STAGE3_GUIDANCE = `Don't worry about finding a perfect match - just pick the option that seems most likely to be correct.
+If multiple options seem reasonable, pick the one that feels most probable.`;
+
   /**
    * Creates a new TaxonomyNavigator instance.
    * 
@@ -221,10 +490,17 @@ export class TaxonomyNavigator {
    * @param config.apiKey - OpenAI API key. If not provided, will attempt to read from data/api_key.txt
    * @param config.model - Model for stages 0-2 (default: 'gpt-4.1-nano' for cost efficiency)
    * @param config.stage3Model - Model for final selection (default: 'gpt-4.1-mini' for accuracy)
+   * @param config.stage3SmallModelMaxCandidates - Clear-cut Stage 3 choices with at most this many candidates go to stage2Model (default: 0 = off)
    * @param config.enableLogging - Whether to log operations to console (default: true)
    * @param config.rateLimit - API rate limiting configuration
+   * @param config.stage1Embeddings - Select L1 categories by embedding similarity (default: false)
+   * @param config.maxConnections - Maximum open connections to the OpenAI API (default: 64)
+   * @param config.maxConcurrentBatches - Stage 2 batch calls in flight at once (default: 20)
+   * @param config.maxPackedProducts - Products per packed prompt in classifyProducts (default: 20)
+   * @param config.client - OpenAI client to use (default: one shared client per API key)
+   * @param config.responseCacheSize - Number of API responses to reuse for identical requests (default: 10000, 0 = off)
    * 
-   * @throws {Error} If taxonomy file cannot be loaded
+   * @throws {Error} If taxonomy file does not exist or cannot be loaded
    * @throws {Error} If API key is not provided and cannot be found in api_key.txt
    */
   constructor(config: TaxonomyNavigatorConfig = {}) {
@@ -238,6 +514,38 @@ export class TaxonomyNavigator {
       }
     };
 
+    // RPM falls back to the per-second setting; nothing to pace without limits
+    const { requestsPerSecond = 0, requestsPerMinute = requestsPerSecond * 60, tokensPerMinute = 0 } = this.config.rateLimit;
+    this.rateLimiter = requestsPerMinute > 0 || tokensPerMinute > 0
+      ? createRateLimiter({ requestsPerMinute, tokensPerMinute })
+      : null;
+
+    // Load taxonomy first: a missing file is a setup error regardless of the API key
+    this.loadTaxonomy();
+
+    this.l1ByNormalizedName = new Map(this.l1Categories.map(l1 =>
+      [l1.toLowerCase().replace(TaxonomyNavigator.WHITESPACE_RUN, ' '), l1] as [string, string]
+    ));
+
+    // Invariant prefix first, product last (see PROMPT CACHING in the header)
+    this.stage1PromptPrefix = `Select exactly 2 categories from this list that best match the product described at the end:
+
+${this.l1Categories.join('\n')}
+
+Return one category per line.
+
+Product: `;
+
+    this.packedStage1PromptPrefix = `For EACH product listed at the end, select exactly 2 categories from this list that best match the product:
+
+${this.l1Categories.join('\n')}
+
+Return ONLY a JSON array with one object per product, in order, using exact spelling:
+[{"product": 1, "categories": ["First Category", "Second Category"]}]
+
+Products:
+`;
+
     // Load API key if not provided
     const apiKey = getApiKey(this.config.apiKey);
     if (!apiKey) {
@@ -245,17 +553,12 @@ export class TaxonomyNavigator {
     }
     this.config.apiKey = apiKey;
 
-    // Initialize OpenAI
-    this.openai = new OpenAI({
-      apiKey: this.config.apiKey
-    });
+    // Use the given client, or the process-wide one for this key
+    this.openai = this.config.client ?? TaxonomyNavigator.getSharedClient(apiKey, this.config.maxConnections);
 
-    // Load taxonomy
-    this.taxonomy = this.buildTaxonomyTree();
-    
     if (this.config.enableLogging) {
       console.log(`Initialized TaxonomyNavigator with ${this.allPaths.length} paths`);
-      console.log(`Leaf nodes: ${this.allPaths.filter(p => p.isLeaf).length}`);
+      console.log(`Leaf nodes: ${this.leafCategoryCount}`);
     }
   }
 
@@ -281,7 +584,9 @@ export class TaxonomyNavigator {
    * 
    * PERFORMANCE OPTIMIZATION:
    * - Stage 3 skipped if only 1 leaf found
-   * - Stages run sequentially (not parallel) for consistency
+   * - Stages run sequentially (each needs the previous stage's output)
+   * - Stage 2A and 2B, and all their batches, run concurrently
+   *   (bounded by maxConcurrentBatches)
    * - API call count tracked for cost monitoring
    * 
    * TYPICAL FLOW EXAMPLE:
@@ -295,13 +600,19 @@ export class TaxonomyNavigator {
    * Result: "Electronics > Video > Televisions"
    * ```
    * 
+   * PROGRESS REPORTING:
+   * - The optional onProgress callback is called as each stage finishes,
+   *   so interactive callers can show progress before the final result
+   * 
    * @param productInfo - Raw product description, title, or combined text
+   * @param onProgress - Optional callback receiving (stage, info) after each stage
    * @returns Complete classification result with paths, timing, and metadata
    * 
    * @example
    * ```typescript
    * const result = await navigator.classifyProduct(
-   *   "Apple MacBook Pro 16-inch M3 Max Space Black"
+   *   "Apple MacBook Pro 16-inch M3 Max Space Black",
+   *   (stage, info) => console.log(`${stage}: ${info}`)
    * );
    * 
    * if (result.success) {
@@ -313,17 +624,21 @@ export class TaxonomyNavigator {
    * 
    * @public
    */
-  async classifyProduct(productInfo: string): Promise<ClassificationResult> {
-    const startTime = Date.now();
+  async classifyProduct(productInfo: string, onProgress?: StageProgressCallback): Promise<ClassificationResult> {
+    return this.apiCallCounter.run({ count: 0 }, () => this.runPipeline(productInfo, onProgress));
+  }
+
+  /**
+   * Runs the single-product pipeline (see classifyProduct).
+   */
+  private async runPipeline(productInfo: string, onProgress?: StageProgressCallback): Promise<ClassificationResult> {
+    const startTime = performance.now();
     
     try {
       this.log(`\n${'='.repeat(60)}`);
       this.log(`Starting classification for: ${productInfo.substring(0, 100)}...`);
       this.log(`${'='.repeat(60)}`);
       
-      // Reset API call counter
-      this.apiCallCount = 0;
-      
       // Initialize stage details object
       const stageDetails: ClassificationResult['stageDetails'] = {
         aiSummary: '',
@@ -340,43 +655,44 @@ export class TaxonomyNavigator {
       const summary = await this.generateProductSummary(productInfo);
       stageDetails.aiSummary = summary;
       this.log(`Summary: ${summary}`);
+      onProgress?.('Stage 0', summary);
       
-      // Stage 1: Select top 2 L1 categories
-      this.log('\n🎯 Stage 1: Selecting top L1 categories...');
-      const selectedL1s = await this.stage1SelectL1Categories(summary);
+      // Stage 1: Select top 2 L1 categories (all of them for small taxonomies)
+      let selectedL1s: string[];
+      if (this.skipsStage1) {
+        selectedL1s = this.l1Categories;
+        this.log(`\n⏩ Stage 1: Skipped (small taxonomy, searching all ${selectedL1s.length} L1 categories)`);
+      } else {
+        this.log('\n🎯 Stage 1: Selecting top L1 categories...');
+        selectedL1s = await this.stage1SelectL1Categories(summary);
+        this.log(`Selected L1 categories: ${selectedL1s.join(', ')}`);
+      }
       stageDetails.stage1L1Categories = selectedL1s;
-      this.log(`Selected L1 categories: ${selectedL1s.join(', ')}`);
+      onProgress?.('Stage 1', selectedL1s.join(', '));
       
       if (selectedL1s.length === 0) {
         return this.createErrorResult('No L1 categories selected', startTime);
       }
       
-      // Stage 2A: Get leaves from first L1
-      this.log('\n🔍 Stage 2A: Finding leaves from first L1 category...');
-      const stage2aLeaves = await this.stage2SelectLeaves(
-        summary, 
-        selectedL1s, 
-        [],
-        'Stage 2A'
-      );
+      // Stage 2A and 2B: leaves from both L1s, searched concurrently
+      // (more than 2 L1s, after a skipped Stage 1, are searched as one list in 2A)
+      const hasSecondL1 = selectedL1s.length === 2;
+      const firstSource = hasSecondL1 || selectedL1s.length === 1 ? selectedL1s[0] : 'all L1 categories';
+      this.log(hasSecondL1
+        ? '\n🔍 Stage 2A/2B: Finding leaves from both L1 categories...'
+        : `\n🔍 Stage 2A: Finding leaves from ${firstSource}...`);
+      const [stage2aLeaves, stage2bLeaves = []] = await this.stage2SelectLeaves(summary, selectedL1s);
       stageDetails.stage2aLeaves = stage2aLeaves;
-      this.log(`Found ${stage2aLeaves.length} leaves from ${selectedL1s[0]}`);
+      this.log(`Found ${stage2aLeaves.length} leaves from ${firstSource}`);
+      onProgress?.('Stage 2A', `${stage2aLeaves.length} candidates from ${firstSource}`);
       
-      // Stage 2B: Get leaves from second L1 (if applicable)
-      let stage2bLeaves: string[] = [];
-      if (selectedL1s.length > 1) {
-        this.log('\n🔍 Stage 2B: Finding leaves from second L1 category...');
-        stage2bLeaves = await this.stage2SelectLeaves(
-          summary,
-          selectedL1s,
-          stage2aLeaves,
-          'Stage 2B'
-        );
+      if (hasSecondL1) {
         stageDetails.stage2bLeaves = stage2bLeaves;
         this.log(`Found ${stage2bLeaves.length} leaves from ${selectedL1s[1]}`);
+        onProgress?.('Stage 2B', `${stage2bLeaves.length} candidates from ${selectedL1s[1]}`);
       } else {
         stageDetails.stage2bSkipped = true;
-        this.log('\n⏩ Stage 2B: Skipped (only one L1 category selected)');
+        this.log('\n⏩ Stage 2B: Skipped (no second L1 category to search)');
       }
       
       // Combine all leaves
@@ -402,30 +718,32 @@ export class TaxonomyNavigator {
         }
         
         this.log(`Selected: ${allLeaves[bestMatchIndex]}`);
+        onProgress?.('Stage 3', allLeaves[bestMatchIndex]);
       } else {
         stageDetails.stage3Skipped = true;
         this.log('\n⏩ Stage 3: Skipped (only one candidate)');
         this.log(`Using single result: ${allLeaves[0]}`);
       }
       
-      // Build result
+      // Build result (the index keeps the joined path, so nothing is re-joined)
       const bestPath = paths[bestMatchIndex];
-      const processingTime = Date.now() - startTime;
+      const bestMatch = this.fullPathOf(allLeaves[bestMatchIndex]);
+      const processingTime = performance.now() - startTime;
       
       this.log(`\n✅ Classification complete!`);
-      this.log(`Best match: ${bestPath.join(' > ')}`);
-      this.log(`Processing time: ${processingTime}ms`);
-      this.log(`API calls: ${this.apiCallCount}`);
+      this.log(`Best match: ${bestMatch}`);
+      this.log(`Processing time: ${processingTime.toFixed(0)}ms`);
+      this.log(`API calls: ${this.apiCallsSoFar}`);
       this.log(`${'='.repeat(60)}\n`);
       
       return {
         success: true,
         paths,
         bestMatchIndex,
-        bestMatch: bestPath.join(' > '),
+        bestMatch,
         leafCategory: bestPath[bestPath.length - 1],
         processingTime,
-        apiCalls: this.apiCallCount,
+        apiCalls: this.apiCallsSoFar,
         stageDetails
       };
       
@@ -436,6 +754,350 @@ export class TaxonomyNavigator {
     }
   }
 
+  /**
+   * Classifies several products with shared ("packed") API calls.
+   * 
+   * Runs the same pipeline as classifyProduct(), but each stage sends all
+   * products of the chunk in ONE prompt and asks for a JSON array with one
+   * answer per product, so a chunk of B products costs roughly as many API
+   * calls as a single product does.
+   * 
+   * PACKED STAGES:
+   * - Stage 0: one call summarizes every product
+   * - Stage 1: one call selects the L1 categories of every product
+   * - Stage 2A/2B: one round for both stages; products sharing a target L1
+   *   share each leaf batch call, whether it is their first or second L1
+   * - Stage 3: one call makes the final selection for every product that needs it
+   * 
+   * CHUNKS:
+   * - Products are packed in chunks of at most maxPackedProducts (default 20);
+   *   larger inputs are split, and the chunks run concurrently
+   * 
+   * QUALITY TRADE-OFF:
+   * - The model has to keep several products apart in one context, so accuracy
+   *   drops slightly as the chunk grows; 5-10 products per chunk works well
+   * - Stage 2B runs alongside 2A, so leaves already selected in 2A are
+   *   removed from its selections afterwards
+   * 
+   * ERROR HANDLING:
+   * - A failed API call fails every product still in progress (no fallbacks)
+   * - A product missing from a packed response fails on its own
+   * 
+   * RESULT METRICS:
+   * - processingTime: wall-clock time of the whole chunk
+   * - apiCalls: number of (shared) calls the product took part in
+   * 
+   * DUPLICATES:
+   * - Products that differ only in case or spacing are classified once;
+   *   the repeats get a copy of that result with apiCalls 0
+   * 
+   * @param productInfos - Raw product descriptions to classify together
+   * @returns One classification result per product, in input order
+   * 
+   * @example
+   * ```typescript
+   * const results = await navigator.classifyProducts([
+   *   "Samsung 65-inch QLED 4K Smart TV",
+   *   "Nike Air Max 270 React Men's Running Shoes"
+   * ]);
+   * results.forEach(r => console.log(r.bestMatch));
+   * ```
+   * 
+   * @public
+   */
+  async classifyProducts(productInfos: string[]): Promise<ClassificationResult[]> {
+    return this.classifyUnique(productInfos, async unique => {
+      // Chunks of at most maxPackedProducts, run concurrently (bounded)
+      const maxPackedProducts = Math.max(1, Math.floor(this.config.maxPackedProducts) || 1);
+      const limit = createLimiter(TaxonomyNavigator.DEFAULT_CONCURRENCY);
+      const chunks: string[][] = [];
+      for (let start = 0; start < unique.length; start += maxPackedProducts) {
+        chunks.push(unique.slice(start, start + maxPackedProducts));
+      }
+
+      const results = await Promise.all(chunks.map(chunk => limit(() => chunk.length === 1
+        ? Promise.all([this.classifyProduct(chunk[0])])
+        : this.apiCallCounter.run({ count: 0 }, () => this.runPackedPipeline(chunk))
+      )));
+      return results.flat();
+    });
+  }
+
+  /**
+   * Classifies many products, running up to `concurrency` single-product
+   * pipelines at the same time.
+   * 
+   * Every product goes through classifyProduct() on its own (no shared
+   * prompts, so no accuracy trade-off as with classifyProducts()); the gain
+   * comes from overlapping the network round trips of different products.
+   * Wall time drops from about N × pipeline latency to N / concurrency ×
+   * pipeline latency, until the account's rate limits are reached.
+   * Duplicates are classified once, as in classifyProducts().
+   * 
+   * @param productInfos - Raw product descriptions to classify
+   * @param concurrency - Maximum products in flight (default: 8)
+   * @returns One classification result per product, in input order
+   * 
+   * @example
+   * ```typescript
+   * const results = await navigator.classifyProductsConcurrently(products, 16);
+   * console.log(results.filter(r => r.success).length);
+   * ```
+   * 
+   * @public
+   */
+  async classifyProductsConcurrently(
+    productInfos: string[],
+    concurrency: number = TaxonomyNavigator.DEFAULT_CONCURRENCY
+  ): Promise<ClassificationResult[]> {
+    const limit = createLimiter(concurrency);
+    return this.classifyUnique(productInfos, unique =>
+      Promise.all(unique.map(info => limit(() => this.classifyProduct(info))))
+    );
+  }
+
+  /**
+   * Classifies each distinct product once and maps the results back to
+   * the input order.
+   * 
+   * Products count as the same if they differ only in case or spacing.
+   * Repeats get a copy of the first occurrence's result with apiCalls 0,
+   * so the sum of apiCalls stays the true number of calls made.
+   * 
+   * @param productInfos - Raw product descriptions, possibly repeated
+   * @param classify - Classifies the distinct products, in the given order
+   * @returns One classification result per input product
+   * 
+   * @private
+   */
+  private async classifyUnique(
+    productInfos: string[],
+    classify: (unique: string[]) => Promise<ClassificationResult[]>
+  ): Promise<ClassificationResult[]> {
+    const unique: string[] = [];
+    const uniqueIndex = new Map<string, number>();
+    const inverse = productInfos.map(info => {
+      const key = info.toLowerCase().trim().replace(TaxonomyNavigator.WHITESPACE_RUN, ' ');
+      let index = uniqueIndex.get(key);
+      if (index === undefined) {
+        index = unique.length;
+        uniqueIndex.set(key, index);
+        unique.push(info);
+      }
+      return index;
+    });
+
+    if (unique.length < productInfos.length) {
+      this.log(`♻️  ${productInfos.length - unique.length} duplicate product(s) will reuse earlier results`);
+    }
+
+    // Indices are handed out in order of first occurrence, so an index is
+    // seen for the first time exactly when it is the next unused one
+    const results = await classify(unique);
+    let nextNew = 0;
+    return inverse.map(index => {
+      if (index === nextNew) {
+        nextNew++;
+        return results[index];
+      }
+      return { ...results[index], apiCalls: 0 };
+    });
+  }
+
+  /**
+   * Runs the packed pipeline for two or more products (see classifyProducts).
+   */
+  private async runPackedPipeline(productInfos: string[]): Promise<ClassificationResult[]> {
+    const startTime = performance.now();
+    const count = productInfos.length;
+    const apiCalls = new Array<number>(count).fill(0);
+    const errors = new Array<string | null>(count).fill(null);
+    const stageDetails: NonNullable<ClassificationResult['stageDetails']>[] = productInfos.map(() => ({
+      aiSummary: '',
+      stage1L1Categories: [],
+      stage2aLeaves: [],
+      stage2bLeaves: [],
+      stage2bSkipped: false,
+      totalCandidates: 0,
+      stage3Skipped: false
+    }));
+
+    const active = () => stageDetails.map((_, i) => i).filter(i => errors[i] === null);
+    const fail = (ids: number[], error: string) => ids.forEach(i => { errors[i] = error; });
+
+    this.log(`\n${'='.repeat(60)}`);
+    this.log(`Starting packed classification of ${count} products...`);
+    this.log(`${'='.repeat(60)}`);
+
+    const finalIndices = new Array<number>(count).fill(0);
+
+    try {
+      // Stage 0: one call for all summaries
+      this.log('\n📝 Stage 0: Generating product summaries (packed)...');
+      let ids = active();
+      ids.forEach(i => apiCalls[i]++);
+      const summaries = await this.packedGenerateSummaries(productInfos);
+      summaries.forEach((summary, i) => {
+        if (summary) stageDetails[i].aiSummary = summary;
+        else fail([i], 'Missing product summary in packed response');
+      });
+
+      // Stage 1: one call for all L1 selections (all L1s for small taxonomies)
+      ids = active();
+      let unresolved = ids;
+      if (this.skipsStage1) {
+        this.log(`\n⏩ Stage 1: Skipped (small taxonomy, searching all ${this.l1Categories.length} L1 categories)`);
+        ids.forEach(i => { stageDetails[i].stage1L1Categories = this.l1Categories; });
+        unresolved = [];
+      } else if (this.config.stage1Embeddings) {
+        this.log('\n🎯 Stage 1: Selecting top L1 categories (packed)...');
+        ids.forEach(i => apiCalls[i]++);
+        const shortlists = await this.stage1EmbeddingShortlists(ids.map(i => stageDetails[i].aiSummary));
+        ids.forEach((i, pos) => { stageDetails[i].stage1L1Categories = shortlists[pos] ?? []; });
+        unresolved = ids.filter((_, pos) => !shortlists[pos]);
+      }
+      if (unresolved.length > 0) {
+        if (!this.config.stage1Embeddings) this.log('\n🎯 Stage 1: Selecting top L1 categories (packed)...');
+        unresolved.forEach(i => apiCalls[i]++);
+        const l1Selections = await this.packedStage1SelectL1Categories(unresolved.map(i => stageDetails[i].aiSummary));
+        unresolved.forEach((i, pos) => { stageDetails[i].stage1L1Categories = l1Selections[pos]; });
+      }
+      ids.forEach(i => {
+        if (stageDetails[i].stage1L1Categories.length === 0) fail([i], 'No L1 categories selected');
+      });
+
+      // Stage 2A/2B: 2B only depends on Stage 1, so both run as one round;
+      // requests for the same L1 share their batch calls across stages
+      // (more than 2 L1s, after a skipped Stage 1, are searched as one list in 2A)
+      this.log('\n🔍 Stage 2A/2B: Finding leaves from the selected L1 categories (packed)...');
+      ids = active();
+      const ids2b = ids.filter(i => stageDetails[i].stage1L1Categories.length === 2);
+      ids.filter(i => !ids2b.includes(i)).forEach(i => { stageDetails[i].stage2bSkipped = true; });
+      const firstL1s = (l1s: string[]) => l1s.length > 2 ? l1s : [l1s[0]];
+      const leaves2 = await this.packedStage2SelectLeaves(
+        [
+          ...ids.map(i => ({ i, targetL1s: firstL1s(stageDetails[i].stage1L1Categories) })),
+          ...ids2b.map(i => ({ i, targetL1s: [stageDetails[i].stage1L1Categories[1]] }))
+        ].map(({ i, targetL1s }) => ({
+          summary: stageDetails[i].aiSummary,
+          targetL1s,
+          onCall: () => apiCalls[i]++
+        })),
+        'Stage 2A/2B'
+      );
+      ids.forEach((i, pos) => { stageDetails[i].stage2aLeaves = leaves2[pos]; });
+      ids2b.forEach((i, pos) => {
+        const selectedA = new Set(stageDetails[i].stage2aLeaves);
+        stageDetails[i].stage2bLeaves = leaves2[ids.length + pos].filter(leaf => !selectedA.has(leaf));
+      });
+
+      ids.forEach(i => {
+        const details = stageDetails[i];
+        details.totalCandidates = details.stage2aLeaves.length + details.stage2bLeaves.length;
+        if (details.totalCandidates === 0) fail([i], 'No leaf categories found');
+      });
+
+      // Stage 3: one call for every product with more than one candidate
+      ids = active();
+      const ids3 = ids.filter(i => stageDetails[i].totalCandidates > 1);
+      ids.filter(i => !ids3.includes(i)).forEach(i => { stageDetails[i].stage3Skipped = true; });
+      if (ids3.length > 0) {
+        this.log('\n🏁 Stage 3: Making final selections (packed)...');
+        ids3.forEach(i => apiCalls[i]++);
+        const selections = await this.packedStage3FinalSelection(ids3.map(i => ({
+          summary: stageDetails[i].aiSummary,
+          leaves: [...stageDetails[i].stage2aLeaves, ...stageDetails[i].stage2bLeaves]
+        })));
+        ids3.forEach((i, pos) => {
+          if (selections[pos] < 0) fail([i], 'Stage 3 selection failed');
+          else finalIndices[i] = selections[pos];
+        });
+      }
+    } catch (error) {
+      const errorMessage = error instanceof Error ? error.message : 'Unknown error';
+      this.log(`\n❌ Error: ${errorMessage}`);
+      fail(active(), errorMessage);
+    }
+
+    this.log(`\n✅ Packed classification complete! API calls: ${this.apiCallsSoFar}`);
+
+    return productInfos.map((_, i) => {
+      if (errors[i] !== null) {
+        return { ...this.createErrorResult(errors[i]!, startTime), apiCalls: apiCalls[i] };
+      }
+
+      const details = stageDetails[i];
+      const leaves = [...details.stage2aLeaves, ...details.stage2bLeaves];
+      const paths = this.convertLeavesToPaths(leaves);
+      const bestPath = paths[finalIndices[i]];
+      return {
+        success: true,
+        paths,
+        bestMatchIndex: finalIndices[i],
+        bestMatch: this.fullPathOf(leaves[finalIndices[i]]),
+        leafCategory: bestPath[bestPath.length - 1],
+        processingTime: performance.now() - startTime,
+        apiCalls: apiCalls[i],
+        stageDetails: details
+      };
+    });
+  }
+
+  /**
+   * Number of distinct L1 categories that contain leaf categories
+   * (the options offered in Stage 1). Computed once at load time.
+   * 
+   * @public
+   */
+  get l1CategoryCount(): number {
+    return this.l1Categories.length;
+  }
+
+  /**
+   * Whether Stage 1 is skipped because the taxonomy is small enough to
+   * search all of it in Stage 2 (see skipStage1MaxLeaves).
+   */
+  private get skipsStage1(): boolean {
+    return this.config.skipStage1MaxLeaves > 0 && this.leafCategoryCount <= this.config.skipStage1MaxLeaves;
+  }
+
+  /**
+   * Number of leaf categories, read from the per-L1 leaf lists built at
+   * load time (no pass over all paths).
+   * 
+   * @public
+   */
+  get leafCategoryCount(): number {
+    let count = 0;
+    for (const leaves of this.l1ToLeaves.values()) count += leaves.length;
+    return count;
+  }
+
+  /**
+   * Creates embeddings for one or more texts.
+   * 
+   * Not part of the classification pipeline itself; used by callers such as
+   * the semantic classification cache to detect near-duplicate products
+   * without running the full multi-stage pipeline.
+   * 
+   * @param texts - Texts to embed (one API call for all of them)
+   * @param model - Embedding model (default: 'text-embedding-3-small')
+   * @returns One embedding vector per input text, in input order
+   * @throws {Error} If the API call fails
+   * 
+   * @public
+   */
+  async embedTexts(texts: string[], model: string = DEFAULT_EMBEDDING_MODEL): Promise<number[][]> {
+    const response = await this.withRetries(async () => {
+      await this.rateLimiter?.(Math.ceil(texts.reduce((sum, text) => sum + text.length, 0) / 4));
+      return this.openai.embeddings.create({ model, input: texts });
+    });
+
+    return [...response.data]
+      .sort((a, b) => a.index - b.index)
+      .map(item => item.embedding);
+  }
+
   /**
    * Logs messages to console if logging is enabled.
    * Used throughout the classification pipeline for debugging and monitoring.
@@ -479,15 +1141,7 @@ export class TaxonomyNavigator {
    */
   private async generateProductSummary(productInfo: string): Promise<string> {
     const prompt = `Summarize this product in 40-60 words to make its category crystal clear:
-1. START with the EXACT common product name (e.g., "television" not "home entertainment display", "lipstick" not "lip color product")
-2. Include 1-2 synonyms or alternative names in parentheses to clarify (e.g., "Television (TV, flat-screen display)")
-3. Core function that defines its category
-4. Key distinguishing features within that category
-5. Primary use context
-
-Use standard product names. Include clarifying synonyms. Be direct and specific.
-IMPORTANT: Identify what the product IS, not what accessories it might need.
-Example: "Television (TV, flat-screen display). Electronic device for viewing video content..."
+${TaxonomyNavigator.SUMMARY_RULES}
 
 Product: ${productInfo}
 
@@ -544,20 +1198,13 @@ Summary:`;
    * @private
    */
   private async stage1SelectL1Categories(productSummary: string): Promise<string[]> {
-    // Extract unique L1 categories
-    const l1Categories = [...new Set(
-      this.allPaths
-        .filter(p => p.isLeaf)
-        .map(p => p.parts[0])
-    )];
-
-    const prompt = `Product: ${productSummary}
-
-Select exactly 2 categories from this list that best match the product:
-
-${l1Categories.join('\n')}
+    if (this.config.stage1Embeddings) {
+      const [shortlist] = await this.stage1EmbeddingShortlists([productSummary]);
+      if (shortlist) return shortlist;
+      this.log('Stage 1 embedding shortlist is ambiguous, asking the model');
+    }
 
-Return one category per line:`;
+    const prompt = this.stage1PromptPrefix + productSummary;
 
     try {
       const response = await this.callOpenAI(
@@ -565,14 +1212,13 @@ Return one category per line:`;
         prompt
       );
 
-      // Parse and validate response
+      // Parse and validate response (duplicates removed before taking 2)
       const selected = response
         .split('\n')
-        .map(line => line.trim())
-        .filter(line => line && l1Categories.includes(line))
-        .slice(0, 2);
+        .map(line => this.matchL1(line))
+        .filter((l1): l1 is string => l1 !== undefined);
 
-      return [...new Set(selected)]; // Remove duplicates
+      return [...new Set(selected)].slice(0, 2);
     } catch (error) {
       this.log(`Stage 1 failed: ${error}`);
       throw new Error(`API call failed during Stage 1: ${error instanceof Error ? error.message : error}`);
@@ -580,19 +1226,97 @@ Return one category per line:`;
   }
 
   /**
-   * Stage 2: Select leaf nodes from chosen L1 categories using batch processing.
+   * Stage 1 by embedding similarity: shortlist the 2 L1 categories closest
+   * to each product summary.
    * 
-   * This is the most complex stage, implementing a sophisticated batch processing
-   * system to handle L1 categories with hundreds of leaf nodes.
+   * The L1 embeddings are created once (see l1Embeddings); each call then
+   * embeds all given summaries in ONE embedding request and scores them
+   * against every L1 with a dot product of unit vectors.
    * 
-   * BATCH PROCESSING ARCHITECTURE:
-   * - Divides leaves into batches of 100 (configurable)
-   * - Each batch allows up to 15 selections
-   * - Total possible selections: batches × 15 (e.g., 4 batches = 60 selections)
-   * - Processes batches sequentially to avoid overwhelming the AI
+   * A shortlist is only returned when it is clear-cut: the second L1 must
+   * lead the third by at least stage1EmbeddingMargin. Otherwise the entry
+   * is null and the caller falls back to the chat prompt.
    * 
-   * NUMERIC SELECTION STRATEGY:
-   * - Categories numbered 1-N within each batch
+   * @param summaries - AI-generated product summaries
+   * @returns Per summary, the 2 closest L1 categories, or null if ambiguous
+   * @throws {Error} If an embedding request fails
+   * 
+   * @private
+   */
+  private async stage1EmbeddingShortlists(summaries: string[]): Promise<(string[] | null)[]> {
+    try {
+      const { matrix, dimensions } = await this.getL1Embeddings();
+
+      const counter = this.apiCallCounter.getStore();
+      if (counter) counter.count++;
+      const queries = await this.embedTexts(summaries);
+
+      return queries.map(query => {
+        if (query.length !== dimensions) {
+          throw new Error(`Embedding length mismatch: ${query.length} vs ${dimensions}`);
+        }
+        const unit = normalizeVector(query);
+
+        // Top 3 scores in one pass: 2 to select, the third to check the margin
+        const top = [-1, -1, -1];
+        const best = [-1, -1, -1];
+        for (let row = 0; row < this.l1Categories.length; row++) {
+          let score = 0;
+          const offset = row * dimensions;
+          for (let i = 0; i < dimensions; i++) score += matrix[offset + i] * unit[i];
+
+          for (let rank = 0; rank < 3; rank++) {
+            if (score > top[rank]) {
+              top.splice(rank, 0, score);
+              best.splice(rank, 0, row);
+              top.length = best.length = 3;
+              break;
+            }
+          }
+        }
+
+        const clearCut = this.l1Categories.length <= 2 || top[1] - top[2] >= this.config.stage1EmbeddingMargin;
+        return clearCut ? best.filter(row => row >= 0).slice(0, 2).map(row => this.l1Categories[row]) : null;
+      });
+    } catch (error) {
+      this.log(`Stage 1 embedding shortlist failed: ${error}`);
+      throw new Error(`API call failed during Stage 1: ${error instanceof Error ? error.message : error}`);
+    }
+  }
+
+  /**
+   * Embeds the L1 categories on first use and caches the unit vectors.
+   * A failed request is not cached, so the next product tries again.
+   * 
+   * @private
+   */
+  private getL1Embeddings(): Promise<{ matrix: Float32Array; dimensions: number }> {
+    if (!this.l1Embeddings) {
+      this.l1Embeddings = this.embedTexts(this.l1Categories).then(vectors => {
+        const dimensions = vectors[0]?.length ?? 0;
+        const matrix = new Float32Array(vectors.length * dimensions);
+        vectors.forEach((vector, row) => matrix.set(normalizeVector(vector), row * dimensions));
+        return { matrix, dimensions };
+      });
+      this.l1Embeddings.catch(() => { this.l1Embeddings = null; });
+    }
+    return this.l1Embeddings;
+  }
+
+  /**
+   * Stage 2: Select leaf nodes from chosen L1 categories using batch processing.
+   * 
+   * This is the most complex stage, implementing a sophisticated batch processing
+   * system to handle L1 categories with hundreds of leaf nodes.
+   * 
+   * BATCH PROCESSING ARCHITECTURE:
+   * - Divides leaves into batches of 100 (configurable)
+   * - Each batch allows up to 15 selections
+   * - Total possible selections: batches × 15 (e.g., 4 batches = 60 selections)
+   * - Each batch is a separate, small prompt so the AI is not overwhelmed
+   * 
+   * NUMERIC SELECTION STRATEGY:
+   * - Categories numbered 1-N within each batch
    * - AI returns numbers only: "3\n47\n89"
    * - Prevents hallucination of category names
    * - Simple validation: 1 ≤ number ≤ batch_size
@@ -605,98 +1329,209 @@ Return one category per line:`;
    * STAGE 2A vs 2B:
    * - 2A: Processes first L1 category (primary classification)
    * - 2B: Processes second L1 if selected (cross-category products)
-   * - 2B excludes leaves already selected in 2A to avoid duplicates
+   * - 2B drops leaves already selected in 2A to avoid duplicates
+   * 
+   * CONCURRENT BATCHES:
+   * - The batches are independent, so all batches of 2A and 2B are sent
+   *   concurrently (at most maxConcurrentBatches at a time): a 339-leaf L1
+   *   takes one round-trip instead of four
+   * - Selections are still collected in list order, so results do not
+   *   depend on which call returns first
+   * - No early exit after a batch that already fills its 15 selections:
+   *   the other batches are in flight by then, so stopping would save no
+   *   time and few tokens, but would lose their candidates
+   * 
+   * SHARED LAST BATCH:
+   * - When the partial last batches of both L1s fit into one batch together,
+   *   they are sent as ONE call (up to 30 selections), labeled per L1 by
+   *   their numbers, which saves one API call for most two-L1 products
+   * - Full batches are unaffected, see below
+   * 
+   * PROMPT CACHING:
+   * - Every full batch lists the same, unfiltered leaves of its L1, so the
+   *   prompt prefix is byte-identical for every product (see PROMPT CACHING
+   *   in the header)
+   * - Excluded leaves are therefore removed from the selections afterwards
+   *   rather than from the list shown to the model
    * 
    * @param productSummary - The AI-generated product summary
-   * @param selectedL1s - Array of L1 categories from Stage 1
-   * @param excludedLeaves - Leaves to exclude (used in Stage 2B)
-   * @param stageName - "Stage 2A" or "Stage 2B" for logging
-   * @returns Array of selected leaf category names
+   * @param targetL1s - The L1 categories to search (from Stage 1, at most 2;
+   *                    all L1s of a small taxonomy are searched as one 2A list)
+   * @returns Selected leaf category names per L1: [Stage 2A, Stage 2B]
    * @throws {Error} If any batch fails (maintains data quality)
    * 
    * @example
-   * // Stage 2A for "Electronics" with 339 leaves:
-   * // Batch 1/4: categories 1-100
-   * // Batch 2/4: categories 101-200
-   * // Batch 3/4: categories 201-300
-   * // Batch 4/4: categories 301-339
-   * // Returns: ["Televisions", "TV Mounts", "Remote Controls", ...]
+   * // Stage 2A for "Electronics" with 339 leaves, 2B for "Home & Garden":
+   * // Batch 1/4: Electronics 1-100
+   * // Batch 2/4: Electronics 101-200
+   * // Batch 3/4: Electronics 201-300
+   * // Shared last batch: Electronics 301-339 + Home & Garden tail (if ≤ 100 together)
+   * // Returns: [["Televisions", "TV Mounts", ...], ["TV Stands", ...]]
    * 
    * @private
    */
-  private async stage2SelectLeaves(
-    productSummary: string, 
-    selectedL1s: string[], 
-    excludedLeaves: string[],
-    stageName: string
-  ): Promise<string[]> {
-    const targetL1 = selectedL1s[0];
-    if (!targetL1) return [];
-
-    // Get all leaves for this L1
-    const l1Leaves = this.allPaths
-      .filter(p => p.isLeaf && p.parts[0] === targetL1)
-      .map(p => p.parts[p.parts.length - 1])
-      .filter(leaf => !excludedLeaves.includes(leaf));
-
-    if (l1Leaves.length === 0) return [];
-
-    // Process in batches
-    const allSelections: string[] = [];
-    const batches = Math.ceil(l1Leaves.length / TaxonomyNavigator.BATCH_CONFIG.batchSize);
-
-    for (let i = 0; i < batches; i++) {
-      const start = i * TaxonomyNavigator.BATCH_CONFIG.batchSize;
-      const end = Math.min(start + TaxonomyNavigator.BATCH_CONFIG.batchSize, l1Leaves.length);
-      const batchLeaves = l1Leaves.slice(start, end);
-
-      // Create numbered list for this batch
-      const numberedOptions = batchLeaves
-        .map((leaf, idx) => `${start + idx + 1}. ${leaf}`)
-        .join('\n');
+  private async stage2SelectLeaves(productSummary: string, targetL1s: string[]): Promise<string[][]> {
+    const stageNames = ['Stage 2A', 'Stage 2B'];
 
-      const prompt = `Product: ${productSummary}
+    // Batches per L1, in list order; more than 2 L1s form one list
+    const batchesByL1 = targetL1s.length > 2
+      ? [this.stage2Batches(targetL1s, 0, stageNames[0])]
+      : targetL1s.map((l1, source) => this.stage2Batches([l1], source, stageNames[source]));
 
-Select up to ${TaxonomyNavigator.BATCH_CONFIG.maxSelectionsPerBatch} categories that match this product from the numbered list below.
-Think carefully about what the product actually is.
-Be aware: The list may contain both main product categories AND accessories/parts.
-IMPORTANT: If the product is a complete item (like a circular saw), choose the main product category (e.g., 'Handheld Circular Saws'), NOT the accessories category (e.g., 'Handheld Circular Saw Accessories').
-Only choose accessory categories if the product is actually an accessory/part, not the main product itself.
-Examples: A TV should be 'Televisions' not 'TV Mounts'; A laptop should be 'Laptops' not 'Laptop Cases'.
+    // Send the two partial last batches as one call when they fit together
+    const [batchesA, batchesB] = batchesByL1;
+    if (batchesA?.length && batchesB?.length) {
+      const tailA = batchesA[batchesA.length - 1];
+      const tailB = batchesB[batchesB.length - 1];
+      if (tailA.options.length + tailB.options.length <= TaxonomyNavigator.BATCH_CONFIG.batchSize) {
+        const sharedKey = `shared:${targetL1s[0]}\n${targetL1s[1]}`;
+        let shared = this.stage2BatchCache.get(sharedKey)?.[0];
+        if (!shared) {
+          shared = TaxonomyNavigator.stage2Batch(
+            `last batches of ${targetL1s[0]} and ${targetL1s[1]}`,
+            'Stage 2A/2B',
+            2 * TaxonomyNavigator.BATCH_CONFIG.maxSelectionsPerBatch,
+            [...tailA.options, ...tailB.options].map((option, idx) => ({ ...option, number: idx + 1 }))
+          );
+          this.stage2BatchCache.set(sharedKey, [shared]);
+        }
+        batchesA[batchesA.length - 1] = shared;
+        batchesB[batchesB.length - 1] = shared;
+      }
+    }
 
-Categories to choose from (batch ${i + 1} of ${batches}):
-${numberedOptions}
+    // All batches are independent: run them concurrently (bounded); a shared batch runs once
+    const limit = createLimiter(this.config.maxConcurrentBatches);
+    const answers = new Map<Stage2Batch, Stage2Option[]>();
+    await Promise.all([...new Set(batchesByL1.flat())].map(batch => limit(async () => {
+      answers.set(batch, await this.stage2SelectFromBatch(productSummary, batch));
+    })));
+
+    // Collect in list order; remove duplicates, and 2A's leaves from 2B
+    const selectedA = new Set<string>();
+    return batchesByL1.map((batches, source) => {
+      const selected = new Set<string>();
+      for (const batch of batches) {
+        for (const option of answers.get(batch)!) {
+          if (option.source === source && !(source > 0 && selectedA.has(option.leaf))) {
+            selected.add(option.leaf);
+          }
+        }
+      }
+      if (source === 0) selected.forEach(leaf => selectedA.add(leaf));
+      return [...selected];
+    });
+  }
+
+  /**
+   * Splits the leaves of one L1 (or of several L1s, as one list) into
+   * Stage 2 batches. Options are numbered by their position in the list.
+   * 
+   * The batches (and their prompt prefixes) are the same for every product,
+   * so they are built once per L1 list and reused; callers get a fresh array.
+   * Cache hits don't touch the leaf lists at all.
+   */
+  private stage2Batches(l1s: string[], source: number, stageName: string): Stage2Batch[] {
+    const cacheKey = `${source}:${l1s.join('\n')}`;
+    const cached = this.stage2BatchCache.get(cacheKey);
+    if (cached) return [...cached];
+
+    const l1Leaves = l1s.length === 1
+      ? this.l1ToLeaves.get(l1s[0]) || []
+      : l1s.flatMap(l1 => this.l1ToLeaves.get(l1) || []);
+    const { batchSize, maxSelectionsPerBatch } = TaxonomyNavigator.BATCH_CONFIG;
+    const count = Math.ceil(l1Leaves.length / batchSize);
+
+    const batches = Array.from({ length: count }, (_, i) => {
+      const start = i * batchSize;
+      return TaxonomyNavigator.stage2Batch(
+        `batch ${i + 1} of ${count}`,
+        stageName,
+        maxSelectionsPerBatch,
+        l1Leaves
+          .slice(start, start + batchSize)
+          .map((leaf, idx) => ({ number: start + idx + 1, leaf, source }))
+      );
+    });
+    this.stage2BatchCache.set(cacheKey, batches);
+    return [...batches];
+  }
 
-Return ONLY the numbers of matching categories (up to ${TaxonomyNavigator.BATCH_CONFIG.maxSelectionsPerBatch}), one per line.
+  /**
+   * Creates a Stage 2 batch with its prompt prefix.
+   */
+  private static stage2Batch(
+    title: string,
+    stageName: string,
+    maxSelections: number,
+    options: Stage2Option[]
+  ): Stage2Batch {
+    // Create numbered list for this batch
+    const optionList = options
+      .map(option => `${option.number}. ${option.leaf}`)
+      .join('\n');
+
+    const promptPrefix = `Select up to ${maxSelections} categories from the numbered list below that match the product described at the end.
+${TaxonomyNavigator.STAGE2_GUIDANCE}
+
+Categories to choose from (${title}):
+${optionList}
+
+Return ONLY the numbers of matching categories (up to ${maxSelections}), one per line.
 If no categories match, return 'NONE'.
 Example response:
 3
 7
-15`;
+15
 
-      try {
-        const response = await this.callOpenAI(
-          'You are a product categorization assistant. Select categories by their numbers only. Return only numbers, one per line.',
-          prompt
-        );
+Product: `;
 
-        // Parse numeric responses
-        const numbers = response
-          .split('\n')
-          .map(line => parseInt(line.trim()))
-          .filter(num => !isNaN(num) && num >= start + 1 && num <= end);
+    // Once maxSelections numbered lines have arrived, nothing useful can follow
+    const complete = new RegExp(`^(?:[ \\t]*\\d+[^\\n]*\\n){${maxSelections}}`);
 
-        // Convert numbers to leaf names
-        const batchSelections = numbers.map(num => l1Leaves[num - 1]);
-        allSelections.push(...batchSelections);
+    return { title, stageName, maxSelections, options, optionList, promptPrefix, complete };
+  }
 
-      } catch (error) {
-        this.log(`Batch ${i + 1}/${batches} failed: ${error}`);
-        throw new Error(`API call failed during ${stageName} batch ${i + 1}: ${error instanceof Error ? error.message : error}`);
-      }
-    }
+  /**
+   * Sends one Stage 2 batch and returns the selected options, in answer order.
+   * 
+   * The answer is streamed and cut off once maxSelections numbered lines
+   * have arrived (batch.complete): the model cannot add valid picks beyond
+   * that, so waiting for the rest would only add tokens and latency.
+   * 
+   * @throws {Error} If the API call fails
+   */
+  private async stage2SelectFromBatch(productSummary: string, batch: Stage2Batch): Promise<Stage2Option[]> {
+    const first = batch.options[0].number;
+    const last = first + batch.options.length - 1;
 
-    return [...new Set(allSelections)]; // Remove duplicates
+    // Invariant prefix (instructions + this batch's list) first, product last
+    const prompt = batch.promptPrefix + productSummary;
+
+    try {
+      const structured = this.config.structuredOutputs;
+      const response = await this.callOpenAI(
+        'You are a product categorization assistant. Select categories by their numbers only. Return only numbers, one per line.',
+        prompt,
+        150,
+        undefined,
+        structured ? { responseFormat: TaxonomyNavigator.STAGE2_SCHEMA } : { complete: batch.complete }
+      );
+
+      // Structured: {"picks": [...]}; otherwise the leading number of each line
+      const numbers = structured
+        ? (JSON.parse(response) as { picks: number[] }).picks
+        : Array.from(response.matchAll(TaxonomyNavigator.SELECTION_NUMBER), match => Number(match[1]));
+
+      // Convert the numbers in this batch's range to options
+      return numbers
+        .filter(num => Number.isInteger(num) && num >= first && num <= last)
+        .map(num => batch.options[num - first]);
+
+    } catch (error) {
+      this.log(`${batch.stageName} ${batch.title} failed: ${error}`);
+      throw new Error(`API call failed during ${batch.stageName} ${batch.title}: ${error instanceof Error ? error.message : error}`);
+    }
   }
 
   /**
@@ -717,12 +1552,22 @@ Example response:
    * - Encourages decisive selection when uncertain
    * - Uses phrases like "feels most probable" to reduce AI hesitation
    * 
+   * STREAMED ANSWER:
+   * - The answer is a single number, so the response is streamed and closed
+   *   as soon as the number is complete (max 5 tokens)
+   * - With structuredOutputs, the answer is forced into {"choice": N}
+   * - Stage 3 uses the slowest model, so this trims the longest wait
+   * 
    * WHY A SEPARATE FINAL STAGE?
    * - Stage 2 casts a wide net (up to 60 categories)
    * - Stage 3 makes nuanced final decision
    * - Better model can distinguish subtle differences
    * - Single API call with all candidates prevents batch inconsistencies
    * 
+   * SMALL MODEL (stage3SmallModelMaxCandidates > 0):
+   * - A few candidates under one L2 category are asked of stage2Model first
+   * - An invalid answer falls back to stage3Model
+   * 
    * SKIP OPTIMIZATION:
    * - If only 1 leaf found in Stage 2, Stage 3 is skipped
    * - Saves API call and reduces latency
@@ -748,29 +1593,47 @@ Example response:
       .map((leaf, idx) => `${idx + 1}. ${leaf}`)
       .join('\n');
 
-    const prompt = `Product: ${productSummary}
-
-IMPORTANT: From amongst the provided options below, select the category that is MOST LIKELY to roughly describe this product.
-Don't worry about finding a perfect match - just pick the option that seems most likely to be correct.
-If multiple options seem reasonable, pick the one that feels most probable.
+    // Fixed instructions first, product last
+    const prompt = `IMPORTANT: From amongst the provided options below, select the category that is MOST LIKELY to roughly describe the product described at the end.
+${TaxonomyNavigator.STAGE3_GUIDANCE}
+Return ONLY the number of your selection (e.g., "1" or "2").
 
 Available categories:
 ${numberedOptions}
 
-Return ONLY the number of your selection (e.g., "1" or "2").
-The number must be between 1 and ${leaves.length}.`;
+The number must be between 1 and ${leaves.length}.
+
+Product: ${productSummary}`;
+
+    // Clear-cut choices go to the smaller model first (see isClearCutStage3)
+    const models = this.isClearCutStage3(leaves)
+      ? [this.config.stage2Model, this.config.stage3Model]
+      : [this.config.stage3Model];
 
     try {
-      const response = await this.callOpenAI(
-        'You are a product categorization assistant. Select the single best matching category by its number.',
-        prompt,
-        150,
-        this.config.stage3Model
-      );
+      const structured = this.config.structuredOutputs;
+      let response = '';
+      for (const model of models) {
+        response = await this.callOpenAI(
+          'You are a product categorization assistant. Select the single best matching category by its number.',
+          prompt,
+          structured ? TaxonomyNavigator.STAGE3_MAX_JSON_TOKENS : TaxonomyNavigator.STAGE3_MAX_TOKENS,
+          model,
+          structured
+            ? { complete: TaxonomyNavigator.STAGE3_JSON_ANSWER, responseFormat: TaxonomyNavigator.STAGE3_SCHEMA }
+            : { complete: TaxonomyNavigator.STAGE3_ANSWER }
+        );
 
-      const number = parseInt(response.trim());
-      if (!isNaN(number) && number >= 1 && number <= leaves.length) {
-        return number - 1; // Convert to 0-based index
+        // The JSON answer may be cut off after the number (see STAGE3_JSON_ANSWER)
+        const number = structured
+          ? Number(TaxonomyNavigator.STAGE3_JSON_ANSWER.exec(response)?.[1] ?? NaN)
+          : parseInt(response.trim());
+        if (!isNaN(number) && number >= 1 && number <= leaves.length) {
+          return number - 1; // Convert to 0-based index
+        }
+        if (model !== this.config.stage3Model) {
+          this.log(`⚠️ Stage 3: Invalid response '${response.trim()}' from ${model}, retrying with ${this.config.stage3Model}`);
+        }
       }
       
       throw new Error(`Stage 3 failed: Invalid response '${response.trim()}' - expected number between 1 and ${leaves.length}`);
@@ -780,6 +1643,298 @@ The number must be between 1 and ${leaves.length}.`;
     }
   }
 
+  /**
+   * Checks whether a Stage 3 choice is clear-cut enough for stage2Model.
+   * 
+   * Clear-cut means at most stage3SmallModelMaxCandidates candidates, all
+   * under the same L2 category (L1 > L2), so only fine distinctions remain.
+   * 
+   * @param leaves - Candidate leaf categories from Stage 2
+   * @returns true if the smaller model should answer first
+   * 
+   * @private
+   */
+  private isClearCutStage3(leaves: string[]): boolean {
+    if (leaves.length > this.config.stage3SmallModelMaxCandidates) {
+      return false;
+    }
+    const l2Of = (leaf: string): string =>
+      this.leafToPath.get(leaf)?.parts.slice(0, 2).join(' > ') ?? leaf;
+    const l2 = l2Of(leaves[0]);
+    return leaves.every(leaf => l2Of(leaf) === l2);
+  }
+
+  /**
+   * Packed Stage 0: summarize several products in one API call.
+   * 
+   * Uses the same summary rules as generateProductSummary(), but asks for a
+   * JSON array with one summary per product.
+   * 
+   * @param productInfos - Raw product descriptions
+   * @returns One summary per product (null if the product is missing from the response)
+   * @throws {Error} If the API call fails or the response is not a JSON array
+   * 
+   * @private
+   */
+  private async packedGenerateSummaries(productInfos: string[]): Promise<(string | null)[]> {
+    const productList = productInfos
+      .map((info, idx) => `${idx + 1}. ${info}`)
+      .join('\n');
+
+    const prompt = `Summarize EACH of the products listed at the end in 40-60 words to make its category crystal clear:
+${TaxonomyNavigator.SUMMARY_RULES}
+
+Return ONLY a JSON array with one object per product, in order:
+[{"product": 1, "summary": "..."}, {"product": 2, "summary": "..."}]
+
+Products:
+${productList}`;
+
+    try {
+      const response = await this.callOpenAI(
+        'You are a product categorization assistant. Always use the most common, standard product name (e.g., \'television\' not \'display device\'). Include helpful synonyms in parentheses. Be direct and avoid flowery descriptions. Respond with JSON only.',
+        prompt,
+        120 * productInfos.length + 50
+      );
+
+      const answers = this.parsePackedResponse(response, productInfos.length);
+      return productInfos.map((_, idx) => {
+        const summary = answers.get(idx + 1)?.summary;
+        return typeof summary === 'string' && summary.trim() ? summary.trim() : null;
+      });
+    } catch (error) {
+      this.log(`Packed summary generation failed: ${error}`);
+      throw new Error(`API call failed during summary generation: ${error instanceof Error ? error.message : error}`);
+    }
+  }
+
+  /**
+   * Packed Stage 1: select L1 categories for several products in one API call.
+   * 
+   * @param summaries - AI-generated product summaries
+   * @returns Up to 2 validated L1 categories per product (empty if missing from the response)
+   * @throws {Error} If the API call fails or the response is not a JSON array
+   * 
+   * @private
+   */
+  private async packedStage1SelectL1Categories(summaries: string[]): Promise<string[][]> {
+    const productList = summaries
+      .map((summary, idx) => `${idx + 1}. ${summary}`)
+      .join('\n');
+
+    const prompt = this.packedStage1PromptPrefix + productList;
+
+    try {
+      const response = await this.callOpenAI(
+        'You are a product categorization assistant. Select L1 categories from the provided list using exact spelling. Respond with JSON only.',
+        prompt,
+        40 * summaries.length + 50
+      );
+
+      const answers = this.parsePackedResponse(response, summaries.length);
+      return summaries.map((_, idx) => {
+        const categories = answers.get(idx + 1)?.categories;
+        if (!Array.isArray(categories)) return [];
+
+        const selected = categories
+          .map(category => this.matchL1(String(category)))
+          .filter((l1): l1 is string => l1 !== undefined);
+        return [...new Set(selected)].slice(0, 2);
+      });
+    } catch (error) {
+      this.log(`Packed Stage 1 failed: ${error}`);
+      throw new Error(`API call failed during Stage 1: ${error instanceof Error ? error.message : error}`);
+    }
+  }
+
+  /**
+   * Packed Stage 2: select leaves for several (product, L1) requests.
+   * 
+   * Requests are grouped by their target L1 list (one L1, or all L1s when
+   * Stage 1 was skipped). Each group walks the leaves of its list in the
+   * usual batches of 100, with ONE call per batch for the whole group.
+   * The batch calls of all groups run concurrently (maxConcurrentBatches).
+   * 
+   * @param requests - Per request: summary, target L1s, and a callback invoked
+   *                   for every API call the request takes part in
+   * @param stageName - Stage name for logging (e.g. "Stage 2A/2B")
+   * @returns Selected leaf names per product, in request order
+   * @throws {Error} If any batch call fails
+   * 
+   * @private
+   */
+  private async packedStage2SelectLeaves(
+    requests: Array<{ summary: string; targetL1s: string[]; onCall: () => void }>,
+    stageName: string
+  ): Promise<string[][]> {
+    const { maxSelectionsPerBatch } = TaxonomyNavigator.BATCH_CONFIG;
+    const selections = requests.map(() => [] as string[]);
+
+    // Group products by target L1 list so they can share every batch call
+    const groups = new Map<string, { targetL1s: string[]; members: number[] }>();
+    requests.forEach((request, pos) => {
+      const key = request.targetL1s.join('\n');
+      const group = groups.get(key);
+      if (group) group.members.push(pos);
+      else groups.set(key, { targetL1s: request.targetL1s, members: [pos] });
+    });
+
+    // One task per (group, batch); all run concurrently (bounded) and their
+    // selections are merged in list order afterwards
+    const limit = createLimiter(this.config.maxConcurrentBatches);
+    const tasks: Promise<string[][]>[] = [];
+    const taskMembers: number[][] = [];
+
+    for (const { targetL1s, members } of groups.values()) {
+      // The same memoized batches (and option lists) as the single-product Stage 2
+      const l1Batches = this.stage2Batches(targetL1s, 0, stageName);
+      const batches = l1Batches.length;
+
+      const productList = members
+        .map((pos, n) => `${n + 1}. ${requests[pos].summary}`)
+        .join('\n');
+
+      for (let i = 0; i < batches; i++) {
+        const batch = l1Batches[i];
+        const start = batch.options[0].number - 1;
+        const end = start + batch.options.length;
+
+        const prompt = `For EACH product listed at the end, select up to ${maxSelectionsPerBatch} categories that match it from the numbered list below.
+${TaxonomyNavigator.STAGE2_GUIDANCE}
+
+Categories to choose from (${batch.title}):
+${batch.optionList}
+
+Return ONLY a JSON array with one object per product, in order, listing the numbers of the matching categories (up to ${maxSelectionsPerBatch} per product).
+Use an empty list if no categories match a product.
+Example response:
+[{"product": 1, "categories": [3, 7, 15]}, {"product": 2, "categories": []}]
+
+Products:
+${productList}`;
+
+        taskMembers.push(members);
+        tasks.push(limit(async () => {
+          members.forEach(pos => requests[pos].onCall());
+
+          try {
+            const response = await this.callOpenAI(
+              'You are a product categorization assistant. Select categories by their numbers only. Respond with JSON only.',
+              prompt,
+              60 * members.length + 50
+            );
+
+            const answers = this.parsePackedResponse(response, members.length);
+            return members.map((_, n) => {
+              const numbers = answers.get(n + 1)?.categories;
+              if (!Array.isArray(numbers)) return [];
+
+              return numbers
+                .map(Number)
+                .filter(num => Number.isInteger(num) && num >= start + 1 && num <= end)
+                .slice(0, maxSelectionsPerBatch)
+                .map(num => batch.options[num - 1 - start].leaf);
+            });
+          } catch (error) {
+            this.log(`Packed batch ${i + 1}/${batches} failed: ${error}`);
+            throw new Error(`API call failed during ${stageName} batch ${i + 1}: ${error instanceof Error ? error.message : error}`);
+          }
+        }));
+      }
+    }
+
+    const results = await Promise.all(tasks);
+    results.forEach((perMember, task) => {
+      taskMembers[task].forEach((pos, n) => selections[pos].push(...perMember[n]));
+    });
+
+    return selections.map(selected => [...new Set(selected)]); // Remove duplicates
+  }
+
+  /**
+   * Packed Stage 3: final selection for several products in one API call.
+   * Each product gets its own numbered candidate list.
+   * 
+   * @param requests - Per product: summary and candidate leaves
+   * @returns Zero-based index of the selected leaf per product (-1 if missing or invalid)
+   * @throws {Error} If the API call fails or the response is not a JSON array
+   * 
+   * @private
+   */
+  private async packedStage3FinalSelection(
+    requests: Array<{ summary: string; leaves: string[] }>
+  ): Promise<number[]> {
+    const productBlocks = requests
+      .map(({ summary, leaves }, idx) => {
+        const numberedOptions = leaves
+          .map((leaf, leafIdx) => `${leafIdx + 1}. ${leaf}`)
+          .join('\n');
+        return `Product ${idx + 1}: ${summary}\nAvailable categories:\n${numberedOptions}`;
+      })
+      .join('\n\n');
+
+    const prompt = `IMPORTANT: For EACH product below, select from amongst ITS OWN options the category that is MOST LIKELY to roughly describe that product.
+${TaxonomyNavigator.STAGE3_GUIDANCE}
+Return ONLY a JSON array with one object per product, in order:
+[{"product": 1, "selection": 2}]
+Each selection must be one of the numbers listed for that product.
+
+${productBlocks}`;
+
+    try {
+      const response = await this.callOpenAI(
+        'You are a product categorization assistant. Select the single best matching category for each product by its number. Respond with JSON only.',
+        prompt,
+        Math.max(150, 20 * requests.length + 50),
+        this.config.stage3Model
+      );
+
+      const answers = this.parsePackedResponse(response, requests.length);
+      return requests.map(({ leaves }, idx) => {
+        const number = Number(answers.get(idx + 1)?.selection);
+        return Number.isInteger(number) && number >= 1 && number <= leaves.length
+          ? number - 1 // Convert to 0-based index
+          : -1;
+      });
+    } catch (error) {
+      this.log(`Packed Stage 3 failed: ${error}`);
+      throw new Error(`API call failed during Stage 3: ${error instanceof Error ? error.message : error}`);
+    }
+  }
+
+  /**
+   * Parse a packed JSON response into a map of product number → answer object.
+   * 
+   * Tolerates text around the JSON array (e.g. markdown code fences) and
+   * ignores entries with product numbers outside 1..productCount.
+   * 
+   * @throws {Error} If no JSON array can be parsed from the response
+   * 
+   * @private
+   */
+  private parsePackedResponse(response: string, productCount: number): Map<number, Record<string, unknown>> {
+    const start = response.indexOf('[');
+    const end = response.lastIndexOf(']');
+    if (start === -1 || end <= start) {
+      throw new Error(`Invalid packed response: expected a JSON array, got '${response.trim().substring(0, 100)}'`);
+    }
+
+    const parsed: unknown = JSON.parse(response.slice(start, end + 1));
+    if (!Array.isArray(parsed)) {
+      throw new Error('Invalid packed response: expected a JSON array');
+    }
+
+    const answers = new Map<number, Record<string, unknown>>();
+    for (const item of parsed) {
+      if (!item || typeof item !== 'object') continue;
+      const product = Number((item as Record<string, unknown>).product);
+      if (Number.isInteger(product) && product >= 1 && product <= productCount && !answers.has(product)) {
+        answers.set(product, item as Record<string, unknown>);
+      }
+    }
+    return answers;
+  }
+
   /**
    * Call OpenAI API with error handling and rate limiting considerations.
    * 
@@ -798,17 +1953,29 @@ The number must be between 1 and ${leaves.length}.`;
    * - Model can be overridden via parameter
    * 
    * API CALL TRACKING:
-   * - Increments apiCallCount for cost monitoring
+   * - Increments the API call counter of the running classification
    * - Useful for optimization and budgeting
    * - Typical classification: 3-20 calls total
    * 
-   * RATE LIMITING (Commented out for basic version):
-   * - Production systems should implement rate limiting
-   * - OpenAI enforces per-second limits by tier
-   * - Prevents 429 errors and ensures stability
+   * RESPONSE CACHE (responseCacheSize > 0):
+   * - Requests are keyed by a blake2b hash of the whole request (model,
+   *   system message, prompt, max tokens), so any prompt template change
+   *   produces new keys
+   * - Thanks to the deterministic settings, an identical request gets the
+   *   stored answer without an API call (and without counting one)
+   * - Identical requests in flight at the same time share one call
+   * - Least recently used entries are evicted beyond responseCacheSize;
+   *   failed calls are never cached
+   * 
+   * RATE LIMITING (config.rateLimit):
+   * - Direct API calls wait for the request and token budgets first (each
+   *   retry attempt included), so bulk runs are paced below the tier limits
+   * - OpenAI enforces per-minute limits by tier; pacing prevents 429 errors
+   *   and the retry storms that follow them
    * 
    * ERROR HANDLING:
-   * - No retries in basic version (fail fast principle)
+   * - Transient failures are retried up to maxRetries times (see withRetries);
+   *   every attempt counts as an API call
    * - Returns empty string if no content (defensive programming)
    * - Caller responsible for handling errors
    * 
@@ -816,6 +1983,10 @@ The number must be between 1 and ${leaves.length}.`;
    * @param userPrompt - The actual classification request
    * @param maxTokens - Maximum response length (default: 150)
    * @param model - Optional model override (default: config.model)
+   * @param options.complete - Test for a complete answer: the response is
+   *                           streamed and the stream is closed as soon as the
+   *                           text received so far passes it (see sendCompletion)
+   * @param options.responseFormat - JSON schema the answer must follow
    * @returns The AI's response as a string
    * @throws {Error} If API call fails
    * 
@@ -825,14 +1996,11 @@ The number must be between 1 and ${leaves.length}.`;
     systemPrompt: string, 
     userPrompt: string, 
     maxTokens: number = 150,
-    model?: string
+    model?: string,
+    options: { complete?: RegExp; responseFormat?: CompletionRequest['response_format'] } = {}
   ): Promise<string> {
-    this.apiCallCount++;
-    
-    // For robust version: Add rate limiting logic here
-    // await this.checkRateLimit();
-    
-    const completion = await this.openai.chat.completions.create({
+    const { complete, responseFormat } = options;
+    const request: CompletionRequest = {
       model: model || this.config.model,
       messages: [
         { role: 'system', content: systemPrompt },
@@ -840,17 +2008,174 @@ The number must be between 1 and ${leaves.length}.`;
       ],
       temperature: 0,
       top_p: 0,
-      max_tokens: maxTokens
+      max_tokens: maxTokens,
+      ...(responseFormat && { response_format: responseFormat })
+    };
+
+    if (this.config.responseCacheSize <= 0) {
+      return this.withRetries(() => this.sendCompletion(request, complete));
+    }
+
+    const key = crypto.createHash('blake2b512').update(JSON.stringify(request)).digest('hex');
+    const cached = this.responseCache.get(key);
+    if (cached) {
+      // Re-insert to mark as most recently used (Map keeps insertion order)
+      this.responseCache.delete(key);
+      this.responseCache.set(key, cached);
+      return cached;
+    }
+
+    const response = this.withRetries(() => this.sendCompletion(request, complete));
+    this.responseCache.set(key, response);
+    if (this.responseCache.size > this.config.responseCacheSize) {
+      this.responseCache.delete(this.responseCache.keys().next().value!);
+    }
+    response.catch(() => {
+      if (this.responseCache.get(key) === response) this.responseCache.delete(key);
     });
+    return response;
+  }
+
+  /**
+   * Sends one completion request and counts it as an API call.
+   * 
+   * EARLY ABORT (when `complete` is given):
+   * - The response is streamed, and the stream is closed once the text so
+   *   far matches `complete`, instead of waiting for the model to finish
+   * - Only the tokens actually needed are awaited, so latency drops to
+   *   about the time to the first tokens
+   * - The returned text ends where the match ends, so a partial token
+   *   received after it (e.g. the start of another number) is dropped
+   * - A completionHandler always receives the plain (non-streamed) request
+   * 
+   * @param request - The chat completion request
+   * @param complete - Optional test for a complete answer
+   * @returns The AI's response as a string
+   * @throws {Error} If API call fails
+   * 
+   * @private
+   */
+  private async sendCompletion(request: CompletionRequest, complete?: RegExp): Promise<string> {
+    const counter = this.apiCallCounter.getStore();
+    if (counter) counter.count++;
+    
+    // Custom transport (e.g. the Batch API runner)
+    if (this.config.completionHandler) {
+      return this.config.completionHandler(request);
+    }
+
+    if (this.rateLimiter) {
+      const promptChars = request.messages.reduce((sum, message) => sum + message.content.length, 0);
+      await this.rateLimiter(Math.ceil(promptChars / 4) + (request.max_tokens ?? 0));
+    }
+
+    if (complete) {
+      const stream = await this.openai.chat.completions.create({ ...request, stream: true });
+      let content = '';
+      for await (const chunk of stream) {
+        content += chunk.choices[0]?.delta?.content || '';
+        const match = complete.exec(content);
+        if (match) {
+          stream.controller.abort(); // Answer complete: skip the rest
+          // Drop the start of whatever followed (e.g. a partial next number)
+          return content.slice(0, match.index + match[0].length);
+        }
+      }
+      return content;
+    }
+
+    const completion = await this.openai.chat.completions.create(request);
 
     return completion.choices[0]?.message?.content || '';
   }
 
   /**
-   * Build taxonomy tree from file.
+   * Returns the OpenAI client shared by all navigators with the same API
+   * key and connection limit, creating it on first use.
    * 
-   * Parses the Google Product Taxonomy text file and constructs both a hierarchical
-   * tree structure and a flat array of paths for efficient searching.
+   * The client holds a pool of keep-alive connections shared by all calls,
+   * so every navigator in the process reuses the same open connections.
+   *
+   * WHY NOT HTTP/2?
+   * - The openai v4 Node client sends requests through an http(s).Agent,
+   *   which only speaks HTTP/1.1; HTTP/2 would need a separate fetch
+   *   implementation as an extra dependency
+   * - With keep-alive, each of the maxConnections sockets pays its TLS
+   *   handshake once (later handshakes resume the agent's cached session)
+   *   and then serves one request at a time for the life of the process
+   * - maxConnections defaults above maxConcurrentBatches, so calls in
+   *   flight rarely wait for a free socket
+   *
+   * @param apiKey - OpenAI API key
+   * @param maxConnections - Maximum open connections of the pool
+   * @returns The shared client
+   * 
+   * @private
+   */
+  private static getSharedClient(apiKey: string, maxConnections: number): OpenAI {
+    const key = `${maxConnections}:${apiKey}`;
+    let client = TaxonomyNavigator.sharedClients.get(key);
+    if (!client) {
+      client = new OpenAI({
+        apiKey,
+        maxRetries: 0, // Retries are handled by withRetries()
+        httpAgent: new https.Agent({
+          keepAlive: true,
+          maxSockets: maxConnections
+        })
+      });
+      TaxonomyNavigator.sharedClients.set(key, client);
+    }
+    return client;
+  }
+
+  /**
+   * Clears the shared taxonomy cache, so that the next navigator re-reads
+   * its taxonomy file (e.g. after the file was updated).
+   * 
+   * @public
+   */
+  static clearTaxonomyCache(): void {
+    TaxonomyNavigator.taxonomyCache.clear();
+  }
+
+  /**
+   * Load the taxonomy, reusing the parsed structures of an earlier navigator
+   * for the same file when available.
+   * 
+   * @throws {Error} If the taxonomy file does not exist or cannot be read
+   * 
+   * @private
+   */
+  private loadTaxonomy(): void {
+    const taxonomyFile = path.resolve(this.config.taxonomyFile);
+    if (!existsSync(taxonomyFile)) {
+      throw new Error(`Taxonomy file not found: ${this.config.taxonomyFile}`);
+    }
+
+    const cached = TaxonomyNavigator.taxonomyCache.get(taxonomyFile);
+    if (cached) {
+      this.allPaths = cached.allPaths;
+      this.leafToPath = cached.leafToPath;
+      this.l1Categories = cached.l1Categories;
+      this.l1ToLeaves = cached.l1ToLeaves;
+      return;
+    }
+
+    this.parseTaxonomy();
+    TaxonomyNavigator.taxonomyCache.set(taxonomyFile, {
+      allPaths: this.allPaths,
+      leafToPath: this.leafToPath,
+      l1Categories: this.l1Categories,
+      l1ToLeaves: this.l1ToLeaves
+    });
+  }
+
+  /**
+   * Parse the taxonomy file.
+   * 
+   * Parses the Google Product Taxonomy text file into a flat array of paths
+   * and the lookup indices built from it.
    * 
    * FILE FORMAT:
    * ```
@@ -864,86 +2189,127 @@ The number must be between 1 and ${leaves.length}.`;
    * PARSING STRATEGY:
    * 1. Skip header line (starts with #)
    * 2. Split each line by " > " to get hierarchy parts
-   * 3. Determine if leaf by checking if any subsequent line extends this path
-   * 4. Build both tree and flat array simultaneously
+   * 3. Determine if leaf by checking whether any line extends this path
+   * 4. Record each path with its parts and leaf status
+   * 
+   * STRING INTERNING:
+   * - Category names repeat across thousands of paths ("Electronics" alone
+   *   appears in every Electronics path)
+   * - Each distinct name is kept as ONE string instance shared by all paths,
+   *   instead of one copy per path
+   * - Lowers memory use and lets equal names compare by identity fast-path
    * 
    * LEAF DETECTION ALGORITHM:
    * - A node is a leaf if no other line starts with its full path + " > "
+   * - One pass collects every proper prefix of every path (its ancestors);
+   *   a path is a leaf iff it is not in that set
+   * - Linear in the number of path parts, instead of comparing each line
+   *   with all following lines (quadratic), and independent of line order
    * - This correctly identifies ~5,597 leaf categories
    * - Non-leaf nodes are intermediate categories
    * 
    * DATA STRUCTURES BUILT:
-   * 1. Tree (this.taxonomy): Hierarchical representation
-   *    - Used for tree traversal operations
-   *    - Each node has children map and leaf status
-   * 
-   * 2. Flat array (this.allPaths): Array of path objects
+   * 1. Flat array (this.allPaths): Array of path objects
    *    - Primary structure for classification
    *    - Enables fast filtering by L1, leaf status
-   *    - More efficient than tree traversal
    * 
-   * WHY BOTH STRUCTURES?
-   * - Tree: Natural for hierarchical operations
-   * - Array: Faster for filtering, searching, iteration
-   * - Memory trade-off worth the performance gain
+   * 2. Lookup indices (see buildLookupIndices): leaf → path, L1 → leaves
+   * 
+   * WHY NO TREE?
+   * - Every stage works on L1 names and leaf lists, never on child nodes
+   * - A node tree would cost one object + children map per category
+   *   (~6,000 of them) just to sit unused
    * 
-   * @returns Root node of the taxonomy tree
    * @throws {Error} If file cannot be read
    * 
    * @private
    */
-  private buildTaxonomyTree(): TaxonomyNode {
+  private parseTaxonomy(): void {
     const content = readFileSync(this.config.taxonomyFile!, 'utf-8');
     const lines = content.split('\n').slice(1); // Skip header
-    
-    const root: TaxonomyNode = {
-      name: 'root',
-      children: {},
-      isLeaf: false
-    };
 
     this.allPaths = [];
 
-    lines.forEach((line, index) => {
-      line = line.trim();
-      if (!line) return;
+    // One shared instance per distinct category name
+    const namePool = new Map<string, string>();
+    const intern = (name: string): string => {
+      const existing = namePool.get(name);
+      if (existing !== undefined) return existing;
+      namePool.set(name, name);
+      return name;
+    };
 
-      // Check if this is a leaf node
-      const isLeaf = !lines.slice(index + 1).some(nextLine => 
-        nextLine.trim().startsWith(line + ' > ')
-      );
+    // Trim once; collect every ancestor path for leaf detection
+    const entries = lines
+      .map(line => line.trim())
+      .filter(line => line)
+      .map(line => ({ parts: line.split(' > ').map(p => intern(p.trim())) }));
+
+    const ancestors = new Set<string>();
+    for (const { parts } of entries) {
+      let prefix = parts[0];
+      for (let i = 1; i < parts.length; i++) {
+        ancestors.add(prefix);
+        prefix += ' > ' + parts[i];
+      }
+    }
+
+    entries.forEach(({ parts }) => {
+      // Normalized spacing, so fullPath always equals parts.join(' > ')
+      const fullPath = parts.join(' > ');
 
-      const parts = line.split(' > ').map(p => p.trim());
-      
       this.allPaths.push({
-        fullPath: line,
+        fullPath,
         parts,
-        isLeaf
+        isLeaf: !ancestors.has(fullPath) // Leaf unless some path extends this one
       });
-
-      // Add to tree
-      this.addToTree(root, parts, isLeaf);
     });
 
-    return root;
+    this.buildLookupIndices();
   }
 
   /**
-   * Add a path to the taxonomy tree
+   * Build the leaf, L1 and L1 → leaves lookup indices from allPaths.
+   * Run once after the taxonomy is loaded.
    */
-  private addToTree(tree: TaxonomyNode, parts: string[], isLeaf: boolean): void {
-    let current = tree;
-    
-    parts.forEach((part, index) => {
-      if (!current.children[part]) {
-        current.children[part] = {
-          name: part,
-          children: {},
-          isLeaf: index === parts.length - 1 && isLeaf
-        };
+  private buildLookupIndices(): void {
+    this.leafToPath = new Map();
+    this.l1ToLeaves = new Map();
+
+    for (const path of this.allPaths) {
+      if (!path.isLeaf) continue;
+
+      const leaf = path.parts[path.parts.length - 1];
+      if (!this.leafToPath.has(leaf)) {
+        this.leafToPath.set(leaf, path);
       }
-      current = current.children[part];
-    });
+
+      const l1Leaves = this.l1ToLeaves.get(path.parts[0]);
+      if (l1Leaves) l1Leaves.push(leaf);
+      else this.l1ToLeaves.set(path.parts[0], [leaf]);
+    }
+
+    this.l1Categories = [...this.l1ToLeaves.keys()];
+  }
+
+
+  /**
+   * Validates an L1 name returned by the model: an exact match first, then
+   * one that differs only in case or spacing (e.g. "home & garden").
+   * 
+   * @returns The L1 category as spelled in the taxonomy, or undefined
+   */
+  private matchL1(name: string): string | undefined {
+    const trimmed = name.trim();
+    if (this.l1ToLeaves.has(trimmed)) return trimmed;
+    return this.l1ByNormalizedName.get(trimmed.toLowerCase().replace(TaxonomyNavigator.WHITESPACE_RUN, ' '));
+  }
+
+  /**
+   * Full taxonomy path string of a leaf, from the leaf index.
+   */
+  private fullPathOf(leaf: string): string {
+    return this.leafToPath.get(leaf)?.fullPath ?? leaf;
   }
 
   /**
@@ -951,13 +2317,18 @@ The number must be between 1 and ${leaves.length}.`;
    */
   private convertLeavesToPaths(leaves: string[]): string[][] {
     return leaves.map(leaf => {
-      const path = this.allPaths.find(p => 
-        p.isLeaf && p.parts[p.parts.length - 1] === leaf
-      );
+      const path = this.leafToPath.get(leaf);
       return path ? path.parts : [leaf];
     });
   }
 
+  /**
+   * API calls made so far by the running classification.
+   */
+  private get apiCallsSoFar(): number {
+    return this.apiCallCounter.getStore()?.count ?? 0;
+  }
+
   /**
    * Create error result
    */
@@ -968,8 +2339,8 @@ The number must be between 1 and ${leaves.length}.`;
       bestMatchIndex: 0,
       bestMatch: 'False',
       leafCategory: 'False',
-      processingTime: Date.now() - startTime,
-      apiCalls: this.apiCallCount,
+      processingTime: performance.now() - startTime,
+      apiCalls: this.apiCallsSoFar,
       error
     };
   }
@@ -977,41 +2348,66 @@ The number must be between 1 and ${leaves.length}.`;
   // ============================================
   // ROBUST VERSION ADDITIONS
   // ============================================
-  
+
+  /**
+   * Runs an API operation, retrying transient failures.
+   * 
+   * BACKOFF:
+   * - Attempt n waits a random time in [0, min(30s, 0.5s × 2^n)]
+   *   ("full jitter"), so concurrent callers hit by the same rate limit
+   *   don't retry in lockstep
+   * - A Retry-After header (seconds) from the API raises the wait to at
+   *   least that long
+   * 
+   * Only errors for which a retry can succeed are retried (see
+   * isTransientError); everything else is rethrown immediately.
+   * 
+   * @param operation - The API call to run
+   * @returns The result of the first successful attempt
+   * @throws {Error} The last error once maxRetries retries are used up
+   * 
+   * @private
+   */
+  private async withRetries<T>(operation: () => Promise<T>): Promise<T> {
+    for (let attempt = 0; ; attempt++) {
+      try {
+        return await operation();
+      } catch (error) {
+        if (attempt >= this.config.maxRetries || !TaxonomyNavigator.isTransientError(error)) {
+          throw error;
+        }
+
+        const backoff = Math.min(
+          TaxonomyNavigator.RETRY_MAX_DELAY_MS,
+          TaxonomyNavigator.RETRY_BASE_DELAY_MS * 2 ** attempt
+        );
+        const retryAfter = Number((error as { headers?: Record<string, string> }).headers?.['retry-after']);
+        const delay = Math.max(Math.random() * backoff, Number.isFinite(retryAfter) ? retryAfter * 1000 : 0);
+
+        this.log(`API call failed (${error instanceof Error ? error.message : error}), retrying in ${Math.round(delay)}ms...`);
+        await new Promise(resolve => setTimeout(resolve, delay));
+      }
+    }
+  }
+
   /**
-   * For robust version: Add rate limiting
-   * Uncomment and implement for production use
-   */
-  // private lastRequestTime = 0;
-
-  // private async checkRateLimit(): Promise<void> {
-  //   const now = Date.now();
-  //   const timeSinceLastRequest = now - this.lastRequestTime;
-  //   const minTimeBetweenRequests = 200 / (this.config.rateLimit.requestsPerSecond || 1);
-  //   
-  //   if (timeSinceLastRequest < minTimeBetweenRequests) {
-  //     const waitTime = minTimeBetweenRequests - timeSinceLastRequest;
-  //     await new Promise(resolve => setTimeout(resolve, waitTime));
-  //   }
-  //   
-  //   this.lastRequestTime = Date.now();
-  // }
-
-  /**
-   * For robust version: Add retry logic
-   */
-  // private async retryableCall<T>(
-  //   operation: () => Promise<T>, 
-  //   retries = this.config.maxRetries
-  // ): Promise<T> {
-  //   try {
-  //     return await operation();
-  //   } catch (error) {
-  //     if (retries > 0) {
-  //       await new Promise(resolve => setTimeout(resolve, 1000)); // Wait 1 second
-  //       return this.retryableCall(operation, retries - 1);
-  //     }
-  //     throw error;
-  //   }
-  // }
+   * Whether a failed API call may succeed when retried: rate limits (429),
+   * timeouts (408), conflicts (409), server errors (5xx) and connection
+   * failures without an HTTP status (APIConnectionError, which includes
+   * client-side timeouts, or a transient network error code).
+   * 
+   * @private
+   */
+  private static isTransientError(error: unknown): boolean {
+    if (!(error instanceof Error)) return false;
+
+    const status = (error as { status?: unknown }).status;
+    if (typeof status === 'number') {
+      return status === 408 || status === 409 || status === 429 || status >= 500;
+    }
+
+    const code = (error as { code?: unknown }).code;
+    return error instanceof APIConnectionError
+      || (typeof code === 'string' && TaxonomyNavigator.TRANSIENT_ERROR_CODES.has(code));
+  }
 } 
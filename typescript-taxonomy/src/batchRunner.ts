@@ -0,0 +1,475 @@
+/**
+ * OpenAI Batch API runner for large, non-interactive classification jobs.
+ *
+ * The Batch API processes requests asynchronously (within 24 hours) at half
+ * the price of synchronous calls and with separate, much higher rate limits.
+ * For runs of hundreds or thousands of products this halves the cost and
+ * removes the rate-limit throttling of the synchronous pipeline.
+ *
+ * HOW IT WORKS:
+ * - Every product is classified by a regular TaxonomyNavigator whose
+ *   completion requests are collected instead of sent (completionHandler)
+ * - Once all products are waiting on a request, the collected requests are
+ *   uploaded as JSONL files and submitted as batch jobs ("round"); a round
+ *   is split into several jobs when it exceeds the Batch API limits per job
+ *   (50,000 requests, 200 MB input file)
+ * - The runner polls the jobs with exponential backoff, downloads their
+ *   output and hands each response back to its waiting classification
+ * - The classifications continue to their next stage, which forms the next
+ *   round (Stage 0, Stage 1, Stage 2 batches, Stage 3)
+ *
+ * Because the navigator itself runs unchanged, batch mode uses exactly the
+ * same prompts, validation and results as synchronous classification.
+ *
+ * RESUMABILITY:
+ * - With a state file, every downloaded response and the ids of the batch
+ *   jobs in progress are saved after each step
+ * - A run that is interrupted (Ctrl+C, SIGTERM, crash) can simply be started
+ *   again with the same input: finished rounds are replayed from the state
+ *   file and unfinished batch jobs are polled again instead of resubmitted
+ *
+ * IDENTICAL REQUESTS:
+ * - Requests are keyed by a hash of their body, so identical prompts
+ *   (e.g. duplicate products) are sent only once
+ */
+
+import * as crypto from 'crypto';
+import * as fs from 'fs';
+import * as path from 'path';
+import OpenAI, { toFile } from 'openai';
+import { TaxonomyNavigator } from './TaxonomyNavigator';
+import { ClassificationResult, CompletionRequest } from './types';
+import { getApiKey } from './config';
+
+/**
+ * Options for TaxonomyBatchRunner.
+ */
+export interface BatchRunnerOptions {
+  /** Path to the taxonomy file (default: the navigator's default) */
+  taxonomyFile?: string;
+
+  /** OpenAI API key (default: resolved through getApiKey) */
+  apiKey?: string;
+
+  /** Model for stages 0-2 (default: the navigator's default) */
+  model?: string;
+
+  /** Model for stage 3 (default: the navigator's default) */
+  stage3Model?: string;
+
+  /**
+   * JSON file holding downloaded responses and the batch in progress.
+   * If omitted, an interrupted run starts from scratch.
+   */
+  stateFile?: string;
+
+  /**
+   * Initial delay between status checks of a batch job, in milliseconds.
+   * Default: 10000 (doubles after every check)
+   */
+  pollIntervalMs?: number;
+
+  /**
+   * Maximum delay between status checks, in milliseconds.
+   * Default: 300000 (5 minutes)
+   */
+  maxPollIntervalMs?: number;
+
+  /**
+   * Maximum number of requests per batch job; larger rounds are split.
+   * Default: 50000 (the Batch API limit)
+   */
+  maxRequestsPerBatch?: number;
+
+  /**
+   * Maximum size of a batch input file, in bytes; larger rounds are split.
+   * Default: 200 MB (the Batch API limit)
+   */
+  maxBatchBytes?: number;
+
+  /** Receives progress messages (default: console.log) */
+  onProgress?: (message: string) => void;
+}
+
+/**
+ * A collected request and the classifications waiting for its response.
+ */
+interface QueuedRequest {
+  request: CompletionRequest;
+  waiters: { resolve: (content: string) => void; reject: (error: Error) => void }[];
+}
+
+/**
+ * On-disk state of a run.
+ */
+interface RunnerState {
+  version: number;
+
+  /** Response text of every finished request, keyed by request hash */
+  responses: { [key: string]: string };
+
+  /** Batch jobs submitted but not yet downloaded, with the requests each covers */
+  pendingBatches?: PendingBatch[];
+}
+
+/**
+ * A submitted batch job and the request hashes in its input file.
+ */
+interface PendingBatch {
+  id: string;
+  keys: string[];
+}
+
+/**
+ * Batch API statuses after which a job no longer changes.
+ */
+const TERMINAL_STATUSES = new Set(['completed', 'failed', 'expired', 'cancelled']);
+
+/**
+ * Classifies many products through the OpenAI Batch API.
+ *
+ * @example
+ * ```typescript
+ * const runner = new TaxonomyBatchRunner({ stateFile: './batch_state.json' });
+ * const results = await runner.run(productLines);
+ * results.forEach(r => console.log(r.success ? r.bestMatch : r.error));
+ * ```
+ */
+export class TaxonomyBatchRunner {
+  /** Version of the state file format; files with another version are ignored */
+  private static readonly STATE_VERSION = 1;
+
+  /** Batch API limits per job */
+  private static readonly MAX_REQUESTS_PER_BATCH = 50_000;
+  private static readonly MAX_BATCH_BYTES = 200 * 1024 * 1024;
+
+  private readonly client: OpenAI;
+  private readonly navigator: TaxonomyNavigator;
+  private readonly stateFile?: string;
+  private readonly pollIntervalMs: number;
+  private readonly maxPollIntervalMs: number;
+  private readonly maxRequestsPerBatch: number;
+  private readonly maxBatchBytes: number;
+  private readonly progress: (message: string) => void;
+
+  private state: RunnerState = { version: TaxonomyBatchRunner.STATE_VERSION, responses: {} };
+  private queue = new Map<string, QueuedRequest>();
+  private flushScheduled = false;
+  private flushing = false;
+
+  /** Number of rounds run by this runner */
+  private roundCount = 0;
+
+  /** Number of batch jobs submitted or resumed by this runner */
+  batchCount = 0;
+
+  /**
+   * Creates a runner, loading previous progress from the state file if it exists.
+   *
+   * @param options - Runner configuration
+   * @throws {Error} If the taxonomy file is missing or no API key is available
+   */
+  constructor(options: BatchRunnerOptions = {}) {
+    const apiKey = getApiKey(options.apiKey);
+    if (!apiKey) {
+      throw new Error('API key is required. Set OPENAI_API_KEY environment variable or provide in configuration.');
+    }
+
+    this.client = new OpenAI({ apiKey });
+    this.navigator = new TaxonomyNavigator({
+      taxonomyFile: options.taxonomyFile,
+      apiKey,
+      model: options.model,
+      stage3Model: options.stage3Model,
+      enableLogging: false,
+      completionHandler: request => this.enqueue(request),
+      client: this.client,
+      // Batch jobs have their own rate limits: queue all Stage 2 batches of a
+      // product in the same round instead of spreading them over several
+      maxConcurrentBatches: Number.POSITIVE_INFINITY
+    });
+
+    this.stateFile = options.stateFile;
+    this.pollIntervalMs = options.pollIntervalMs ?? 10_000;
+    this.maxPollIntervalMs = options.maxPollIntervalMs ?? 300_000;
+    this.maxRequestsPerBatch = options.maxRequestsPerBatch ?? TaxonomyBatchRunner.MAX_REQUESTS_PER_BATCH;
+    this.maxBatchBytes = options.maxBatchBytes ?? TaxonomyBatchRunner.MAX_BATCH_BYTES;
+    this.progress = options.onProgress ?? (message => console.log(message));
+
+    if (this.stateFile) {
+      this.loadState(this.stateFile);
+    }
+  }
+
+  /**
+   * Classifies all products.
+   *
+   * @param productInfos - Raw product descriptions
+   * @returns One classification result per product, in input order
+   */
+  async run(productInfos: string[]): Promise<ClassificationResult[]> {
+    return Promise.all(productInfos.map(info => this.navigator.classifyProduct(info)));
+  }
+
+  /**
+   * Completion handler of the navigator: answers from the state file when
+   * possible, otherwise queues the request for the next batch job.
+   */
+  private enqueue(request: CompletionRequest): Promise<string> {
+    const key = crypto.createHash('sha256').update(JSON.stringify(request)).digest('hex');
+
+    const stored = this.state.responses[key];
+    if (stored !== undefined) {
+      return Promise.resolve(stored);
+    }
+
+    return new Promise((resolve, reject) => {
+      const queued = this.queue.get(key);
+      if (queued) {
+        queued.waiters.push({ resolve, reject });
+      } else {
+        this.queue.set(key, { request, waiters: [{ resolve, reject }] });
+      }
+      this.scheduleFlush();
+    });
+  }
+
+  /**
+   * Submits the queue once every running classification has queued its
+   * request. setImmediate runs after all pending promise callbacks, i.e.
+   * when no classification can make progress without a response.
+   */
+  private scheduleFlush(): void {
+    if (this.flushScheduled || this.flushing) return;
+    this.flushScheduled = true;
+    setImmediate(() => {
+      this.flushScheduled = false;
+      void this.flush();
+    });
+  }
+
+  /**
+   * Runs one round: submits (or resumes) batch jobs for all queued requests
+   * and settles their waiters with the results.
+   */
+  private async flush(): Promise<void> {
+    if (this.queue.size === 0) return;
+
+    this.flushing = true;
+    const round = this.queue;
+    this.queue = new Map();
+
+    try {
+      const jobs = await this.submitOrResume(round);
+      await Promise.all(jobs.map(job => this.settle(job, round)));
+    } catch (error) {
+      // Waiters already settled by a finished job are not affected
+      const failure = error instanceof Error ? error : new Error(String(error));
+      this.progress(`❌ Batch round failed: ${failure.message}`);
+      round.forEach(queued => queued.waiters.forEach(w => w.reject(failure)));
+    } finally {
+      this.flushing = false;
+      this.scheduleFlush();
+    }
+  }
+
+  /**
+   * Waits for one batch job of a round, saves its responses and settles the
+   * waiters of its requests. A failing job only rejects its own requests;
+   * it stays in the state file, so a restarted run polls it again.
+   */
+  private async settle(job: PendingBatch, round: Map<string, QueuedRequest>): Promise<void> {
+    try {
+      const { outputs, errors, status } = await this.waitForBatch(job.id);
+
+      for (const [key, content] of outputs) {
+        this.state.responses[key] = content;
+      }
+      this.state.pendingBatches = this.state.pendingBatches?.filter(pending => pending.id !== job.id);
+      this.saveState();
+
+      for (const key of job.keys) {
+        const queued = round.get(key);
+        if (!queued) continue;
+        const content = outputs.get(key);
+        if (content !== undefined) {
+          queued.waiters.forEach(w => w.resolve(content));
+        } else {
+          const error = new Error(errors.get(key) ?? `Batch ${job.id} ended with status '${status}' without a response`);
+          queued.waiters.forEach(w => w.reject(error));
+        }
+      }
+    } catch (error) {
+      const failure = error instanceof Error ? error : new Error(String(error));
+      this.progress(`❌ Batch ${job.id} failed: ${failure.message}`);
+      job.keys.forEach(key => round.get(key)?.waiters.forEach(w => w.reject(failure)));
+    }
+  }
+
+  /**
+   * Resumes the batch jobs saved in the state file, otherwise uploads the
+   * requests and creates new batch jobs. When resuming, requests the saved
+   * jobs don't cover are moved back to the queue for the next round.
+   *
+   * @returns The batch jobs of the round, each with the round's requests it covers
+   */
+  private async submitOrResume(round: Map<string, QueuedRequest>): Promise<PendingBatch[]> {
+    this.roundCount++;
+
+    const pending = this.state.pendingBatches ?? [];
+    if (pending.length > 0) {
+      const covered = new Set(pending.flatMap(job => job.keys));
+      for (const [key, queued] of round) {
+        if (!covered.has(key)) {
+          round.delete(key);
+          this.queue.set(key, queued);
+        }
+      }
+      const resumed = pending
+        .map(job => ({ id: job.id, keys: job.keys.filter(key => round.has(key)) }))
+        .filter(job => job.keys.length > 0);
+      if (resumed.length > 0) {
+        for (const job of resumed) {
+          this.batchCount++;
+          this.progress(`🔁 Resuming batch ${job.id} (${job.keys.length} requests)`);
+        }
+        return resumed;
+      }
+      // Nothing left to wait for in the saved jobs
+      delete this.state.pendingBatches;
+    }
+
+    const parts = this.splitRound(round);
+    const jobs: PendingBatch[] = [];
+    for (const [index, part] of parts.entries()) {
+      const file = await this.client.files.create({
+        file: await toFile(Buffer.from(part.lines.join(''), 'utf-8'), 'taxonomy-batch.jsonl'),
+        purpose: 'batch'
+      });
+
+      const batch = await this.client.batches.create({
+        input_file_id: file.id,
+        endpoint: '/v1/chat/completions',
+        completion_window: '24h'
+      });
+
+      // Saved right away, so an interruption during a later part can resume this one
+      const job = { id: batch.id, keys: part.keys };
+      jobs.push(job);
+      this.state.pendingBatches = [...(this.state.pendingBatches ?? []), job];
+      this.saveState();
+      this.batchCount++;
+
+      const label = parts.length > 1 ? `round ${this.roundCount}, part ${index + 1}/${parts.length}` : `round ${this.roundCount}`;
+      this.progress(`📤 Submitted batch ${batch.id} (${label}, ${part.keys.length} requests)`);
+    }
+    return jobs;
+  }
+
+  /**
+   * Splits the requests of a round into JSONL input files within
+   * maxRequestsPerBatch and maxBatchBytes. A single request larger than
+   * maxBatchBytes gets a file of its own (and is rejected by the API).
+   */
+  private splitRound(round: Map<string, QueuedRequest>): { keys: string[]; lines: string[] }[] {
+    const parts: { keys: string[]; lines: string[] }[] = [];
+    let current = { keys: [] as string[], lines: [] as string[] };
+    let bytes = 0;
+
+    for (const [key, queued] of round) {
+      const line = JSON.stringify({
+        custom_id: key,
+        method: 'POST',
+        url: '/v1/chat/completions',
+        body: queued.request
+      }) + '\n';
+      const lineBytes = Buffer.byteLength(line, 'utf-8');
+
+      if (current.keys.length > 0 &&
+          (current.keys.length >= this.maxRequestsPerBatch || bytes + lineBytes > this.maxBatchBytes)) {
+        parts.push(current);
+        current = { keys: [], lines: [] };
+        bytes = 0;
+      }
+      current.keys.push(key);
+      current.lines.push(line);
+      bytes += lineBytes;
+    }
+
+    if (current.keys.length > 0) parts.push(current);
+    return parts;
+  }
+
+  /**
+   * Polls a batch job until it reaches a terminal status and downloads its results.
+   * The delay between checks doubles up to maxPollIntervalMs.
+   */
+  private async waitForBatch(batchId: string): Promise<{
+    outputs: Map<string, string>;
+    errors: Map<string, string>;
+    status: string;
+  }> {
+    let delay = this.pollIntervalMs;
+    let batch = await this.client.batches.retrieve(batchId);
+
+    while (!TERMINAL_STATUSES.has(batch.status)) {
+      const counts = batch.request_counts;
+      this.progress(`⏳ Batch ${batchId}: ${batch.status}${counts ? ` (${counts.completed}/${counts.total})` : ''}`);
+      await new Promise(resolve => setTimeout(resolve, delay));
+      delay = Math.min(delay * 2, this.maxPollIntervalMs);
+      batch = await this.client.batches.retrieve(batchId);
+    }
+
+    this.progress(`📥 Batch ${batchId}: ${batch.status}`);
+
+    const outputs = new Map<string, string>();
+    const errors = new Map<string, string>();
+    const readLines = async (fileId: string | null | undefined): Promise<any[]> => {
+      if (!fileId) return [];
+      const text = await (await this.client.files.content(fileId)).text();
+      return text.split('\n').filter(line => line.trim()).map(line => JSON.parse(line));
+    };
+
+    for (const line of [...await readLines(batch.output_file_id), ...await readLines(batch.error_file_id)]) {
+      const response = line.response;
+      if (response && response.status_code === 200) {
+        outputs.set(line.custom_id, response.body?.choices?.[0]?.message?.content || '');
+      } else {
+        const message = line.error?.message ?? response?.body?.error?.message ?? `HTTP ${response?.status_code}`;
+        errors.set(line.custom_id, `Batch request failed: ${message}`);
+      }
+    }
+
+    return { outputs, errors, status: batch.status };
+  }
+
+  /**
+   * Loads a state file, ignoring missing or invalid files.
+   */
+  private loadState(stateFile: string): void {
+    if (!fs.existsSync(stateFile)) return;
+
+    try {
+      const data: RunnerState = JSON.parse(fs.readFileSync(stateFile, 'utf-8'));
+      if (data.version === TaxonomyBatchRunner.STATE_VERSION && data.responses) {
+        this.state = data;
+        this.progress(`📂 Loaded ${Object.keys(data.responses).length} saved responses from ${stateFile}`);
+      }
+    } catch {
+      // A corrupt state file is not fatal: start from scratch
+    }
+  }
+
+  /**
+   * Writes the state file (temp file + rename, so an interruption never
+   * leaves a half-written file).
+   */
+  private saveState(): void {
+    if (!this.stateFile) return;
+
+    fs.mkdirSync(path.dirname(this.stateFile), { recursive: true });
+    const tempFile = `${this.stateFile}.tmp`;
+    fs.writeFileSync(tempFile, JSON.stringify(this.state), 'utf-8');
+    fs.renameSync(tempFile, this.stateFile);
+  }
+}
@@ -0,0 +1,126 @@
+/**
+ * Bloom filter for fast "definitely not seen" checks.
+ *
+ * A Bloom filter answers "have I seen this string?" with either
+ * "definitely not" or "probably yes", using about 10 bits per entry
+ * (at a 1% false-positive rate) regardless of the string length.
+ * It is used to skip expensive lookups for inputs that were never recorded.
+ *
+ * IMPLEMENTATION:
+ * - Bit array in a Uint8Array; size and hash count derived from the
+ *   expected capacity and the target false-positive rate
+ * - k bit positions per entry by double hashing (h1 + i * h2) of one
+ *   SHA-1 digest, so each check computes a single hash
+ * - Serializes to a Buffer (header + bits) for persistence
+ *
+ * LIMITS:
+ * - Entries cannot be removed
+ * - Adding more than `capacity` entries raises the false-positive rate
+ */
+
+import * as crypto from 'crypto';
+
+/**
+ * Fixed-size Bloom filter over strings.
+ *
+ * @example
+ * ```typescript
+ * const filter = new BloomFilter(10_000, 0.001);
+ * filter.add('garbled input');
+ * filter.has('garbled input'); // true
+ * filter.has('Sony TV');       // false (almost certainly)
+ * ```
+ */
+export class BloomFilter {
+  /** Size of the serialized header: bit count + hash count (uint32 each) */
+  private static readonly HEADER_BYTES = 8;
+
+  private readonly bits: Uint8Array;
+  private readonly bitCount: number;
+  private readonly hashCount: number;
+
+  /**
+   * Creates an empty filter sized for `capacity` entries.
+   *
+   * @param capacity - Expected number of entries (default: 10,000)
+   * @param errorRate - Target false-positive rate at capacity (default: 0.001)
+   */
+  constructor(capacity: number = 10_000, errorRate: number = 0.001) {
+    // Optimal sizes: m = -n·ln(p) / ln(2)², k = (m/n)·ln(2)
+    const bitCount = Math.ceil(-capacity * Math.log(errorRate) / (Math.LN2 * Math.LN2));
+    this.bitCount = Math.max(8, bitCount);
+    this.hashCount = Math.max(1, Math.round((this.bitCount / capacity) * Math.LN2));
+    this.bits = new Uint8Array(Math.ceil(this.bitCount / 8));
+  }
+
+  /**
+   * Records a string.
+   */
+  add(item: string): void {
+    for (const bit of this.positions(item)) {
+      this.bits[bit >>> 3] |= 1 << (bit & 7);
+    }
+  }
+
+  /**
+   * Checks a string.
+   *
+   * @returns false if the string was definitely never added, true if it probably was
+   */
+  has(item: string): boolean {
+    for (const bit of this.positions(item)) {
+      if ((this.bits[bit >>> 3] & (1 << (bit & 7))) === 0) return false;
+    }
+    return true;
+  }
+
+  /**
+   * Serializes the filter for storage.
+   */
+  toBuffer(): Buffer {
+    const buffer = Buffer.alloc(BloomFilter.HEADER_BYTES + this.bits.length);
+    buffer.writeUInt32LE(this.bitCount, 0);
+    buffer.writeUInt32LE(this.hashCount, 4);
+    buffer.set(this.bits, BloomFilter.HEADER_BYTES);
+    return buffer;
+  }
+
+  /**
+   * Restores a filter written by toBuffer().
+   *
+   * @throws {Error} If the buffer is not a serialized filter
+   */
+  static fromBuffer(buffer: Buffer): BloomFilter {
+    if (buffer.length < BloomFilter.HEADER_BYTES) {
+      throw new Error('Invalid Bloom filter data');
+    }
+    const bitCount = buffer.readUInt32LE(0);
+    const hashCount = buffer.readUInt32LE(4);
+    if (buffer.length !== BloomFilter.HEADER_BYTES + Math.ceil(bitCount / 8) || hashCount < 1) {
+      throw new Error('Invalid Bloom filter data');
+    }
+
+    const filter: BloomFilter = Object.create(BloomFilter.prototype);
+    Object.assign(filter, {
+      bitCount,
+      hashCount,
+      bits: new Uint8Array(buffer.subarray(BloomFilter.HEADER_BYTES))
+    });
+    return filter;
+  }
+
+  /**
+   * Bit positions of a string: h1 + i·h2 (mod m) for i in [0, k).
+   */
+  private positions(item: string): number[] {
+    const digest = crypto.createHash('sha1').update(item, 'utf8').digest();
+    const h1 = digest.readUInt32LE(0);
+    const h2 = digest.readUInt32LE(4) | 1;
+
+    const positions = new Array<number>(this.hashCount);
+    for (let i = 0; i < this.hashCount; i++) {
+      positions[i] = (h1 + Math.imul(i, h2) >>> 0) % this.bitCount;
+    }
+    return positions;
+  }
+}
@@ -0,0 +1,382 @@
+/**
+ * Two-tier cache for classification results.
+ *
+ * Every classification costs 4-5 sequential API calls, yet batch runs often
+ * contain products that were already classified in a previous run, or that
+ * differ only in trivial details (punctuation, word order, a size suffix).
+ * This cache short-circuits the whole pipeline for those products.
+ *
+ * LOOKUP TIERS:
+ * 1. EXACT: blake2b hash of the normalized product line (lowercased,
+ *    whitespace collapsed; see normalize()) → stored result (no API call)
+ * 2. SEMANTIC: on an exact miss, embed the normalized line and compare it with
+ *    the embeddings of all cached products; if the best cosine similarity
+ *    reaches the threshold (default 0.92) the cached result is reused
+ *    (one cheap embedding call instead of 4-5 chat completions)
+ *
+ * PERSISTENCE:
+ * - Entries live in memory while the program runs
+ * - save() writes the whole cache to a JSON file in a single write
+ *   (temp file + rename, so an interrupted save never corrupts the cache)
+ * - Embeddings are stored as base64-encoded Float32 arrays to keep the file small
+ * - With maxAgeMs, entries older than that are dropped when the file is loaded
+ * - With a fingerprint (taxonomy + models, see fingerprint()), a file written
+ *   for another taxonomy or model is ignored instead of serving its results
+ *
+ * WHAT IS CACHED:
+ * - Only successful classifications; failures are always retried
+ */
+
+import * as crypto from 'crypto';
+import * as fs from 'fs';
+import * as path from 'path';
+import { ClassificationResult } from './types';
+import { cosineSimilarity } from './embeddings';
+
+/**
+ * A cached classification result.
+ */
+export interface CachedClassification {
+  /** Leaf category name (e.g., "Televisions") */
+  leafCategory: string;
+
+  /** Full taxonomy path (e.g., "Electronics > Video > Televisions") */
+  bestMatch: string;
+
+  /** Stage-by-stage details, when they were available at classification time */
+  stageDetails?: ClassificationResult['stageDetails'];
+}
+
+/**
+ * Result of a cache lookup.
+ */
+export interface CacheHit {
+  /** The cached classification */
+  entry: CachedClassification;
+
+  /** Which tier produced the hit */
+  matchType: 'exact' | 'semantic';
+
+  /** Cosine similarity of the semantic match (1 for exact hits) */
+  similarity: number;
+}
+
+/**
+ * Options for ClassificationCache.
+ */
+export interface ClassificationCacheOptions {
+  /**
+   * JSON file used to persist the cache between runs.
+   * If omitted, the cache only lives in memory.
+   */
+  cacheFile?: string;
+
+  /**
+   * Embedding function for the semantic tier.
+   * If omitted, only exact matches are served.
+   */
+  embed?: (text: string) => Promise<number[]>;
+
+  /**
+   * Minimum cosine similarity for a semantic hit.
+   * Default: 0.92
+   */
+  similarityThreshold?: number;
+
+  /**
+   * Maximum age of an entry in milliseconds; older entries are dropped on load.
+   * Default: no expiry
+   */
+  maxAgeMs?: number;
+
+  /**
+   * Identifies the taxonomy and models the results are produced with
+   * (see ClassificationCache.fingerprint()). A cache file saved with a
+   * different fingerprint, or without one, is ignored and replaced on the
+   * next save, so results of another taxonomy are never served.
+   * Default: none (files are not checked)
+   */
+  fingerprint?: string;
+}
+
+/**
+ * Internal storage format of one cache entry.
+ */
+interface StoredEntry extends CachedClassification {
+  /** Base64-encoded Float32Array embedding of the normalized product line */
+  embedding?: string;
+
+  /** When the entry was stored (ms since epoch) */
+  savedAt?: number;
+}
+
+/**
+ * On-disk file format.
+ */
+interface CacheFile {
+  version: number;
+  fingerprint?: string;
+  entries: { [key: string]: StoredEntry };
+}
+
+/**
+ * Exact + semantic cache of classification results, optionally persisted to disk.
+ *
+ * @example
+ * ```typescript
+ * const cache = new ClassificationCache({
+ *   cacheFile: './data/classification_cache.json',
+ *   embed: async text => (await navigator.embedTexts([text]))[0]
+ * });
+ *
+ * const hit = await cache.get(productLine);
+ * if (!hit) {
+ *   const result = await navigator.classifyProduct(productLine);
+ *   if (result.success) await cache.set(productLine, result);
+ * }
+ * cache.save();
+ * ```
+ */
+export class ClassificationCache {
+  /** Version of the on-disk format; files with another version are ignored */
+  private static readonly FILE_VERSION = 2;
+
+  /** Runs of whitespace, collapsed by normalize() (compiled once) */
+  private static readonly WHITESPACE_RUN = /\s+/g;
+
+  /** Default minimum similarity for semantic hits */
+  static readonly DEFAULT_SIMILARITY_THRESHOLD = 0.92;
+
+  /**
+   * Maximum number of embeddings kept from missed lookups for a following
+   * set(). Lookups that are never followed by set() (e.g. failed
+   * classifications) would otherwise keep their vectors for the whole run.
+   */
+  private static readonly MAX_PENDING_EMBEDDINGS = 1000;
+
+  private entries = new Map<string, StoredEntry>();
+
+  /** Decoded embeddings of stored entries, keyed like `entries` */
+  private vectors = new Map<string, Float32Array>();
+
+  /** Embeddings computed during recent missed lookups, reused by the following set() (oldest first) */
+  private pendingEmbeddings = new Map<string, Float32Array>();
+
+  private readonly cacheFile?: string;
+  private readonly embed?: (text: string) => Promise<number[]>;
+  private readonly similarityThreshold: number;
+  private readonly maxAgeMs?: number;
+  private readonly fingerprint?: string;
+  private dirty = false;
+
+  /**
+   * Creates a cache, loading previously saved entries from `cacheFile` if it exists.
+   * An unreadable or outdated cache file is ignored (the cache starts empty).
+   *
+   * @param options - Cache configuration
+   */
+  constructor(options: ClassificationCacheOptions = {}) {
+    this.cacheFile = options.cacheFile;
+    this.embed = options.embed;
+    this.similarityThreshold = options.similarityThreshold ?? ClassificationCache.DEFAULT_SIMILARITY_THRESHOLD;
+    this.maxAgeMs = options.maxAgeMs;
+    this.fingerprint = options.fingerprint;
+
+    if (this.cacheFile) {
+      this.load(this.cacheFile);
+    }
+  }
+
+  /**
+   * Normalizes a product line for lookups: lowercases and collapses
+   * whitespace, so lines that differ only in case or spacing share one
+   * entry. Every caller goes through this, so all tools sharing a cache
+   * file agree on its keys and embeddings.
+   *
+   * @param productLine - The raw product line
+   * @returns The normalized line
+   */
+  static normalize(productLine: string): string {
+    return productLine.toLowerCase().trim().replace(ClassificationCache.WHITESPACE_RUN, ' ');
+  }
+
+  /**
+   * Computes the exact-match key of a product line.
+   *
+   * @param productLine - The raw (or already normalized) product line
+   * @returns Hex-encoded blake2b digest of the normalized line
+   */
+  static hashKey(productLine: string): string {
+    return crypto.createHash('blake2b512').update(ClassificationCache.normalize(productLine), 'utf8').digest('hex');
+  }
+
+  /**
+   * Computes the fingerprint of the settings that determine classification
+   * results: the content of the taxonomy file and the models used.
+   *
+   * @param taxonomyFile - Taxonomy file the navigator loads
+   * @param models - Models used for classification
+   * @returns Hex-encoded blake2b digest (of the resolved path if the file cannot be read)
+   */
+  static fingerprint(taxonomyFile: string, models: string[]): string {
+    const hash = crypto.createHash('blake2b512');
+    try {
+      hash.update(fs.readFileSync(taxonomyFile));
+    } catch {
+      hash.update(path.resolve(taxonomyFile), 'utf8');
+    }
+    return hash.update(`\n${models.join('\n')}`, 'utf8').digest('hex');
+  }
+
+  /** Number of cached classifications */
+  get size(): number {
+    return this.entries.size;
+  }
+
+  /**
+   * Looks up a product line, trying the exact tier first and the semantic tier second.
+   *
+   * @param productLine - The raw product line
+   * @returns The cache hit, or null on a miss
+   * @throws {Error} If the embedding call fails
+   */
+  async get(productLine: string): Promise<CacheHit | null> {
+    const normalized = ClassificationCache.normalize(productLine);
+    const key = ClassificationCache.hashKey(normalized);
+
+    const exact = this.entries.get(key);
+    if (exact) {
+      return { entry: this.toPublic(exact), matchType: 'exact', similarity: 1 };
+    }
+
+    if (!this.embed) return null;
+
+    const query = Float32Array.from(await this.embed(normalized));
+    this.pendingEmbeddings.delete(key);
+    this.pendingEmbeddings.set(key, query);
+    if (this.pendingEmbeddings.size > ClassificationCache.MAX_PENDING_EMBEDDINGS) {
+      this.pendingEmbeddings.delete(this.pendingEmbeddings.keys().next().value!);
+    }
+
+    let bestKey: string | null = null;
+    let bestSimilarity = -1;
+    for (const [candidateKey, vector] of this.vectors) {
+      if (vector.length !== query.length) continue;
+      const similarity = cosineSimilarity(query, vector);
+      if (similarity > bestSimilarity) {
+        bestSimilarity = similarity;
+        bestKey = candidateKey;
+      }
+    }
+
+    if (bestKey !== null && bestSimilarity >= this.similarityThreshold) {
+      return { entry: this.toPublic(this.entries.get(bestKey)!), matchType: 'semantic', similarity: bestSimilarity };
+    }
+
+    return null;
+  }
+
+  /**
+   * Stores a classification for a product line.
+   * The embedding from a preceding missed get() is reused; otherwise one is
+   * computed when a semantic tier is configured.
+   *
+   * @param productLine - The raw product line
+   * @param entry - The classification to cache
+   * @throws {Error} If the embedding call fails
+   */
+  async set(productLine: string, entry: CachedClassification): Promise<void> {
+    const normalized = ClassificationCache.normalize(productLine);
+    const key = ClassificationCache.hashKey(normalized);
+
+    let vector = this.pendingEmbeddings.get(key);
+    this.pendingEmbeddings.delete(key);
+    if (!vector && this.embed) {
+      vector = Float32Array.from(await this.embed(normalized));
+    }
+
+    const stored: StoredEntry = {
+      leafCategory: entry.leafCategory,
+      bestMatch: entry.bestMatch,
+      stageDetails: entry.stageDetails,
+      savedAt: Date.now()
+    };
+    if (vector) {
+      stored.embedding = Buffer.from(vector.buffer, vector.byteOffset, vector.byteLength).toString('base64');
+      this.vectors.set(key, vector);
+    }
+
+    this.entries.set(key, stored);
+    this.dirty = true;
+  }
+
+  /**
+   * Writes all entries to the cache file in a single write.
+   * Does nothing if no cache file is configured or nothing changed.
+   *
+   * @returns True if the file was written
+   */
+  save(): boolean {
+    if (!this.cacheFile || !this.dirty) return false;
+
+    const data: CacheFile = {
+      version: ClassificationCache.FILE_VERSION,
+      fingerprint: this.fingerprint,
+      entries: Object.fromEntries(this.entries)
+    };
+
+    fs.mkdirSync(path.dirname(this.cacheFile), { recursive: true });
+    const tempFile = `${this.cacheFile}.tmp`;
+    fs.writeFileSync(tempFile, JSON.stringify(data), 'utf-8');
+    fs.renameSync(tempFile, this.cacheFile);
+
+    this.dirty = false;
+    return true;
+  }
+
+  /**
+   * Loads entries from a cache file, ignoring missing or invalid files and
+   * files written with another fingerprint.
+   * Expired entries are skipped (and removed from the file on the next save).
+   */
+  private load(cacheFile: string): void {
+    if (!fs.existsSync(cacheFile)) return;
+
+    try {
+      const data: CacheFile = JSON.parse(fs.readFileSync(cacheFile, 'utf-8'));
+      if (data.version !== ClassificationCache.FILE_VERSION || !data.entries) return;
+      if (this.fingerprint !== undefined && data.fingerprint !== this.fingerprint) return;
+
+      const oldest = this.maxAgeMs !== undefined ? Date.now() - this.maxAgeMs : -Infinity;
+      for (const [key, stored] of Object.entries(data.entries)) {
+        // Entries written before savedAt existed count as fresh
+        if ((stored.savedAt ?? Infinity) < oldest) {
+          this.dirty = true;
+          continue;
+        }
+        this.entries.set(key, stored);
+        if (stored.embedding) {
+          // Copy into a fresh ArrayBuffer: Float32Array views need 4-byte alignment
+          const bytes = Buffer.from(stored.embedding, 'base64');
+          const buffer = bytes.buffer.slice(bytes.byteOffset, bytes.byteOffset + bytes.byteLength);
+          this.vectors.set(key, new Float32Array(buffer));
+        }
+      }
+    } catch {
+      // A corrupt cache is not fatal: start with an empty cache
+      this.entries.clear();
+      this.vectors.clear();
+    }
+  }
+
+  /**
+   * Strips storage-only fields from an entry.
+   */
+  private toPublic(stored: StoredEntry): CachedClassification {
+    return {
+      leafCategory: stored.leafCategory,
+      bestMatch: stored.bestMatch,
+      stageDetails: stored.stageDetails
+    };
+  }
+}
@@ -0,0 +1,147 @@
+/**
+ * Concurrency utilities for the Taxonomy Navigator.
+ *
+ * Classification is dominated by network round-trips to OpenAI, so running
+ * several independent requests at once overlaps their latency. This module
+ * provides a small promise-based limiter that bounds how many tasks are
+ * in flight at the same time.
+ *
+ * WHY A LIMITER (and not Promise.all)?
+ * - Promise.all starts every task immediately, which floods the API
+ * - Provider rate limits make unbounded fan-out counterproductive (429s)
+ * - A fixed concurrency keeps throughput high while staying predictable
+ *
+ * RATE LIMITS:
+ * - createRateLimiter paces requests to per-minute request and token
+ *   budgets (token buckets), so bulk runs stay below the provider limits
+ *   instead of retrying after 429 errors
+ */
+
+/**
+ * A function that schedules a task through a limiter.
+ * The returned promise settles with the task's own result.
+ */
+export type Limiter = <R>(task: () => Promise<R>) => Promise<R>;
+
+/**
+ * Creates a limiter that runs at most `concurrency` tasks at the same time.
+ *
+ * Tasks are started in the order they are scheduled. When a running task
+ * settles (resolves or rejects), the next queued task is started.
+ *
+ * @param concurrency - Maximum number of tasks in flight (values < 1 are treated as 1)
+ * @returns A scheduling function; each call returns a promise for that task's result
+ *
+ * @example
+ * ```typescript
+ * const limit = createLimiter(8);
+ * const pending = products.map(p => limit(() => navigator.classifyProduct(p)));
+ * for (const result of pending) {
+ *   console.log((await result).leafCategory); // printed in submission order
+ * }
+ * ```
+ */
+export function createLimiter(concurrency: number): Limiter {
+  const maxActive = Math.max(1, Math.floor(concurrency) || 1);
+  const queue: Array<() => void> = [];
+  let active = 0;
+
+  const next = (): void => {
+    if (active >= maxActive || queue.length === 0) return;
+    active++;
+    const start = queue.shift()!;
+    start();
+  };
+
+  return <R>(task: () => Promise<R>): Promise<R> => {
+    return new Promise<R>((resolve, reject) => {
+      queue.push(() => {
+        Promise.resolve()
+          .then(task)
+          .then(resolve, reject)
+          .finally(() => {
+            active--;
+            next();
+          });
+      });
+      next();
+    });
+  };
+}
+
+/**
+ * Per-minute budgets of a rate limiter. Limits of 0 (or unset) are not enforced.
+ */
+export interface RateLimits {
+  /** Maximum requests started per minute */
+  requestsPerMinute?: number;
+
+  /** Maximum (estimated) tokens per minute */
+  tokensPerMinute?: number;
+}
+
+/**
+ * Waits until a request of the given (estimated) token count fits the
+ * rate limits, then takes it from the budgets.
+ */
+export type RateLimiter = (tokens: number) => Promise<void>;
+
+/**
+ * Creates a token-bucket rate limiter for requests and tokens per minute.
+ *
+ * Each budget is a bucket that holds up to one minute's worth and refills
+ * continuously, so bursts up to the limit start at once and sustained
+ * traffic is paced to the limit instead of running into 429 errors.
+ * Callers are served in order; a request larger than a whole bucket waits
+ * for a full bucket and then passes.
+ *
+ * @param limits - Requests and tokens per minute
+ * @returns A function to await before each request
+ *
+ * @example
+ * ```typescript
+ * const throttle = createRateLimiter({ requestsPerMinute: 500, tokensPerMinute: 200_000 });
+ * await throttle(Math.ceil(prompt.length / 4) + maxTokens);
+ * const response = await client.chat.completions.create(request);
+ * ```
+ */
+export function createRateLimiter(limits: RateLimits): RateLimiter {
+  const buckets = [limits.requestsPerMinute ?? 0, limits.tokensPerMinute ?? 0]
+    .map(capacity => ({ capacity: Math.max(0, capacity), available: Math.max(0, capacity) }));
+  let lastRefill = Date.now();
+  let queue: Promise<void> = Promise.resolve();
+
+  const refill = (): void => {
+    const now = Date.now();
+    for (const bucket of buckets) {
+      bucket.available = Math.min(bucket.capacity, bucket.available + (now - lastRefill) * bucket.capacity / 60_000);
+    }
+    lastRefill = now;
+  };
+
+  const acquire = async (costs: number[]): Promise<void> => {
+    for (;;) {
+      refill();
+
+      // Time until every enforced bucket can pay its cost
+      let wait = 0;
+      buckets.forEach((bucket, i) => {
+        if (bucket.capacity === 0) return;
+        const missing = Math.min(costs[i], bucket.capacity) - bucket.available;
+        if (missing > 0) wait = Math.max(wait, missing * 60_000 / bucket.capacity);
+      });
+
+      if (wait === 0) {
+        buckets.forEach((bucket, i) => { bucket.available -= Math.min(costs[i], bucket.capacity); });
+        return;
+      }
+      await new Promise(resolve => setTimeout(resolve, Math.ceil(wait)));
+    }
+  };
+
+  return (tokens: number): Promise<void> => {
+    const turn = queue.then(() => acquire([1, Math.max(0, tokens)]));
+    queue = turn;
+    return turn;
+  };
+}
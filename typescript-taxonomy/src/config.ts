@@ -20,6 +20,10 @@
  * - Looks for api_key.txt in multiple locations
  * - Handles both development and npm package scenarios
  * - Gracefully handles missing files
+ * 
+ * CACHING:
+ * - The key file path is resolved once, when the module is loaded
+ * - The key file is read at most once per process (see clearApiKeyCache)
  */
 
 import * as fs from 'fs';
@@ -34,6 +38,64 @@ const logger = {
   error: (msg: string) => console.error(`[config] ${msg}`)
 };
 
+/**
+ * Expected shape of an OpenAI API key: 'sk-' followed by at least 17 key
+ * characters (20+ characters in total).
+ */
+const API_KEY_PATTERN = /^sk-[A-Za-z0-9_-]{17,}$/;
+
+/**
+ * Location of the local API key file, resolved once at module load.
+ */
+const API_KEY_FILE = path.normalize(path.join(__dirname, '..', '..', 'data', 'api_key.txt'));
+
+/**
+ * Cached content of API_KEY_FILE.
+ * undefined = not read yet, null = file missing or empty.
+ */
+let cachedFileKey: string | null | undefined;
+
+/**
+ * Clears the cached API key file content, so that the next getApiKey()
+ * call reads data/api_key.txt again.
+ * 
+ * Only needed when the file changes outside of setupApiKeyFile()
+ * (which updates the cache itself), e.g. in tests.
+ */
+export function clearApiKeyCache(): void {
+  cachedFileKey = undefined;
+}
+
+/**
+ * Reads the API key from API_KEY_FILE, caching the outcome.
+ * Read errors are logged and not cached, so a later call can retry.
+ */
+function readApiKeyFile(): string | null {
+  if (cachedFileKey !== undefined) {
+    return cachedFileKey;
+  }
+
+  try {
+    if (fs.existsSync(API_KEY_FILE)) {
+      logger.debug(`Found API key file at: ${API_KEY_FILE}`);
+      const key = fs.readFileSync(API_KEY_FILE, 'utf-8').trim();
+      if (key) {
+        logger.debug("API key successfully read from file");
+      } else {
+        logger.warning("API key file exists but is empty");
+      }
+      cachedFileKey = key || null;
+    } else {
+      logger.debug(`API key file not found at: ${API_KEY_FILE}`);
+      cachedFileKey = null;
+    }
+    return cachedFileKey;
+  } catch (error) {
+    logger.warning(`Error reading API key file: ${error}`);
+    return null;
+  }
+}
+
 /**
  * Retrieves the OpenAI API key from multiple sources.
  * 
@@ -97,25 +159,9 @@ export function getApiKey(providedKey?: string): string | null {
   
   // Priority 3: Local file (lowest precedence)
   // This is convenient for development but should not be used in production
-  try {
-    // Construct path to api_key.txt relative to this file's location
-    const currentDir = __dirname;
-    const apiKeyFile = path.normalize(path.join(currentDir, '..', '..', 'data', 'api_key.txt'));
-    
-    if (fs.existsSync(apiKeyFile)) {
-      logger.debug(`Found API key file at: ${apiKeyFile}`);
-      const key = fs.readFileSync(apiKeyFile, 'utf-8').trim();
-      if (key) {
-        logger.debug("API key successfully read from file");
-        return key;
-      } else {
-        logger.warning("API key file exists but is empty");
-      }
-    } else {
-      logger.debug(`API key file not found at: ${apiKeyFile}`);
-    }
-  } catch (error) {
-    logger.warning(`Error reading API key file: ${error}`);
+  const fileKey = readApiKeyFile();
+  if (fileKey) {
+    return fileKey;
   }
   
   // No API key found from any source
@@ -143,20 +189,8 @@ export function getApiKey(providedKey?: string): string | null {
  * or invalid.
  */
 export function validateApiKeyFormat(apiKey: string | null | undefined): boolean {
-  if (!apiKey || typeof apiKey !== 'string') {
-    return false;
-  }
-  
   // OpenAI API keys start with 'sk-' and are typically 51+ characters
-  if (!apiKey.startsWith('sk-')) {
-    return false;
-  }
-  
-  if (apiKey.length < 20) { // Minimum reasonable length
-    return false;
-  }
-  
-  return true;
+  return typeof apiKey === 'string' && API_KEY_PATTERN.test(apiKey);
 }
 
 /**
@@ -183,9 +217,8 @@ export function setupApiKeyFile(apiKey: string, overwrite: boolean = false): boo
   }
   
   // Determine file path
-  const currentDir = __dirname;
-  const dataDir = path.normalize(path.join(currentDir, '..', '..', 'data'));
-  const apiKeyFile = path.join(dataDir, 'api_key.txt');
+  const apiKeyFile = API_KEY_FILE;
+  const dataDir = path.dirname(apiKeyFile);
   
   // Check if file exists and handle overwrite logic
   if (fs.existsSync(apiKeyFile) && !overwrite) {
@@ -200,6 +233,7 @@ export function setupApiKeyFile(apiKey: string, overwrite: boolean = false): boo
     
     // Write the API key
     fs.writeFileSync(apiKeyFile, apiKey, 'utf-8');
+    cachedFileKey = apiKey;
     
     logger.info(`API key file created at: ${apiKeyFile}`);
     return true;
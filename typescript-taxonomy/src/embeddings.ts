@@ -0,0 +1,58 @@
+/**
+ * Embedding helpers for the Taxonomy Navigator.
+ *
+ * Embeddings turn text into vectors so that semantically similar texts
+ * (e.g. two listings of the same product) can be compared numerically.
+ * They are far cheaper than chat completions, which makes them useful
+ * for short-circuiting the classification pipeline.
+ */
+
+/**
+ * Default embedding model.
+ * text-embedding-3-small is the cheapest OpenAI embedding model and is
+ * more than precise enough for near-duplicate product detection.
+ */
+export const DEFAULT_EMBEDDING_MODEL = 'text-embedding-3-small';
+
+/**
+ * Computes the cosine similarity of two vectors.
+ *
+ * @param a - First vector
+ * @param b - Second vector (must have the same length as `a`)
+ * @returns Similarity in [-1, 1]; 0 if either vector has zero length
+ */
+export function cosineSimilarity(a: ArrayLike<number>, b: ArrayLike<number>): number {
+  if (a.length !== b.length) {
+    throw new Error(`Vector length mismatch: ${a.length} vs ${b.length}`);
+  }
+
+  let dot = 0;
+  let normA = 0;
+  let normB = 0;
+  for (let i = 0; i < a.length; i++) {
+    dot += a[i] * b[i];
+    normA += a[i] * a[i];
+    normB += b[i] * b[i];
+  }
+
+  if (normA === 0 || normB === 0) return 0;
+  return dot / (Math.sqrt(normA) * Math.sqrt(normB));
+}
+
+/**
+ * Scales a vector to unit length, so that cosine similarity with other
+ * unit vectors is a plain dot product.
+ *
+ * @param vector - Vector to normalize
+ * @returns Unit-length copy as a Float32Array (all zeros for a zero vector)
+ */
+export function normalizeVector(vector: ArrayLike<number>): Float32Array {
+  let norm = 0;
+  for (let i = 0; i < vector.length; i++) norm += vector[i] * vector[i];
+  norm = Math.sqrt(norm);
+
+  const unit = new Float32Array(vector.length);
+  if (norm === 0) return unit;
+  for (let i = 0; i < vector.length; i++) unit[i] = vector[i] / norm;
+  return unit;
+}
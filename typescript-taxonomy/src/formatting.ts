@@ -0,0 +1,27 @@
+/**
+ * Text formatting helpers for console output.
+ *
+ * The interactive interface and the batch tester both print product lines
+ * and stage details in fixed-width columns; they share these helpers so
+ * text is cut the same way everywhere.
+ */
+
+/**
+ * Collapse whitespace and truncate text at a word boundary so the result,
+ * including the placeholder, fits in `width` characters.
+ * A single word longer than the limit is cut mid-word.
+ *
+ * @param text - Text to shorten
+ * @param width - Maximum length of the result
+ * @param placeholder - Marks cut text (default: '...')
+ * @returns The collapsed text, shortened if needed
+ */
+export function shorten(text: string, width: number, placeholder: string = '...'): string {
+  const collapsed = text.trim().replace(/\s+/g, ' ');
+  if (collapsed.length <= width) return collapsed;
+
+  const limit = Math.max(0, width - placeholder.length);
+  const lastSpace = collapsed.lastIndexOf(' ', limit);
+  const cut = lastSpace > 0 ? lastSpace : limit;
+  return collapsed.substring(0, cut).trimEnd() + placeholder;
+}
@@ -7,4 +7,8 @@
 export { TaxonomyNavigator } from './TaxonomyNavigator';
 export * from './types';
 export * from './config';
-export { TaxonomyInterface, main as runInteractiveInterface } from './interactiveInterface'; 
\ No newline at end of file
+export { TaxonomyInterface, main as runInteractiveInterface, jsonlToJsonArray } from './interactiveInterface';
+export { ClassificationCache } from './classificationCache';
+export type { CachedClassification, CacheHit, ClassificationCacheOptions } from './classificationCache';
+export { TaxonomyBatchRunner } from './batchRunner';
+export type { BatchRunnerOptions } from './batchRunner';
@@ -8,9 +8,18 @@
  * FEATURES:
  * - Interactive product input
  * - Detailed stage-by-stage results
+ * - Live progress as each stage finishes
  * - Performance metrics (time, API calls)
  * - Graceful exit handling
  * - Error display with suggestions
+ * - In-memory LRU cache of recent classifications
+ * - Semantic cache: paraphrased inputs reuse earlier classifications
+ * - Classification cache saved to disk, so results survive restarts
+ * - Known failures (e.g. garbled input) are answered without API calls
+ * - Input history across sessions (up arrow) and tab completion of
+ *   commands and earlier products
+ * - Non-blocking input: the next prompt appears while earlier products
+ *   are still being classified (up to 8 at a time)
  * 
  * USE CASES:
  * - Testing and debugging the classification system
@@ -25,11 +34,21 @@
  * - Handles Ctrl+C gracefully
  */
 
+import * as crypto from 'crypto';
 import * as readline from 'readline';
 import * as fs from 'fs';
 import * as path from 'path';
-import { TaxonomyNavigator, ClassificationResult } from './index';
+import { performance } from 'perf_hooks';
+// Type-only imports: the navigator and batch runner modules (and the OpenAI
+// SDK they pull in) are loaded on first use, so --help, --convert-results
+// and argument errors return without loading them
+import type { TaxonomyNavigator } from './TaxonomyNavigator';
+import type { ClassificationResult, TaxonomyNavigatorConfig } from './types';
 import { getApiKey } from './config';
+import { ClassificationCache } from './classificationCache';
+import { createLimiter } from './concurrency';
+import { shorten } from './formatting';
+import { BloomFilter } from './bloomFilter';
 
 // Configure logging level
 enum LogLevel {
@@ -50,6 +69,179 @@ const logger = {
   critical: (msg: string) => console.error(`[${new Date().toISOString()}] - taxonomy_interface - CRITICAL - ${msg}`)
 };
 
+/**
+ * Maximum number of classifications kept in the session LRU cache.
+ */
+const RESULT_CACHE_SIZE = 1024;
+
+/**
+ * Maximum number of classifications running at the same time.
+ * Further inputs queue until a running classification finishes.
+ */
+const MAX_CONCURRENT_CLASSIFICATIONS = 8;
+
+/**
+ * Number of products sent together in one packed classification
+ * (see TaxonomyNavigator.classifyProducts).
+ */
+const BATCH_CHUNK_SIZE = 8;
+
+/**
+ * Prefix of the batch command: "batch: product one; product two".
+ * "batch:" on its own reads one product per line until an empty line.
+ */
+const BATCH_PREFIX = 'batch:';
+
+/**
+ * Classification cache shared with the batch tester, so results carry over
+ * between sessions (and tools).
+ */
+const DEFAULT_CACHE_FILE = path.join(__dirname, '..', '..', 'data', 'classification_cache.json');
+
+/**
+ * Input history file (one entry per line, oldest first), so earlier
+ * products can be recalled with the up arrow in the next session.
+ */
+const HISTORY_FILE = path.join(__dirname, '..', '..', 'data', 'interactive_history.txt');
+
+/**
+ * Maximum number of history entries kept in memory and on disk.
+ */
+const HISTORY_SIZE = 1000;
+
+/**
+ * Saved classifications older than this are dropped when the cache is loaded
+ * (the taxonomy or the models may have changed since).
+ */
+const CACHE_MAX_AGE_MS = 30 * 24 * 60 * 60 * 1000;
+
+/**
+ * Failures that depend only on the input (the model found no matching
+ * category), so repeating the pipeline would fail again. API errors and
+ * other transient failures are always retried.
+ */
+const DETERMINISTIC_FAILURES = new Set(['No L1 categories selected', 'No leaf categories found']);
+
+/**
+ * What the prompt loop does after a command: keep prompting or end the session.
+ */
+type CommandAction = 'continue' | 'exit';
+
+/**
+ * Handler of a system command; returning nothing means 'continue'.
+ */
+type CommandHandler = () => CommandAction | void | Promise<CommandAction | void>;
+
+/**
+ * A recorded known failure.
+ */
+interface KnownFailure {
+  error: string;
+  savedAt: number;
+}
+
+/**
+ * On-disk format of the failure list.
+ */
+interface KnownFailureFile {
+  /** Taxonomy and model the failures were recorded with (see ClassificationCache.fingerprint) */
+  fingerprint: string;
+  failures: { [key: string]: KnownFailure };
+}
+
+/**
+ * Welcome banner, built once and printed with a single write.
+ */
+const WELCOME_BANNER = [
+  '\n' + '='.repeat(70),
+  '🔍 TAXONOMY NAVIGATOR - INTERACTIVE INTERFACE',
+  '='.repeat(70),
+  '\nWelcome to the AI-powered product classification system!',
+  '\nThis interface uses a sophisticated 5-stage AI process to classify',
+  'products into appropriate taxonomy categories using OpenAI\'s models.',
+  '\n📋 How to use:',
+  '  • Enter product information when prompted',
+  '  • Use format: \'Product Name: Description\' or just \'Product Name\'',
+  '  • Type \'quit\', \'exit\', or \'q\' to end the session',
+  '  • Type \'help\' for additional commands',
+  '  • Type \'stats\' to see session statistics',
+  '\n💡 Examples:',
+  '  • iPhone 14 Pro: Smartphone with advanced camera system',
+  '  • Xbox Wireless Controller: Gaming controller with Bluetooth',
+  '  • Nike Air Max: Running shoes with air cushioning',
+  '\n🤖 5-Stage Classification Process:',
+  '  1. AI generates focused 40-60 word product summary',
+  '  2. AI selects top 2 L1 categories from ~21 options',
+  '  3. AI selects specific categories using batch processing',
+  '  4. Validation ensures no hallucinated categories',
+  '  5. AI final selection using enhanced model',
+  '\n' + '='.repeat(70) + '\n'
+].join('\n') + '\n';
+
+/**
+ * Static part of the help text; displayHelp() appends the results line.
+ */
+const HELP_BANNER = [
+  '\n📖 HELP - Available Commands:',
+  '-'.repeat(40),
+  '🔍 Classification Commands:',
+  '  • Enter any product info to classify it',
+  '  • Format: \'Product Name: Description\'',
+  '  • Or just: \'Product Name\'',
+  '  • batch: <product>; <product>  - Classify several products together',
+  '  • batch:           - Paste one product per line, end with an empty line',
+  '\n⚙️  System Commands:',
+  '  • help, h          - Show this help message',
+  '  • stats, statistics - Show session statistics',
+  '  • clear, cls       - Clear the screen',
+  '  • quit, exit, q    - Exit the interface',
+  '\n💾 Results:'
+].join('\n') + '\n';
+
+/**
+ * ANSI sequence that erases the display and moves the cursor home.
+ */
+const CLEAR_SCREEN = '\x1b[2J\x1b[H';
+
+/**
+ * Widths of the product label and stage info in progress lines.
+ */
+const PROGRESS_LABEL_WIDTH = 30;
+const PROGRESS_INFO_WIDTH = 60;
+
+/**
+ * Reads the saved input history, newest entry first (as readline expects).
+ */
+function loadHistory(): string[] {
+  try {
+    return fs.readFileSync(HISTORY_FILE, 'utf-8').split('\n').filter(Boolean).reverse().slice(0, HISTORY_SIZE);
+  } catch {
+    return [];
+  }
+}
+
+/**
+ * Writes the input history of this session (newest first) to the history file.
+ */
+function saveHistory(history: string[]): void {
+  try {
+    fs.mkdirSync(path.dirname(HISTORY_FILE), { recursive: true });
+    fs.writeFileSync(HISTORY_FILE, history.slice(0, HISTORY_SIZE).reverse().join('\n') + '\n', 'utf-8');
+  } catch (error) {
+    logger.error(`Failed to save input history: ${error}`);
+  }
+}
+
+/**
+ * Normalizes product info into a cache key.
+ * Lowercases and collapses whitespace, so inputs that differ only in
+ * case or spacing share the same cached classification. Uses the
+ * classification cache's normalization, so keys match the batch tester's.
+ */
+function normalizeProductInfo(productInfo: string): string {
+  return ClassificationCache.normalize(productInfo);
+}
+
 interface SessionResult {
   timestamp: string;
   productInfo: string;
@@ -61,19 +253,107 @@ interface SessionResult {
   error?: string;
 }
 
+/**
+ * Converts a classification into the record stored in the session and results file.
+ */
+function toSessionResult(
+  productInfo: string,
+  result: ClassificationResult,
+  timestamp: string,
+  processingTimeSeconds: number
+): SessionResult {
+  if (!result.success) {
+    return {
+      timestamp,
+      productInfo,
+      bestMatch: 'False',
+      bestPath: [],
+      allCandidates: [],
+      processingTimeSeconds,
+      success: false,
+      error: result.error
+    };
+  }
+
+  // The navigator already joined the best path; join the other candidates once
+  const allCandidates = result.paths.map((p, i) => i === result.bestMatchIndex ? result.bestMatch : p.join(' > '));
+  return {
+    timestamp,
+    productInfo,
+    bestMatch: result.bestMatch,
+    bestPath: result.paths[result.bestMatchIndex],
+    allCandidates,
+    processingTimeSeconds,
+    success: true,
+    error: result.error
+  };
+}
+
 export class TaxonomyInterface {
-  private navigator: TaxonomyNavigator;
+  /** Navigator options; the navigator is created on first use (see getNavigator) */
+  private readonly navigatorConfig: TaxonomyNavigatorConfig;
+  private navigator: Promise<TaxonomyNavigator> | null = null;
   private saveResults: boolean;
   private outputFile: string;
+  /** Results file stream, opened on the first save and closed when run() ends */
+  private resultsStream: fs.WriteStream | null = null;
   private sessionResults: SessionResult[] = [];
+  /** Running counts of sessionResults, kept by addSessionResult */
+  private successCount = 0;
+  private failCount = 0;
   private rl: readline.Interface;
+  private lines: AsyncIterableIterator<string>;
+
+  /**
+   * LRU cache of successful classifications, keyed by normalized product info.
+   * A Map iterates in insertion order, so the first key is the least recently used.
+   */
+  private resultCache = new Map<string, ClassificationResult>();
+  private cacheHits = 0;
+  private cacheMisses = 0;
+
+  /**
+   * Second tier behind the LRU, saved to disk so results survive restarts.
+   * Exact matches cost nothing; with the semantic tier enabled, an exact miss
+   * is embedded and compared with earlier inputs (cosine similarity >= 0.92
+   * reuses the result). Null when disabled.
+   */
+  private classificationCache: ClassificationCache | null;
+  private semanticHits = 0;
+
+  /**
+   * Inputs that failed deterministically before (e.g. garbled text).
+   * The Bloom filter is loaded at startup and rules out almost every input
+   * without touching the failure list, which is only read from disk on the
+   * first probable hit (to rule out false positives). Both files are
+   * dropped then if they were saved for another taxonomy or model.
+   */
+  private failureFilter = new BloomFilter();
+  private knownFailures: Map<string, KnownFailure> | null = null;
+  private failuresDirty = false;
+  private readonly failureFiles: { bloom: string; list: string } | null;
+  private readonly fingerprint: string;
+
+  /** System commands by alias, built once (see buildCommandTable) */
+  private readonly commands = this.buildCommandTable();
+
+  /** Bounds concurrent classifications started from the prompt */
+  private limit = createLimiter(MAX_CONCURRENT_CLASSIFICATIONS);
+
+  /** Classifications submitted but not yet finished */
+  private pending = new Set<Promise<unknown>>();
+
+  /** Pipeline runs in flight, keyed like the LRU, so concurrent duplicates share one run */
+  private inFlight = new Map<string, Promise<ClassificationResult>>();
 
   constructor(
     taxonomyFile?: string,
     apiKey?: string,
     model: string = 'gpt-4.1-nano',
     saveResults: boolean = false,
-    outputFile?: string
+    outputFile?: string,
+    useSemanticCache: boolean = true,
+    cacheFile: string | null = DEFAULT_CACHE_FILE
   ) {
     logger.info('Initializing Taxonomy Navigator Interactive Interface');
 
@@ -82,83 +362,101 @@ export class TaxonomyInterface {
       taxonomyFile = path.join(__dirname, '..', '..', 'data', 'taxonomy.en-US.txt');
     }
 
-    // Initialize the navigator
-    this.navigator = new TaxonomyNavigator({
+    // The navigator (and the OpenAI SDK) is loaded by getNavigator()
+    this.navigatorConfig = {
       taxonomyFile,
       apiKey,
       model
-    });
+    };
+
+    // Saved results and failures only apply to the same taxonomy and model
+    this.fingerprint = ClassificationCache.fingerprint(taxonomyFile, [model]);
+
+    // Results of earlier sessions; one embedding call replaces a full
+    // pipeline run for paraphrased inputs
+    this.classificationCache = cacheFile || useSemanticCache
+      ? new ClassificationCache({
+          cacheFile: cacheFile || undefined,
+          embed: useSemanticCache ? async text => (await (await this.getNavigator()).embedTexts([text]))[0] : undefined,
+          maxAgeMs: CACHE_MAX_AGE_MS,
+          fingerprint: this.fingerprint
+        })
+      : null;
+
+    // Known failures are stored next to the classification cache
+    this.failureFiles = cacheFile
+      ? {
+          bloom: path.join(path.dirname(cacheFile), 'known_failures.bloom'),
+          list: path.join(path.dirname(cacheFile), 'known_failures.json')
+        }
+      : null;
+    this.loadFailureFilter();
 
     // Configure result saving
     this.saveResults = saveResults;
-    this.outputFile = outputFile || `interactive_results_${new Date().toISOString().replace(/[:.]/g, '-')}.json`;
+    this.outputFile = outputFile || `interactive_results_${new Date().toISOString().replace(/[:.]/g, '-')}.jsonl`;
 
-    // Initialize readline interface
+    // Initialize readline interface (history of earlier sessions, tab
+    // completion of commands and products classified in this session)
     this.rl = readline.createInterface({
       input: process.stdin,
-      output: process.stdout
+      output: process.stdout,
+      history: loadHistory(),
+      historySize: HISTORY_SIZE,
+      completer: (line: string) => this.complete(line)
     });
+    this.lines = this.rl[Symbol.asyncIterator]();
 
     logger.info('Interface initialized successfully');
   }
 
+  /**
+   * Loads the navigator module and creates the navigator on first call.
+   * Later calls share the same instance.
+   */
+  private getNavigator(): Promise<TaxonomyNavigator> {
+    if (!this.navigator) {
+      this.navigator = import('./TaxonomyNavigator').then(
+        ({ TaxonomyNavigator }) => new TaxonomyNavigator(this.navigatorConfig)
+      );
+    }
+    return this.navigator;
+  }
+
+  /**
+   * Tab completion: commands and products classified in this session that
+   * start with the typed text (case-insensitive).
+   */
+  private complete(line: string): [string[], string] {
+    const typed = line.toLowerCase();
+    const candidates = new Set([...this.commands.keys(), ...this.sessionResults.map(r => r.productInfo)]);
+    const hits = [...candidates].filter(candidate => candidate.toLowerCase().startsWith(typed));
+    return [hits, line];
+  }
+
   displayWelcome(): void {
-    console.log('\n' + '='.repeat(70));
-    console.log('🔍 TAXONOMY NAVIGATOR - INTERACTIVE INTERFACE');
-    console.log('='.repeat(70));
-    console.log('\nWelcome to the AI-powered product classification system!');
-    console.log('\nThis interface uses a sophisticated 5-stage AI process to classify');
-    console.log('products into appropriate taxonomy categories using OpenAI\'s models.');
-    console.log('\n📋 How to use:');
-    console.log('  • Enter product information when prompted');
-    console.log('  • Use format: \'Product Name: Description\' or just \'Product Name\'');
-    console.log('  • Type \'quit\', \'exit\', or \'q\' to end the session');
-    console.log('  • Type \'help\' for additional commands');
-    console.log('  • Type \'stats\' to see session statistics');
-    console.log('\n💡 Examples:');
-    console.log('  • iPhone 14 Pro: Smartphone with advanced camera system');
-    console.log('  • Xbox Wireless Controller: Gaming controller with Bluetooth');
-    console.log('  • Nike Air Max: Running shoes with air cushioning');
-    console.log('\n🤖 5-Stage Classification Process:');
-    console.log('  1. AI generates focused 40-60 word product summary');
-    console.log('  2. AI selects top 2 L1 categories from ~21 options');
-    console.log('  3. AI selects specific categories using batch processing');
-    console.log('  4. Validation ensures no hallucinated categories');
-    console.log('  5. AI final selection using enhanced model');
-    console.log('\n' + '='.repeat(70) + '\n');
+    process.stdout.write(WELCOME_BANNER);
   }
 
   displayHelp(): void {
-    console.log('\n📖 HELP - Available Commands:');
-    console.log('-'.repeat(40));
-    console.log('🔍 Classification Commands:');
-    console.log('  • Enter any product info to classify it');
-    console.log('  • Format: \'Product Name: Description\'');
-    console.log('  • Or just: \'Product Name\'');
-    console.log('\n⚙️  System Commands:');
-    console.log('  • help, h          - Show this help message');
-    console.log('  • stats, statistics - Show session statistics');
-    console.log('  • clear, cls       - Clear the screen');
-    console.log('  • quit, exit, q    - Exit the interface');
-    console.log('\n💾 Results:');
-    if (this.saveResults) {
-      console.log(`  • Results are being saved to: ${this.outputFile}`);
-    } else {
-      console.log('  • Results are not being saved (use --save-results to enable)');
-    }
-    console.log('-'.repeat(40) + '\n');
+    const results = this.saveResults
+      ? `  • Results are being saved to: ${this.outputFile}`
+      : '  • Results are not being saved (use --save-results to enable)';
+    process.stdout.write(`${HELP_BANNER}${results}\n${'-'.repeat(40)}\n\n`);
   }
 
   displayStats(): void {
     const totalClassifications = this.sessionResults.length;
-    const successfulClassifications = this.sessionResults.filter(r => r.bestMatch !== 'False').length;
-    const failedClassifications = totalClassifications - successfulClassifications;
+    const successfulClassifications = this.successCount;
+    const failedClassifications = this.failCount;
 
     console.log('\n📊 SESSION STATISTICS:');
     console.log('-'.repeat(30));
     console.log(`Total Classifications: ${totalClassifications}`);
     console.log(`Successful: ${successfulClassifications}`);
     console.log(`Failed: ${failedClassifications}`);
+    console.log(`In Progress: ${this.pending.size}`);
+    console.log(`Cache Hits: ${this.cacheHits} (semantic: ${this.semanticHits}) / Misses: ${this.cacheMisses}`);
 
     if (totalClassifications > 0) {
       const successRate = (successfulClassifications / totalClassifications) * 100;
@@ -179,50 +477,41 @@ export class TaxonomyInterface {
     console.log('-'.repeat(30) + '\n');
   }
 
+  /**
+   * Appends a result to the session and updates the running counts.
+   */
+  private addSessionResult(sessionResult: SessionResult): void {
+    this.sessionResults.push(sessionResult);
+    if (sessionResult.success) {
+      this.successCount++;
+    } else {
+      this.failCount++;
+    }
+  }
+
+  /**
+   * Clears the terminal with one ANSI write (erase display, cursor home).
+   * Piped output is left untouched, so results files stay free of escape codes.
+   */
   clearScreen(): void {
-    console.clear();
+    if (process.stdout.isTTY) {
+      process.stdout.write(CLEAR_SCREEN);
+    }
   }
 
   async classifyProduct(productInfo: string): Promise<SessionResult> {
     console.log(`\n🔍 Classifying: ${productInfo}`);
-    console.log('⏳ Processing... (this may take a few seconds)');
+    console.log('⏳ Processing... (you can enter the next product meanwhile)');
 
     try {
       // Perform classification
-      const startTime = new Date();
-      const result = await this.navigator.classifyProduct(productInfo);
-      const endTime = new Date();
+      // Wall-clock timestamp once; duration from the monotonic clock
+      const timestamp = new Date().toISOString();
+      const startTime = performance.now();
+      const result = await this.classifyWithCache(productInfo);
+      const elapsedSeconds = (performance.now() - startTime) / 1000;
 
-      // Create result record
-      const sessionResult: SessionResult = {
-        timestamp: startTime.toISOString(),
-        productInfo,
-        bestMatch: result.success ? result.bestMatch : 'False',
-        bestPath: result.success ? result.paths[result.bestMatchIndex] : [],
-        allCandidates: result.success ? result.paths.map(p => p.join(' > ')) : [],
-        processingTimeSeconds: (endTime.getTime() - startTime.getTime()) / 1000,
-        success: result.success,
-        error: result.error
-      };
-
-      // Display result in clean format
-      console.log(`\n[${productInfo}]`);
-      if (result.success) {
-        console.log(result.leafCategory);
-      } else {
-        console.log('False');
-      }
-      console.log('-'.repeat(50));
-
-      // Save to session results
-      this.sessionResults.push(sessionResult);
-
-      // Save to file if enabled
-      if (this.saveResults) {
-        this.saveResultToFile(sessionResult);
-      }
-
-      return sessionResult;
+      return this.recordResult(productInfo, result, timestamp, elapsedSeconds);
 
     } catch (error) {
       const errorMsg = `Error during classification: ${error}`;
@@ -240,25 +529,373 @@ export class TaxonomyInterface {
         success: false,
         error: String(error)
       };
-      this.sessionResults.push(errorResult);
+      this.addSessionResult(errorResult);
       return errorResult;
     }
   }
 
-  private saveResultToFile(result: SessionResult): void {
+  /**
+   * Classifies several products with packed API calls.
+   *
+   * Each distinct product goes through the same lookup as a single entry
+   * (see lookupCached); the rest are sent to the navigator in chunks of
+   * BATCH_CHUNK_SIZE, so each stage costs one round-trip per chunk instead
+   * of one per product. Products that fail in packed mode (e.g. missing from
+   * a packed response) are retried one at a time.
+   *
+   * Every product being classified is registered as in flight until its
+   * final result is stored, so an overlapping batch or single entry with the
+   * same product shares the run instead of classifying it again.
+   *
+   * @param productInfos - Products to classify
+   * @returns One session result per product, in input order
+   */
+  async classifyBatch(productInfos: string[]): Promise<SessionResult[]> {
+    console.log(`\n📦 Classifying ${productInfos.length} products in packed batches...`);
+    console.log('⏳ Processing... (you can enter the next product meanwhile)');
+
+    const timestamp = new Date().toISOString();
+    const startTime = performance.now();
+    try {
+      // One lookup per distinct input; repeats within the list reuse it (counted as hits)
+      const keys = productInfos.map(normalizeProductInfo);
+      const infoByKey = new Map<string, string>();
+      keys.forEach((key, i) => { if (!infoByKey.has(key)) infoByKey.set(key, productInfos[i]); });
+      this.cacheHits += keys.length - infoByKey.size;
+
+      const results = new Map<string, ClassificationResult>();
+      const misses: string[] = [];
+      const lookups = await Promise.all([...infoByKey.keys()].map(key => this.lookupCached(key)));
+      [...infoByKey.keys()].forEach((key, n) => {
+        const cached = lookups[n];
+        if (cached) {
+          results.set(key, cached);
+        } else {
+          misses.push(key);
+        }
+      });
+      this.cacheMisses += misses.length;
+
+      // Chunks run one after another; all misses are registered as in flight right away
+      let previousChunk: Promise<unknown> = Promise.resolve();
+      const runs = new Map<string, Promise<ClassificationResult>>();
+      for (let start = 0; start < misses.length; start += BATCH_CHUNK_SIZE) {
+        const chunk = misses.slice(start, start + BATCH_CHUNK_SIZE);
+        const packed = previousChunk.then(async () =>
+          (await this.getNavigator()).classifyProducts(chunk.map(key => infoByKey.get(key)!))
+        );
+        previousChunk = packed.catch(() => undefined);
+
+        chunk.forEach((key, pos) => runs.set(key, this.runInFlight(key, packed.then(packedResults => {
+          if (packedResults[pos].success) return packedResults[pos];
+          // Fall back to the single-product pipeline for packed failures
+          logger.debug(`Packed classification failed (${packedResults[pos].error}), retrying: ${infoByKey.get(key)}`);
+          return this.runPipeline(infoByKey.get(key)!);
+        }))));
+      }
+
+      // Each run stores its outcome as soon as its chunk is done (see runInFlight)
+      const finished = await Promise.all(runs.values());
+      [...runs.keys()].forEach((key, n) => results.set(key, finished[n]));
+
+      const elapsedSeconds = (performance.now() - startTime) / 1000;
+      return productInfos.map((info, i) => this.recordResult(info, results.get(keys[i])!, timestamp, elapsedSeconds));
+
+    } catch (error) {
+      const errorMsg = `Error during batch classification: ${error}`;
+      logger.error(errorMsg);
+      console.log(`\n❌ ${errorMsg}`);
+      return [];
+    }
+  }
+
+  /**
+   * Turns a classification into a session result: displays it, adds it to
+   * the session history and saves it to the results file (if enabled).
+   */
+  private recordResult(
+    productInfo: string,
+    result: ClassificationResult,
+    timestamp: string,
+    elapsedSeconds: number
+  ): SessionResult {
+    const sessionResult = toSessionResult(productInfo, result, timestamp, elapsedSeconds);
+
+    // Display result in clean format
+    console.log(`\n[${productInfo}]`);
+    if (result.success) {
+      console.log(result.leafCategory);
+    } else {
+      console.log('False');
+    }
+    console.log('-'.repeat(50));
+
+    // Save to session results
+    this.addSessionResult(sessionResult);
+
+    // Save to file if enabled
+    if (this.saveResults) {
+      this.saveResultToFile(sessionResult);
+    }
+
+    return sessionResult;
+  }
+
+  /**
+   * Classifies product info, serving repeated inputs from the caches
+   * (see lookupCached) and running the full pipeline otherwise.
+   *
+   * Results are stored by storeOutcome: successes are cached, deterministic
+   * failures are remembered as known failures, other failures are retried.
+   */
+  private async classifyWithCache(productInfo: string): Promise<ClassificationResult> {
+    const key = normalizeProductInfo(productInfo);
+
+    const cached = await this.lookupCached(key);
+    if (cached) return cached;
+
+    this.cacheMisses++;
+    return this.runInFlight(key, this.runPipeline(productInfo));
+  }
+
+  /**
+   * Serves a normalized input from the caches, for single entries and
+   * batches alike. Every input served here counts as a cache hit; callers
+   * count the misses they classify.
+   *
+   * LOOKUP ORDER:
+   * 1. Exact LRU (normalized input, no API call)
+   * 2. Identical input still being classified (shares that run)
+   * 3. Known failures (Bloom filter, verified against the failure list)
+   * 4. Classification cache: saved results (exact, no API call) or
+   *    semantic match (one embedding call)
+   *
+   * @returns The cached result, or null if the input must be classified
+   */
+  private async lookupCached(key: string): Promise<ClassificationResult | null> {
+    const cached = this.lookupExact(key);
+    if (cached) return cached;
+
+    // An identical input submitted a moment ago is still running: share its result
+    const running = this.inFlight.get(key);
+    if (running) {
+      this.cacheHits++;
+      return running;
+    }
+
+    const failure = this.lookupKnownFailure(key);
+    if (failure) {
+      this.cacheHits++;
+      return failure;
+    }
+
+    const stored = await this.lookupStored(key);
+    if (stored) {
+      this.rememberResult(key, stored);
+      this.cacheHits++;
+      return stored;
+    }
+
+    return null;
+  }
+
+  /**
+   * Registers a classification run as in flight until its outcome is stored
+   * (see storeOutcome), so identical inputs submitted meanwhile share it and
+   * later ones find it in the caches (see lookupCached).
+   */
+  private async runInFlight(key: string, run: Promise<ClassificationResult>): Promise<ClassificationResult> {
+    const stored = run.then(async result => {
+      await this.storeOutcome(key, result);
+      return result;
+    });
+    this.inFlight.set(key, stored);
     try {
-      // Read existing data or create new array
-      let data: SessionResult[] = [];
-      if (fs.existsSync(this.outputFile)) {
-        const content = fs.readFileSync(this.outputFile, 'utf-8');
-        data = JSON.parse(content);
+      return await stored;
+    } finally {
+      // A run started for the same key meanwhile keeps its own entry
+      if (this.inFlight.get(key) === stored) this.inFlight.delete(key);
+    }
+  }
+
+  /**
+   * Stores the final result of a classification run. Successes go to the
+   * LRU and the classification cache, so later sessions are served without
+   * an API call; deterministic failures are recorded as known failures.
+   * Other failures are not stored and are retried next time.
+   */
+  private async storeOutcome(key: string, result: ClassificationResult): Promise<void> {
+    if (result.success) {
+      this.rememberResult(key, result);
+      try {
+        await this.classificationCache?.set(key, result);
+      } catch (error) {
+        logger.warning(`Failed to add result to classification cache: ${error}`);
       }
+    } else if (result.error && DETERMINISTIC_FAILURES.has(result.error)) {
+      this.recordKnownFailure(key, result.error);
+    }
+  }
 
-      // Add new result
-      data.push(result);
+  /**
+   * Runs the single-product pipeline, printing each stage as it completes.
+   */
+  private async runPipeline(productInfo: string): Promise<ClassificationResult> {
+    const navigator = await this.getNavigator();
+    return navigator.classifyProduct(productInfo, (stage, info) => {
+      console.log(`   ✓ ${stage} [${shorten(productInfo, PROGRESS_LABEL_WIDTH)}]: ${shorten(info, PROGRESS_INFO_WIDTH)}`);
+    });
+  }
+
+  /**
+   * Looks up a normalized input in the classification cache.
+   * Embedding failures are logged and treated as a miss.
+   */
+  private async lookupStored(key: string): Promise<ClassificationResult | null> {
+    if (!this.classificationCache || this.classificationCache.size === 0) return null;
+
+    try {
+      const hit = await this.classificationCache.get(key);
+      if (!hit) return null;
 
-      // Write back to file
-      fs.writeFileSync(this.outputFile, JSON.stringify(data, null, 2), 'utf-8');
+      if (hit.matchType === 'semantic') this.semanticHits++;
+      logger.debug(`${hit.matchType} cache hit (similarity ${hit.similarity.toFixed(3)}) for: ${key}`);
+      return {
+        success: true,
+        paths: [hit.entry.bestMatch.split(' > ')],
+        bestMatchIndex: 0,
+        bestMatch: hit.entry.bestMatch,
+        leafCategory: hit.entry.leafCategory,
+        processingTime: 0,
+        apiCalls: hit.matchType === 'semantic' ? 1 : 0,
+        stageDetails: hit.entry.stageDetails
+      };
+    } catch (error) {
+      logger.warning(`Classification cache lookup failed: ${error}`);
+      return null;
+    }
+  }
+
+  /**
+   * Returns a failed result without API calls if the input is a known failure.
+   * The failure list is only loaded when the Bloom filter reports a probable hit.
+   */
+  private lookupKnownFailure(key: string): ClassificationResult | null {
+    if (!this.failureFilter.has(key)) return null;
+
+    const failure = this.getKnownFailures().get(key);
+    if (!failure) return null; // Bloom filter false positive
+
+    logger.debug(`Known failure for: ${key}`);
+    return {
+      success: false,
+      paths: [['False']],
+      bestMatchIndex: 0,
+      bestMatch: 'False',
+      leafCategory: 'False',
+      processingTime: 0,
+      apiCalls: 0,
+      error: `${failure.error} (known failure, not retried)`
+    };
+  }
+
+  /**
+   * Records an input whose classification failed deterministically.
+   */
+  private recordKnownFailure(key: string, error: string): void {
+    // Loaded first: a stale failure list resets the filter
+    this.getKnownFailures().set(key, { error, savedAt: Date.now() });
+    this.failureFilter.add(key);
+    this.failuresDirty = true;
+  }
+
+  /**
+   * Returns the failure list, reading it from disk on first use.
+   * Expired entries (older than CACHE_MAX_AGE_MS) are dropped. A list saved
+   * for another taxonomy or model (or without a fingerprint) is deleted
+   * together with the Bloom filter.
+   */
+  private getKnownFailures(): Map<string, KnownFailure> {
+    if (this.knownFailures) return this.knownFailures;
+
+    this.knownFailures = new Map();
+    if (this.failureFiles && fs.existsSync(this.failureFiles.list)) {
+      try {
+        const data: KnownFailureFile = JSON.parse(fs.readFileSync(this.failureFiles.list, 'utf-8'));
+        if (data.fingerprint !== this.fingerprint) {
+          logger.debug('Dropping known failures of another taxonomy or model');
+          this.failureFilter = new BloomFilter();
+          fs.rmSync(this.failureFiles.list, { force: true });
+          fs.rmSync(this.failureFiles.bloom, { force: true });
+          return this.knownFailures;
+        }
+
+        const oldest = Date.now() - CACHE_MAX_AGE_MS;
+        for (const [key, failure] of Object.entries(data.failures ?? {})) {
+          if (failure.savedAt >= oldest) this.knownFailures.set(key, failure);
+        }
+      } catch (error) {
+        logger.warning(`Ignoring unreadable failure list: ${error}`);
+      }
+    }
+    return this.knownFailures;
+  }
+
+  /**
+   * Loads the Bloom filter of known failures, starting empty if there is none.
+   */
+  private loadFailureFilter(): void {
+    if (!this.failureFiles || !fs.existsSync(this.failureFiles.bloom)) return;
+
+    try {
+      this.failureFilter = BloomFilter.fromBuffer(fs.readFileSync(this.failureFiles.bloom));
+    } catch (error) {
+      logger.warning(`Ignoring unreadable failure filter: ${error}`);
+    }
+  }
+
+  /**
+   * Looks up a normalized input in the LRU cache, marking it as most
+   * recently used and counting the hit.
+   */
+  private lookupExact(key: string): ClassificationResult | undefined {
+    const cached = this.resultCache.get(key);
+    if (cached) {
+      // Re-insert to mark the entry as most recently used
+      this.resultCache.delete(key);
+      this.resultCache.set(key, cached);
+      this.cacheHits++;
+      logger.debug(`Cache hit for: ${key}`);
+    }
+    return cached;
+  }
+
+  /**
+   * Adds a result to the LRU cache, evicting the least recently used entry when full.
+   */
+  private rememberResult(key: string, result: ClassificationResult): void {
+    this.resultCache.set(key, result);
+    if (this.resultCache.size > RESULT_CACHE_SIZE) {
+      this.resultCache.delete(this.resultCache.keys().next().value as string);
+    }
+  }
+
+  /**
+   * Appends one result to the results file as a JSON line.
+   * Append-only, so each save costs the same no matter how long the session
+   * runs (see jsonlToJsonArray to convert the file into a JSON array).
+   * The file is opened once per session instead of once per result.
+   * 
+   * Writes go through a stream, so saving never blocks the event loop
+   * while other classifications are still running.
+   */
+  private saveResultToFile(result: SessionResult): void {
+    try {
+      if (this.resultsStream === null) {
+        this.resultsStream = fs.createWriteStream(this.outputFile, { flags: 'a', encoding: 'utf-8' });
+        this.resultsStream.on('error', error => logger.error(`Failed to save result to file: ${error}`));
+      }
+      this.resultsStream.write(JSON.stringify(result) + '\n');
       logger.debug(`Result saved to ${this.outputFile}`);
 
     } catch (error) {
@@ -266,22 +903,129 @@ export class TaxonomyInterface {
     }
   }
 
-  private async prompt(question: string): Promise<string> {
-    return new Promise((resolve) => {
-      this.rl.question(question, (answer) => {
-        resolve(answer);
-      });
-    });
+  /**
+   * Flushes and closes the results file if it was opened.
+   */
+  private async closeResultsFile(): Promise<void> {
+    const stream = this.resultsStream;
+    if (stream !== null) {
+      this.resultsStream = null;
+      await new Promise<void>(resolve => stream.end(resolve));
+    }
+  }
+
+  /**
+   * Starts a classification without waiting for it, so the user can enter
+   * the next product right away. The result is printed when it is ready.
+   */
+  private submitClassification(productInfo: string): void {
+    this.track(this.limit(() => this.classifyProduct(productInfo)));
+  }
+
+  /**
+   * Starts a packed classification of several products without waiting for it.
+   */
+  private submitBatch(productInfos: string[]): void {
+    this.track(this.limit(() => this.classifyBatch(productInfos)));
+  }
+
+  /**
+   * Keeps a running task in the pending set until it finishes.
+   */
+  private track(task: Promise<unknown>): void {
+    this.pending.add(task);
+    void task.then(() => this.pending.delete(task));
+  }
+
+  /**
+   * Waits for all submitted classifications to finish.
+   */
+  private async waitForPending(): Promise<void> {
+    if (this.pending.size === 0) return;
+    console.log(`⏳ Waiting for ${this.pending.size} classification(s) to finish...`);
+    await Promise.all(this.pending);
+  }
+
+  /**
+   * Parses a batch command into product lines.
+   * Inline products are separated by ';'; a bare "batch:" reads one product
+   * per line until an empty line (suits pasting a list of products).
+   */
+  private async readBatch(input: string): Promise<string[]> {
+    const inline = input.slice(BATCH_PREFIX.length).trim();
+    if (inline) {
+      return inline.split(';').map(p => p.trim()).filter(Boolean);
+    }
+
+    console.log('📦 Enter one product per line, finish with an empty line:');
+    const products: string[] = [];
+    while (true) {
+      const line = await this.prompt('   … ');
+      if (line === null || !line.trim()) break;
+      products.push(line.trim());
+    }
+    return products;
+  }
+
+  /**
+   * Asks the user a question.
+   * Lines are read through an async iterator, which buffers input that
+   * arrives while classifications are still printing (e.g. piped stdin).
+   * Resolves with null when input ends (Ctrl+D or end of piped input).
+   */
+  private async prompt(question: string): Promise<string | null> {
+    this.rl.setPrompt(question);
+    this.rl.prompt();
+    const { value, done } = await this.lines.next();
+    return done ? null : value;
+  }
+
+  /**
+   * Quits the session after pending classifications have finished.
+   */
+  private async quit(): Promise<CommandAction> {
+    await this.waitForPending();
+    console.log('\n👋 Thank you for using Taxonomy Navigator!');
+    if (this.sessionResults.length > 0) {
+      console.log(`📊 Session Summary: ${this.sessionResults.length} classifications completed`);
+      if (this.saveResults) {
+        console.log(`💾 Results saved to: ${this.outputFile}`);
+      }
+    }
+    return 'exit';
+  }
+
+  /**
+   * Builds the command dispatch table (every alias maps to its handler).
+   * Input that is not a command is classified as product info.
+   */
+  private buildCommandTable(): Map<string, CommandHandler> {
+    const quit = () => this.quit();
+    const help = () => this.displayHelp();
+    const stats = () => this.displayStats();
+    const clear = () => {
+      this.clearScreen();
+      this.displayWelcome();
+    };
+
+    return new Map<string, CommandHandler>([
+      ['quit', quit], ['exit', quit], ['q', quit],
+      ['help', help], ['h', help],
+      ['stats', stats], ['statistics', stats],
+      ['clear', clear], ['cls', clear]
+    ]);
   }
 
   async run(): Promise<void> {
+    // Load the taxonomy before the first prompt, so a bad file fails right away
+    await this.getNavigator();
     this.displayWelcome();
 
     try {
       while (true) {
         // Get user input
         const userInput = await this.prompt('🔍 Enter product info (or \'help\' for commands): ');
-        const input = userInput.trim();
+        const input = userInput === null ? 'quit' : userInput.trim();
 
         // Handle empty input
         if (!input) {
@@ -292,38 +1036,61 @@ export class TaxonomyInterface {
         // Process commands
         const command = input.toLowerCase();
 
-        if (['quit', 'exit', 'q'].includes(command)) {
-          console.log('\n👋 Thank you for using Taxonomy Navigator!');
-          if (this.sessionResults.length > 0) {
-            console.log(`📊 Session Summary: ${this.sessionResults.length} classifications completed`);
-            if (this.saveResults) {
-              console.log(`💾 Results saved to: ${this.outputFile}`);
-            }
-          }
-          break;
-        } else if (['help', 'h'].includes(command)) {
-          this.displayHelp();
+        const handler = this.commands.get(command);
+        if (handler) {
+          if (await handler() === 'exit') break;
           continue;
-        } else if (['stats', 'statistics'].includes(command)) {
-          this.displayStats();
-          continue;
-        } else if (['clear', 'cls'].includes(command)) {
-          this.clearScreen();
-          this.displayWelcome();
+        }
+
+        if (command.startsWith(BATCH_PREFIX)) {
+          const products = await this.readBatch(input);
+          if (products.length > 0) {
+            this.submitBatch(products);
+          } else {
+            console.log('⚠️  No products given for the batch.');
+          }
           continue;
         }
 
-        // Classify the product
-        await this.classifyProduct(input);
+        // Classify the product in the background
+        this.submitClassification(input);
       }
     } catch (error) {
       logger.error(`Unexpected error in interface: ${error}`);
       console.log(`\n❌ An unexpected error occurred: ${error}`);
       console.log('Please restart the interface.');
     } finally {
+      await this.waitForPending();
+      this.saveCache();
+      // readline only records history on a terminal; piped input keeps the file as is
+      if (this.rl.terminal) {
+        saveHistory((this.rl as readline.Interface & { history: string[] }).history);
+      }
+      await this.closeResultsFile();
       this.rl.close();
     }
   }
+
+  /**
+   * Writes new classification cache entries and known failures to disk
+   * (one write per file per session).
+   */
+  private saveCache(): void {
+    try {
+      if (this.classificationCache?.save()) {
+        logger.debug(`Classification cache saved (${this.classificationCache.size} entries)`);
+      }
+      if (this.failureFiles && this.failuresDirty && this.knownFailures) {
+        fs.mkdirSync(path.dirname(this.failureFiles.list), { recursive: true });
+        const data: KnownFailureFile = { fingerprint: this.fingerprint, failures: Object.fromEntries(this.knownFailures) };
+        fs.writeFileSync(this.failureFiles.list, JSON.stringify(data), 'utf-8');
+        fs.writeFileSync(this.failureFiles.bloom, this.failureFilter.toBuffer());
+        this.failuresDirty = false;
+      }
+    } catch (error) {
+      logger.error(`Failed to save classification cache: ${error}`);
+    }
+  }
 }
 
 // Command-line interface
@@ -341,6 +1108,11 @@ export async function main(): Promise<void> {
 
   const hasFlag = (flag: string): boolean => args.includes(flag);
 
+  if (hasFlag('--help') || hasFlag('-h')) {
+    printUsage();
+    return;
+  }
+
   // Parse arguments
   const defaultTaxonomy = path.join(__dirname, '..', '..', 'data', 'taxonomy.en-US.txt');
   const taxonomyFile = getArg('--taxonomy-file', defaultTaxonomy);
@@ -349,6 +1121,17 @@ export async function main(): Promise<void> {
   const saveResults = hasFlag('--save-results');
   const outputFile = getArg('--output-file');
   const verbose = hasFlag('--verbose');
+  const useSemanticCache = !hasFlag('--no-semantic-cache');
+  const cacheFile = hasFlag('--no-cache') ? null : getArg('--cache-file', DEFAULT_CACHE_FILE)!;
+  const batchMode = hasFlag('--batch-mode');
+  const inputFile = getArg('--input-file');
+
+  // Convert a JSON Lines results file and exit (no API key needed)
+  const convertFile = getArg('--convert-results');
+  if (convertFile) {
+    console.log(`💾 Converted results saved to: ${jsonlToJsonArray(convertFile)}`);
+    return;
+  }
 
   // Configure logging level
   if (verbose) {
@@ -369,13 +1152,21 @@ export async function main(): Promise<void> {
       process.exit(1);
     }
 
+    // Non-interactive bulk run through the OpenAI Batch API
+    if (batchMode) {
+      await runBatchMode(taxonomyFile, resolvedApiKey, model, inputFile, outputFile);
+      return;
+    }
+
     // Initialize and run the interface
     const interface_ = new TaxonomyInterface(
       taxonomyFile,
       resolvedApiKey,
       model,
       saveResults,
-      outputFile
+      outputFile,
+      useSemanticCache,
+      cacheFile
     );
 
     await interface_.run();
@@ -387,6 +1178,111 @@ export async function main(): Promise<void> {
   }
 }
 
+/**
+ * Print command line usage
+ */
+function printUsage(): void {
+  console.log(`Usage: interactiveInterface [options]
+
+Options:
+  --taxonomy-file <path>     Taxonomy file (default: data/taxonomy.en-US.txt)
+  --model <name>             Model for stages 0-2 (default: gpt-4.1-nano)
+  --api-key <key>            OpenAI API key (default: OPENAI_API_KEY or data/api_key.txt)
+  --save-results             Append each result to a JSON Lines file
+  --output-file <path>       Results file (default: interactive_results_<timestamp>.jsonl)
+  --cache-file <path>        Classification cache file (default: data/classification_cache.json)
+  --no-cache                 Disable the classification cache
+  --no-semantic-cache        Reuse only exact matches, not paraphrased inputs
+  --batch-mode               Classify all products through the OpenAI Batch API
+  --input-file <path>        Products for --batch-mode, one per line (default: stdin);
+                             progress is saved in <path>.batch-state.json
+  --convert-results <file>   Convert a JSON Lines results file into a JSON array
+  --verbose                  Enable debug logging
+  -h, --help                 Show this help`);
+}
+
+/**
+ * Converts a JSON Lines results file (as written by --save-results) into a
+ * single JSON array file.
+ *
+ * Every line is already a serialized result, so the lines are joined into
+ * the array as they are instead of being parsed and serialized again.
+ * Only the last line is parsed: an interrupted session can leave it
+ * half-written, in which case it is dropped.
+ *
+ * @param jsonlFile - Results file with one JSON object per line
+ * @param jsonFile - Output file (default: same name with a .json extension)
+ * @returns The path of the written JSON file
+ */
+export function jsonlToJsonArray(jsonlFile: string, jsonFile?: string): string {
+  const target = jsonFile || jsonlFile.replace(/\.jsonl$/, '') + '.json';
+  const lines = fs.readFileSync(jsonlFile, 'utf-8').split('\n').filter(line => line.trim());
+
+  if (lines.length > 0) {
+    try {
+      JSON.parse(lines[lines.length - 1]);
+    } catch {
+      logger.warning(`Dropping incomplete last line of ${jsonlFile}`);
+      lines.pop();
+    }
+  }
+
+  fs.writeFileSync(target, lines.length > 0 ? `[\n${lines.join(',\n')}\n]\n` : '[]\n', 'utf-8');
+  return target;
+}
+
+/**
+ * Classifies every line of the input file (or of piped stdin) through the
+ * OpenAI Batch API and writes the results file once all rounds are done.
+ *
+ * Runs of 1k+ products cost half as much as interactive classification and
+ * are not throttled by the synchronous rate limits, but take minutes to hours.
+ * Progress is saved next to the input file (<input>.batch-state.json, or
+ * batch_state_<hash of the input>.json for stdin), so an interrupted run
+ * resumes where it stopped when started again with the same input.
+ */
+export async function runBatchMode(
+  taxonomyFile: string | undefined,
+  apiKey: string,
+  model: string | undefined,
+  inputFile: string | undefined,
+  outputFile: string | undefined
+): Promise<void> {
+  if (!inputFile && process.stdin.isTTY) {
+    throw new Error('--batch-mode needs --input-file <path> or products piped to stdin');
+  }
+
+  const content = fs.readFileSync(inputFile ?? 0, 'utf-8');
+  const products = content.split('\n').map(line => line.trim()).filter(Boolean);
+  const resultsFile = outputFile || `batch_results_${new Date().toISOString().replace(/[:.]/g, '-')}.json`;
+  // Tied to the input, not the (timestamped) results file, so a restart finds it
+  const stateFile = inputFile
+    ? `${inputFile}.batch-state.json`
+    : `batch_state_${crypto.createHash('sha256').update(content).digest('hex').slice(0, 16)}.json`;
+
+  console.log(`📦 Batch mode: ${products.length} products`);
+
+  const { TaxonomyBatchRunner } = await import('./batchRunner');
+  const runner = new TaxonomyBatchRunner({
+    taxonomyFile,
+    apiKey,
+    model,
+    stateFile
+  });
+
+  const timestamp = new Date().toISOString();
+  const startTime = performance.now();
+  const results = await runner.run(products);
+  const elapsedSeconds = (performance.now() - startTime) / 1000;
+
+  const sessionResults = results.map((result, i) => toSessionResult(products[i], result, timestamp, elapsedSeconds));
+  fs.writeFileSync(resultsFile, JSON.stringify(sessionResults, null, 2), 'utf-8');
+
+  const successful = results.filter(r => r.success).length;
+  console.log(`\n✅ Classified ${successful}/${products.length} products in ${runner.batchCount} batch jobs`);
+  console.log(`💾 Results saved to: ${resultsFile}`);
+}
+
 // Run if executed directly
 if (require.main === module) {
   main().catch(console.error);
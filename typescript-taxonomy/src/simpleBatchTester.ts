@@ -7,7 +7,7 @@
  * 
  * PURPOSE:
  * - Demonstrate the multi-stage classification process
- * - Test multiple products in sequence
+ * - Test multiple products concurrently
  * - Show intermediate results for debugging
  * - Validate classification accuracy
  * 
@@ -26,15 +26,41 @@
  * DESIGN PHILOSOPHY:
  * - Hardcoded test products for consistency
  * - Verbose output for educational purposes
- * - Sequential processing for clarity
+ * - Concurrent processing with per-product output buffering (results are
+ *   printed in submission order, so concurrency never garbles the display)
+ * - Optional packed mode (--batch-size N): N products share each stage's
+ *   API call, trading a little accuracy for far fewer calls
  * - Error handling with continuation
+ * 
+ * PROMPT ORDERING:
+ * - All stage prompts put the fixed instructions and category lists first and
+ *   the product last, so consecutive products share a cacheable prompt prefix
+ *   (see PROMPT CACHING in TaxonomyNavigator.ts). Keep this order when editing.
  */
 
 import * as fs from 'fs';
 import * as path from 'path';
 import * as readline from 'readline';
-import { TaxonomyNavigator } from './TaxonomyNavigator';
+// Type-only import: the navigator module (and the OpenAI SDK it pulls in) is
+// loaded lazily in runBatchTest(), once arguments and input files check out
+import type { TaxonomyNavigator } from './TaxonomyNavigator';
 import { getApiKey } from './config';
+import { createLimiter } from './concurrency';
+import { shorten } from './formatting';
+import { ClassificationCache, CachedClassification } from './classificationCache';
+
+/**
+ * Default number of products classified at the same time.
+ * Each product needs 4-5 sequential API round-trips, so overlapping several
+ * products hides most of that latency. Override with --concurrency.
+ */
+const DEFAULT_CONCURRENCY = 8;
+
+/**
+ * Layout of wrapped AI summaries in the stage display
+ */
+const SUMMARY_WRAP_WIDTH = 70;
+const SUMMARY_INDENT = '   ';
 
 /**
  * Array of test products covering different categories.
@@ -73,8 +99,8 @@ function formatTime(ms: number): string {
  * 
  * PROCESS FLOW:
  * 1. Initialize TaxonomyNavigator
- * 2. Process each test product sequentially
- * 3. Display stage-by-stage results
+ * 2. Process test products concurrently (--concurrency, default 8)
+ * 3. Display stage-by-stage results in submission order
  * 4. Show summary statistics
  * 
  * STAGE DISPLAY:
@@ -124,15 +150,36 @@ async function runBatchTest() {
 
   const hasFlag = (flag: string): boolean => args.includes(flag);
 
+  if (hasFlag('--help') || hasFlag('-h')) {
+    printUsage();
+    return;
+  }
+
   // File configuration
   const defaultTaxonomy = path.join(__dirname, '..', '..', 'data', 'taxonomy.en-US.txt');
-  const productsFile = args.find(arg => arg.endsWith('.txt')) || path.join(__dirname, '../tests/sample_products.txt');
+  const explicitProductsFile = args.find(arg => arg.endsWith('.txt'));
+  const productsFile = explicitProductsFile || path.join(__dirname, '../tests/sample_products.txt');
   const taxonomyFile = getArg('--taxonomy-file', defaultTaxonomy) || defaultTaxonomy;
   
   // Model configuration
   const model = getArg('--model', 'gpt-4.1-nano');
   const apiKey = getArg('--api-key');
+
+  // Concurrency configuration
+  const requestedConcurrency = parseInt(getArg('--concurrency', String(DEFAULT_CONCURRENCY))!);
+  const concurrency = !isNaN(requestedConcurrency) && requestedConcurrency > 0
+    ? requestedConcurrency
+    : DEFAULT_CONCURRENCY;
+
+  // Packed mode: classify N products per API call (1 = one product per call)
+  const requestedBatchSize = parseInt(getArg('--batch-size', '1')!);
+  const batchSize = !isNaN(requestedBatchSize) && requestedBatchSize > 0 ? requestedBatchSize : 1;
   
+  // Cache configuration
+  const defaultCacheFile = path.join(__dirname, '..', '..', 'data', 'classification_cache.json');
+  const cacheFile = getArg('--cache-file', defaultCacheFile) || defaultCacheFile;
+  const useCache = !hasFlag('--no-cache');
+
   // Display options
   const showStagePaths = hasFlag('--show-stage-paths');
   const verbose = hasFlag('--verbose');
@@ -211,79 +258,154 @@ async function runBatchTest() {
         return;
     }
 
-    // Initialize the taxonomy navigator
+    // Initialize the taxonomy navigator (loaded only now: it pulls in the OpenAI SDK)
+    const { TaxonomyNavigator } = await import('./TaxonomyNavigator');
     const navigator = new TaxonomyNavigator({
       taxonomyFile,
       apiKey: resolvedApiKey,
       model,
-      enableLogging: shouldBeVerbose
+      enableLogging: shouldBeVerbose,
+      maxPackedProducts: batchSize // Chunks are formed here already
     });
 
-    // Read products from file
-    const products = testProducts;
-    
-    if (products.length === 0) {
-      console.log('❌ No products found in the file.');
-      process.exit(1);
-    }
+    // Exact + semantic result cache, persisted between runs
+    const cache = useCache
+      ? new ClassificationCache({
+          cacheFile,
+          embed: async text => (await navigator.embedTexts([text]))[0],
+          fingerprint: ClassificationCache.fingerprint(taxonomyFile, [String(model)])
+        })
+      : undefined;
 
-    // If running in direct mode, randomly select the specified number of products
     let selectedProducts: string[];
     if (args.length === 0 && numProducts !== null) {
-      if (numProducts >= products.length) {
-        console.log(`📝 Note: Requested ${numProducts} products, but only ${products.length} available. Using all products.`);
-        selectedProducts = products;
+      // Direct mode: randomly select the requested number of products from the
+      // sample file in a single streaming pass (only the sample is kept in memory)
+      const { sample, total } = await reservoirSampleProducts(productsFile, numProducts);
+
+      if (total === 0) {
+        console.log('❌ No products found in the file.');
+        process.exit(1);
+      }
+
+      if (numProducts >= total) {
+        console.log(`📝 Note: Requested ${numProducts} products, but only ${total} available. Using all products.`);
       } else {
-        // Random selection without replacement
-        selectedProducts = [];
-        const indices = new Set<number>();
-        while (indices.size < numProducts) {
-          indices.add(Math.floor(Math.random() * products.length));
-        }
-        selectedProducts = Array.from(indices).map(i => products[i]);
-        console.log(`🎲 Randomly selected ${selectedProducts.length} products from ${products.length} total`);
+        console.log(`🎲 Randomly selected ${sample.length} products from ${total} total`);
       }
+      selectedProducts = sample;
     } else {
       // Use all products when run with command line arguments
+      const products = explicitProductsFile ? readProductsFile(explicitProductsFile) : testProducts;
+
+      if (products.length === 0) {
+        console.log('❌ No products found in the file.');
+        process.exit(1);
+      }
       selectedProducts = products;
     }
 
     console.log(`\n🚀 Starting Classification Process...`);
     console.log(`   Total Products: ${selectedProducts.length}`);
     console.log(`   Taxonomy Categories: ~5,000+ options to choose from`);
+    console.log(`   Concurrency: ${concurrency} ${batchSize > 1 ? 'batch(es)' : 'product(s)'} at a time`);
+    if (batchSize > 1) {
+      console.log(`   Packed mode: ${batchSize} products per API call`);
+    }
     console.log('='.repeat(80));
 
-    // Process each selected product and display in the requested format
-    for (let i = 0; i < selectedProducts.length; i++) {
-      const productLine = selectedProducts[i];
-      
-      // Show Stage paths for every product if requested (not just the first one)
-      const showPaths = shouldShowStagePaths;
-      
+    // Classify products concurrently. Each product writes into its own output
+    // buffer so that overlapping classifications never interleave on screen.
+    const limit = createLimiter(concurrency);
+
+    // Show Stage paths for every product if requested (not just the first one)
+    const showPaths = shouldShowStagePaths;
+
+    const startProductOutput = (i: number, productLine: string): string[] => {
+      const output: string[] = [];
       if (showPaths) {
-        console.log(`\n${'='.repeat(20)} PRODUCT ${i + 1} of ${selectedProducts.length} ${'='.repeat(20)}`);
-        console.log('\n📦 PRODUCT DESCRIPTION:');
-        const displayText = productLine.length > 100 
-          ? `   Full: ${productLine.substring(0, 100)}...`
-          : `   Full: ${productLine}`;
-        console.log(displayText);
-        console.log('   AI will generate a 40-60 word summary for all categorization stages');
-        console.log('='.repeat(100));
+        output.push(`\n${'='.repeat(20)} PRODUCT ${i + 1} of ${selectedProducts.length} ${'='.repeat(20)}`);
+        output.push('\n📦 PRODUCT DESCRIPTION:');
+        output.push(`   Full: ${shorten(productLine, 103)}`);
+        output.push('   AI will generate a 40-60 word summary for all categorization stages');
+        output.push('='.repeat(100));
       }
+      return output;
+    };
 
-      // Classify the product
-      const finalLeaf = await classifyProductWithStageDisplay(navigator, productLine, showPaths);
-
+    const finishProductOutput = (output: string[], productLine: string, finalLeaf: string): string[] => {
       // Display in the exact format requested: [Input] then Leaf Category
-      console.log('\n[PRODUCT INPUT]');
-      console.log(productLine);
-      console.log('\n[FINAL CATEGORY]');
-      console.log(finalLeaf);
+      output.push('\n[PRODUCT INPUT]');
+      output.push(productLine);
+      output.push('\n[FINAL CATEGORY]');
+      output.push(finalLeaf);
+      return output;
+    };
+
+    // Classify each distinct product line only once; repeated lines reuse
+    // the result of their first occurrence
+    const uniqueProducts: string[] = [];
+    const uniqueIndex = new Map<string, number>();
+    const firstOccurrence: number[] = [];
+    selectedProducts.forEach((productLine, i) => {
+      if (uniqueIndex.has(productLine)) return;
+      uniqueIndex.set(productLine, uniqueProducts.length);
+      uniqueProducts.push(productLine);
+      firstOccurrence.push(i);
+    });
+    if (uniqueProducts.length < selectedProducts.length) {
+      console.log(`♻️  ${selectedProducts.length - uniqueProducts.length} duplicate product(s) will reuse earlier results`);
+    }
+
+    // Stage display lines and final leaf per unique product
+    const classified: Promise<{ stageLines: string[]; finalLeaf: string }>[] = [];
+    if (batchSize > 1) {
+      // Packed mode: each chunk of products is classified with shared API calls
+      for (let start = 0; start < uniqueProducts.length; start += batchSize) {
+        const chunk = uniqueProducts.slice(start, start + batchSize);
+        const chunkResults = limit(async () => {
+          const outputs = chunk.map(() => [] as string[]);
+          const finalLeaves = await classifyProductChunk(navigator, chunk, showPaths, outputs, cache);
+          return outputs.map((stageLines, n) => ({ stageLines, finalLeaf: finalLeaves[n] }));
+        });
+        chunk.forEach((_, n) => classified.push(chunkResults.then(results => results[n])));
+      }
+    } else {
+      uniqueProducts.forEach(productLine => classified.push(limit(async () => {
+        const stageLines: string[] = [];
+
+        // Classify the product
+        const finalLeaf = await classifyProductWithStageDisplay(navigator, productLine, showPaths, stageLines, cache);
+        return { stageLines, finalLeaf };
+      })));
+    }
+
+    // Print each product's buffered output in submission order as soon as it is ready,
+    // with a single stdout write per product (separator included)
+    const productSeparator = '\n' + '='.repeat(100) + '\n';
+    for (let i = 0; i < selectedProducts.length; i++) {
+      const productLine = selectedProducts[i];
+      const u = uniqueIndex.get(productLine)!;
+      const { stageLines, finalLeaf } = await classified[u];
+
+      const output = startProductOutput(i, productLine);
+      if (firstOccurrence[u] === i) {
+        output.push(...stageLines);
+      } else if (showPaths) {
+        output.push(`\n♻️  DUPLICATE of product ${firstOccurrence[u] + 1} - reusing its classification`);
+      }
+      finishProductOutput(output, productLine, finalLeaf);
 
       // More prominent separation between products
       if (i < selectedProducts.length - 1) { // Don't add separator after the last product
-        console.log('\n' + '='.repeat(100) + '\n');
+        output.push(productSeparator);
       }
+      process.stdout.write(output.join('\n') + '\n');
+    }
+
+    // Persist new cache entries in a single write
+    if (cache?.save()) {
+      console.log(`\n💾 Classification cache saved (${cache.size} entries): ${cacheFile}`);
     }
 
   } catch (error) {
@@ -292,6 +414,27 @@ async function runBatchTest() {
   }
 }
 
+/**
+ * Print command line usage
+ */
+function printUsage(): void {
+  console.log(`Usage: simpleBatchTester [products.txt] [options]
+
+Run without arguments for interactive direct mode (random sample from the sample file).
+
+Options:
+  --taxonomy-file <path>  Taxonomy file (default: data/taxonomy.en-US.txt)
+  --model <name>          Model for stages 0-2 (default: gpt-4.1-nano)
+  --api-key <key>         OpenAI API key (default: OPENAI_API_KEY or data/api_key.txt)
+  --concurrency <n>       Products (or batches) classified at the same time (default: ${DEFAULT_CONCURRENCY})
+  --batch-size <n>        Products per packed API call (default: 1 = no packing)
+  --cache-file <path>     Classification cache file (default: data/classification_cache.json)
+  --no-cache              Disable the classification cache
+  --show-stage-paths      Show the AI's selections at each stage
+  --verbose               Enable navigator logging
+  -h, --help              Show this help`);
+}
+
 /**
  * Read products from a text file, one product per line
  */
@@ -309,95 +452,187 @@ function readProductsFile(filename: string): string[] {
 }
 
 /**
- * Extract the product title from a product description line
+ * Randomly sample up to `k` products from a text file (one product per line).
+ *
+ * Uses reservoir sampling: the file is streamed line by line in a single pass
+ * and only the current sample of `k` lines is kept in memory, so large product
+ * files are never fully materialized. If the file has no more than `k`
+ * products, all of them are returned without any random draws.
+ *
+ * Algorithm L is used instead of Algorithm R: rather than drawing a random
+ * number for every line past the first `k`, it computes how many lines to skip
+ * until the next replacement, so only O(k log(N/k)) random draws are made.
+ *
+ * @returns The sampled products and the total number of products in the file
  */
-function extractProductTitle(productLine: string): string {
-  if (productLine.includes(':')) {
-    // Split on first colon and return the title part
-    return productLine.split(':', 1)[0].trim();
-  } else {
-    // No colon found, return the entire line as title
-    return productLine.trim();
+async function reservoirSampleProducts(
+  filename: string,
+  k: number
+): Promise<{ sample: string[]; total: number }> {
+  const reservoir: string[] = [];
+  let total = 0;
+  if (k <= 0) return { sample: reservoir, total };
+
+  // Algorithm L state: W and the index of the next line to put in the reservoir
+  const random = () => 1 - Math.random(); // (0, 1], safe for Math.log
+  let w = 1;
+  let nextIndex = Infinity;
+  const skip = () => Math.floor(Math.log(random()) / Math.log(1 - w));
+
+  const lines = readline.createInterface({
+    input: fs.createReadStream(filename, { encoding: 'utf-8' }),
+    crlfDelay: Infinity
+  });
+
+  for await (const rawLine of lines) {
+    const line = rawLine.trim();
+    if (line.length === 0) continue;
+
+    if (reservoir.length < k) {
+      reservoir.push(line);
+      if (reservoir.length === k) {
+        w = Math.exp(Math.log(random()) / k);
+        nextIndex = k + skip();
+      }
+    } else if (total === nextIndex) {
+      // Replace a random reservoir entry, then jump to the next replacement
+      reservoir[Math.floor(Math.random() * k)] = line;
+      w *= Math.exp(Math.log(random()) / k);
+      nextIndex += skip() + 1;
+    }
+    total++;
   }
+
+  return { sample: reservoir, total };
 }
 
 /**
- * Classify a single product and optionally display the AI's selections at each stage
+ * Classify a single product and optionally display the AI's selections at each stage.
+ *
+ * Stage output is appended to `output` instead of being printed directly, so the
+ * caller can flush it in one piece once the product is done (products are
+ * classified concurrently).
+ *
+ * If a cache is given it is consulted before any classification API call, and
+ * successful results are added to it.
  */
 async function classifyProductWithStageDisplay(
   navigator: TaxonomyNavigator,
   productLine: string,
-  showStagePaths: boolean = false
+  showStagePaths: boolean = false,
+  output: string[] = [],
+  cache?: ClassificationCache
 ): Promise<string> {
+  const print = (line: string): void => {
+    output.push(line);
+  };
+
+  // Add successful results to the cache (if any) and pass the leaf through
+  const remember = async (leaf: string, bestMatch: string, stageDetails?: CachedClassification['stageDetails']): Promise<string> => {
+    if (cache) {
+      await cache.set(productLine, { leafCategory: leaf, bestMatch, stageDetails });
+    }
+    return leaf;
+  };
+
   try {
+    // Check the cache before making any classification API call
+    if (cache) {
+      const hit = await cache.get(productLine);
+      if (hit) {
+        if (showStagePaths) {
+          const matchInfo = hit.matchType === 'exact'
+            ? 'exact match'
+            : `similar product, similarity ${hit.similarity.toFixed(3)}`;
+          print(`\n♻️  CACHE HIT (${matchInfo}) - skipping all classification stages`);
+          print(`   Full Category Path: ${hit.entry.bestMatch}`);
+          print(`   Product Category: ${hit.entry.leafCategory}`);
+          print('='.repeat(80));
+        }
+        return hit.entry.leafCategory;
+      }
+    }
+
     if (showStagePaths) {
-      console.log('\n🔍 CLASSIFICATION PROCESS VISUALIZATION');
-      console.log('='.repeat(80));
+      print('\n🔍 CLASSIFICATION PROCESS VISUALIZATION');
+      print('='.repeat(80));
 
       // Access the navigator's internal methods for stage display
       // Note: In a production system, you might want to expose these as public methods
       const navigatorAny = navigator as any;
 
       // First generate the AI summary
-      console.log('\n📝 GENERATING AI SUMMARY');
+      print('\n📝 GENERATING AI SUMMARY');
       const summary = await navigatorAny.generateProductSummary(productLine);
       // Wrap the summary nicely
-      const wrappedSummary = wrapText(summary, 70, '   ');
-      console.log(wrappedSummary);
-
-      // Stage 1: Get the AI's top 2 L1 taxonomy selections
-      console.log('\n📋 STAGE 1: Identifying Main Product Categories');
-      const allPaths = navigatorAny.allPaths;
-      const uniqueL1s = [...new Set(allPaths.filter((p: any) => p.isLeaf).map((p: any) => p.parts[0]))];
-      console.log(`   Goal: Pick 2 broad categories from all ${uniqueL1s.length} options`);
+      const wrappedSummary = wrapSummary(summary);
+      print(wrappedSummary);
+
+      // Stage 1: Get the AI's top 2 L1 taxonomy selections (all L1s for
+      // small taxonomies, as in classifyProduct)
+      const leafToPath: Map<string, { fullPath: string }> = navigatorAny.leafToPath;
+      let selectedL1s: string[];
+      if (navigatorAny.skipsStage1) {
+        selectedL1s = navigatorAny.l1Categories;
+        print('\n📋 STAGE 1: SKIPPED');
+        print(`   Reason: Small taxonomy, searching all ${selectedL1s.length} main categories`);
+      } else {
+        print('\n📋 STAGE 1: Identifying Main Product Categories');
+        print(`   Goal: Pick 2 broad categories from all ${navigator.l1CategoryCount} options`);
 
-      const selectedL1s = await navigatorAny.stage1SelectL1Categories(summary);
+        selectedL1s = await navigatorAny.stage1SelectL1Categories(summary);
 
-      console.log(`\n   ✅ AI Selected ${selectedL1s.length} Main Categories:`);
-      selectedL1s.forEach((l1: string, i: number) => {
-        console.log(`      ${i + 1}. ${l1}`);
-      });
+        print(`\n   ✅ AI Selected ${selectedL1s.length} Main Categories:`);
+        selectedL1s.forEach((l1: string, i: number) => {
+          print(`      ${i + 1}. ${l1}`);
+        });
+      }
 
       // Stage 2A: Show first leaf selection from chosen L1 taxonomies
-      console.log(`\n📋 STAGE 2A: Finding Specific Categories in '${selectedL1s[0] || 'None'}'`);
-      console.log('   Goal: Select specific product categories (up to 15 per batch)');
+      // (more than 2 L1s, after a skipped Stage 1, are searched as one list)
+      const firstSource = selectedL1s.length > 2 ? 'all main categories' : `'${selectedL1s[0] || 'None'}'`;
+      print(`\n📋 STAGE 2A: Finding Specific Categories in ${firstSource}`);
+      print('   Goal: Select specific product categories (up to 15 per batch)');
 
-      const selectedLeaves2A = await navigatorAny.stage2SelectLeaves(summary, selectedL1s, [], 'Stage 2A');
+      // Stage 2A and 2B are searched together (concurrently, sharing the last batch)
+      const [selectedLeaves2A, stage2bLeaves = []]: string[][] = await navigatorAny.stage2SelectLeaves(summary, selectedL1s);
 
       if (selectedLeaves2A.length > 0) {
-        console.log(`\n   ✅ Found ${selectedLeaves2A.length} Relevant Categories:`);
+        print(`\n   ✅ Found ${selectedLeaves2A.length} Relevant Categories:`);
         selectedLeaves2A.slice(0, 10).forEach((leaf: string, i: number) => {
-          console.log(`      ${i + 1}. ${leaf}`);
+          print(`      ${i + 1}. ${leaf}`);
         });
         if (selectedLeaves2A.length > 10) {
-          console.log(`      ... and ${selectedLeaves2A.length - 10} more`);
+          print(`      ... and ${selectedLeaves2A.length - 10} more`);
         }
       } else {
-        console.log(`\n   ⚠️ No specific categories found in '${selectedL1s[0]}' section`);
+        print(`\n   ⚠️ No specific categories found in ${firstSource}`);
       }
 
       // Stage 2B: Show second leaf selection (only if 2 L1s were selected)
       let selectedLeaves2B: string[] = [];
-      if (selectedL1s.length >= 2) {
-        console.log(`\n📋 STAGE 2B: Finding Specific Categories in '${selectedL1s[1]}'`);
-        console.log('   Goal: Select specific product categories (up to 15 per batch)');
+      if (selectedL1s.length === 2) {
+        print(`\n📋 STAGE 2B: Finding Specific Categories in '${selectedL1s[1]}'`);
+        print('   Goal: Select specific product categories (up to 15 per batch)');
 
-        selectedLeaves2B = await navigatorAny.stage2SelectLeaves(summary, selectedL1s.slice(1), selectedLeaves2A, 'Stage 2B');
+        selectedLeaves2B = stage2bLeaves;
 
         if (selectedLeaves2B.length > 0) {
-          console.log(`\n   ✅ Found ${selectedLeaves2B.length} Additional Categories:`);
+          print(`\n   ✅ Found ${selectedLeaves2B.length} Additional Categories:`);
           selectedLeaves2B.slice(0, 10).forEach((leaf: string, i: number) => {
-            console.log(`      ${i + 1}. ${leaf}`);
+            print(`      ${i + 1}. ${leaf}`);
           });
           if (selectedLeaves2B.length > 10) {
-            console.log(`      ... and ${selectedLeaves2B.length - 10} more`);
+            print(`      ... and ${selectedLeaves2B.length - 10} more`);
           }
         } else {
-          console.log(`\n   ⚠️ No specific categories found in '${selectedL1s[1]}' section`);
+          print(`\n   ⚠️ No specific categories found in '${selectedL1s[1]}' section`);
         }
       } else {
-        console.log('\n📋 STAGE 2B: SKIPPED');
-        console.log('   Reason: Only 1 main category was selected, no need to check a second');
+        print('\n📋 STAGE 2B: SKIPPED');
+        print(selectedL1s.length > 2
+          ? '   Reason: All main categories were searched in Stage 2A'
+          : '   Reason: Only 1 main category was selected, no need to check a second');
       }
 
       // Combine all Stage 2 results
@@ -405,50 +640,46 @@ async function classifyProductWithStageDisplay(
 
       // Stage 3 info
       if (allSelectedLeaves.length === 0) {
-        console.log('\n📋 STAGE 3: CANNOT PROCEED');
-        console.log('   Reason: No specific categories were found');
-        console.log('='.repeat(80));
+        print('\n📋 STAGE 3: CANNOT PROCEED');
+        print('   Reason: No specific categories were found');
+        print('='.repeat(80));
         return 'False';
       } else if (allSelectedLeaves.length === 1) {
-        console.log('\n📋 STAGE 3: SKIPPED - Using Single Result');
-        console.log('   Reason: Only 1 category found, no need to choose');
-        console.log(`   🎯 Final Category: ${allSelectedLeaves[0]}`);
-        console.log('='.repeat(80));
+        print('\n📋 STAGE 3: SKIPPED - Using Single Result');
+        print('   Reason: Only 1 category found, no need to choose');
+        print(`   🎯 Final Category: ${allSelectedLeaves[0]}`);
+        print('='.repeat(80));
         
         // Get the full path for this single result
-        const matchingPath = allPaths.find((p: any) => 
-          p.isLeaf && p.parts[p.parts.length - 1] === allSelectedLeaves[0]
-        );
+        const matchingPath = leafToPath.get(allSelectedLeaves[0]);
         if (matchingPath) {
-          console.log('\n🎯 FINAL CLASSIFICATION RESULT:');
-          console.log(`   Full Category Path: ${matchingPath.parts.join(' > ')}`);
-          console.log(`   Product Category: ${allSelectedLeaves[0]}`);
+          print('\n🎯 FINAL CLASSIFICATION RESULT:');
+          print(`   Full Category Path: ${matchingPath.fullPath}`);
+          print(`   Product Category: ${allSelectedLeaves[0]}`);
         }
-        return allSelectedLeaves[0];
+        return await remember(allSelectedLeaves[0], matchingPath ? matchingPath.fullPath : allSelectedLeaves[0]);
       } else {
-        console.log('\n📋 STAGE 3: Making Final Decision');
-        console.log(`   Goal: Choose the single best category from ${allSelectedLeaves.length} options`);
-        console.log('   Note: Using AI-generated summary for consistency across all stages');
+        print('\n📋 STAGE 3: Making Final Decision');
+        print(`   Goal: Choose the single best category from ${allSelectedLeaves.length} options`);
+        print('   Note: Using AI-generated summary for consistency across all stages');
 
         // Call stage 3 to make the final selection
         const bestIdx = await navigatorAny.stage3FinalSelection(summary, allSelectedLeaves);
         if (bestIdx >= 0) {
           const selectedLeaf = allSelectedLeaves[bestIdx];
-          console.log('\n🎯 FINAL CLASSIFICATION RESULT:');
+          print('\n🎯 FINAL CLASSIFICATION RESULT:');
           // Get the full path for the selected leaf
-          const matchingPath = allPaths.find((p: any) => 
-            p.isLeaf && p.parts[p.parts.length - 1] === selectedLeaf
-          );
+          const matchingPath = leafToPath.get(selectedLeaf);
           if (matchingPath) {
-            console.log(`   Full Category Path: ${matchingPath.parts.join(' > ')}`);
-            console.log(`   Product Category: ${selectedLeaf}`);
+            print(`   Full Category Path: ${matchingPath.fullPath}`);
+            print(`   Product Category: ${selectedLeaf}`);
           }
-          console.log('='.repeat(80));
-          return selectedLeaf;
+          print('='.repeat(80));
+          return await remember(selectedLeaf, matchingPath ? matchingPath.fullPath : selectedLeaf);
         } else {
-          console.log('\n❌ STAGE 3 FAILED');
-          console.log('   Reason: AI could not select from the options');
-          console.log('='.repeat(80));
+          print('\n❌ STAGE 3 FAILED');
+          print('   Reason: AI could not select from the options');
+          print('='.repeat(80));
           return 'False';
         }
       }
@@ -459,7 +690,7 @@ async function classifyProductWithStageDisplay(
       if (!result.success) {
         return 'False';
       } else {
-        return result.leafCategory;
+        return await remember(result.leafCategory, result.bestMatch, result.stageDetails);
       }
     }
   } catch (error) {
@@ -469,29 +700,122 @@ async function classifyProductWithStageDisplay(
 }
 
 /**
- * Wrap text to fit within a specified width
+ * Classify a chunk of products with shared (packed) API calls.
+ *
+ * Cached products are answered from the cache; the rest go through
+ * navigator.classifyProducts() together. With showStagePaths, each product's
+ * stage results are summarized from its stageDetails (the stages themselves
+ * run for the whole chunk at once).
+ *
+ * @returns The final leaf category (or 'False' / an error indicator) per product
+ */
+async function classifyProductChunk(
+  navigator: TaxonomyNavigator,
+  productLines: string[],
+  showStagePaths: boolean,
+  outputs: string[][],
+  cache?: ClassificationCache
+): Promise<string[]> {
+  const finalLeaves = new Array<string>(productLines.length).fill('False');
+
+  try {
+    // Answer what we can from the cache, pack the rest
+    const misses: number[] = [];
+    for (let i = 0; i < productLines.length; i++) {
+      const hit = cache ? await cache.get(productLines[i]) : null;
+      if (hit) {
+        if (showStagePaths) {
+          outputs[i].push(`\n♻️  CACHE HIT (${hit.matchType === 'exact' ? 'exact match' : `similar product, similarity ${hit.similarity.toFixed(3)}`})`);
+          outputs[i].push(`   Full Category Path: ${hit.entry.bestMatch}`);
+        }
+        finalLeaves[i] = hit.entry.leafCategory;
+      } else {
+        misses.push(i);
+      }
+    }
+
+    if (misses.length === 0) return finalLeaves;
+
+    const results = await navigator.classifyProducts(misses.map(i => productLines[i]));
+
+    for (let n = 0; n < misses.length; n++) {
+      const i = misses[n];
+      const result = results[n];
+      const details = result.stageDetails;
+
+      if (showStagePaths) {
+        outputs[i].push(`\n📦 PACKED CLASSIFICATION (${result.apiCalls} shared API calls)`);
+        if (details) {
+          outputs[i].push('\n📝 AI SUMMARY');
+          outputs[i].push(wrapSummary(details.aiSummary));
+          outputs[i].push(`\n📋 STAGE 1: ${details.stage1L1Categories.join(', ') || 'None'}`);
+          outputs[i].push(`📋 STAGE 2A: ${details.stage2aLeaves.length} categories`);
+          outputs[i].push(`📋 STAGE 2B: ${details.stage2bSkipped ? 'SKIPPED' : `${details.stage2bLeaves.length} categories`}`);
+          outputs[i].push(`📋 STAGE 3: ${details.stage3Skipped ? 'SKIPPED' : `chose from ${details.totalCandidates} options`}`);
+        }
+        outputs[i].push(result.success
+          ? `\n🎯 Full Category Path: ${result.bestMatch}`
+          : `\n❌ Classification failed: ${result.error}`);
+        outputs[i].push('='.repeat(80));
+      }
+
+      if (result.success) {
+        if (cache) {
+          await cache.set(productLines[i], {
+            leafCategory: result.leafCategory,
+            bestMatch: result.bestMatch,
+            stageDetails: details
+          });
+        }
+        finalLeaves[i] = result.leafCategory;
+      }
+    }
+  } catch (error) {
+    // Return error indicator for products not classified yet
+    const indicator = `Error: ${String(error).substring(0, 30)}...`;
+    return finalLeaves.map(leaf => (leaf === 'False' ? indicator : leaf));
+  }
+
+  return finalLeaves;
+}
+
+/**
+ * Wrap text to fit within a specified width.
+ *
+ * Every line (including the first) starts with `indent`, and words are never
+ * broken. Line lengths are tracked as numbers rather than by re-concatenating
+ * the current line for every word.
  */
 function wrapText(text: string, width: number, indent: string = ''): string {
-  const words = text.split(' ');
   const lines: string[] = [];
-  let currentLine = indent;
+  const maxContent = Math.max(1, width - indent.length);
+  let currentLine = '';
 
-  for (const word of words) {
-    if ((currentLine + word).length > width) {
-      lines.push(currentLine.trim());
-      currentLine = indent + word + ' ';
+  for (const word of text.split(/\s+/)) {
+    if (!word) continue;
+
+    if (currentLine && currentLine.length + 1 + word.length > maxContent) {
+      lines.push(indent + currentLine);
+      currentLine = word;
     } else {
-      currentLine += word + ' ';
+      currentLine = currentLine ? `${currentLine} ${word}` : word;
     }
   }
-  
-  if (currentLine.trim()) {
-    lines.push(currentLine.trim());
+
+  if (currentLine) {
+    lines.push(indent + currentLine);
   }
-  
+
   return lines.join('\n');
 }
 
+/**
+ * Wrap an AI summary for display (70 columns, indented under the stage heading)
+ */
+function wrapSummary(summary: string): string {
+  return wrapText(summary, SUMMARY_WRAP_WIDTH, SUMMARY_INDENT);
+}
+
 // Run if executed directly
 if (require.main === module) {
   runBatchTest().catch(console.error);
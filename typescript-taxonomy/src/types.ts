@@ -18,6 +18,8 @@
  * - Consistent naming conventions
  */
 
+import type OpenAI from 'openai';
+
 /**
  * Configuration interface for TaxonomyNavigator.
  * 
@@ -76,13 +78,27 @@ export interface TaxonomyNavigatorConfig {
    * decision to improve accuracy.
    */
   stage3Model?: string;
+
+  /**
+   * Let stage2Model make the Stage 3 decision for at most this many candidates.
+   * Default: 0 (always use stage3Model)
+   * 
+   * When Stage 2 leaves only a few candidates and all of them share one
+   * L2 category, the choice is usually clear-cut and the smaller model
+   * answers it faster and cheaper. If its answer is not a valid option
+   * number, the question is asked again with stage3Model.
+   * Only used by the single-product pipeline (classify).
+   */
+  stage3SmallModelMaxCandidates?: number;
   
   /**
    * Maximum retry attempts for failed API calls.
    * Default: 3
    * 
-   * Note: Basic version doesn't implement retries.
-   * This is for future robust version implementation.
+   * Only transient failures are retried (rate limits, timeouts, server
+   * and connection errors), with exponential backoff and random jitter.
+   * Other errors (e.g. an invalid API key) fail immediately.
+   * Set to 0 to disable retries.
    */
   maxRetries?: number;
   
@@ -98,21 +114,186 @@ export interface TaxonomyNavigatorConfig {
   /**
    * Rate limiting configuration.
    * 
-   * Controls API request frequency to respect OpenAI limits.
-   * Basic version has this commented out.
+   * Paces API requests to stay below your OpenAI limits instead of
+   * running into 429 errors (token buckets, see createRateLimiter).
+   * Limits are per navigator; unset or 0 means no limit.
+   * See: https://platform.openai.com/docs/guides/rate-limits
    */
   rateLimit?: {
     /**
-     * Maximum requests per second.
-     * Default: 1
-     * 
-     * Adjust based on your OpenAI tier limits.
-     * See: https://platform.openai.com/docs/guides/rate-limits
+     * Maximum requests per second (used when requestsPerMinute is not set).
+     * Default: unlimited
      */
     requestsPerSecond?: number;
+
+    /**
+     * Maximum requests per minute (your tier's RPM limit).
+     * Default: unlimited
+     */
+    requestsPerMinute?: number;
+
+    /**
+     * Maximum tokens per minute (your tier's TPM limit).
+     * Default: unlimited
+     * 
+     * Request sizes are estimated as prompt characters / 4 plus max_tokens,
+     * which is how OpenAI counts requests against this limit.
+     */
+    tokensPerMinute?: number;
+  };
+
+  /**
+   * Custom transport for chat completion requests.
+   * Default: null (requests go directly to the OpenAI API)
+   * 
+   * When set, every stage prompt is handed to this function instead of
+   * being sent immediately. Used by TaxonomyBatchRunner to collect the
+   * prompts of many products into OpenAI Batch API jobs.
+   */
+  completionHandler?: CompletionHandler | null;
+
+  /**
+   * Select the Stage 1 L1 categories by embedding similarity.
+   * Default: false
+   * 
+   * When enabled, the L1 category names are embedded once per navigator
+   * and each product summary is compared to them, replacing the Stage 1
+   * chat completion with a much cheaper embedding call. The chat prompt
+   * is still used when the shortlist is ambiguous
+   * (see stage1EmbeddingMargin).
+   */
+  stage1Embeddings?: boolean;
+
+  /**
+   * Minimum cosine similarity lead of the second L1 category over the
+   * third for the embedding shortlist to be trusted.
+   * Default: 0.02
+   * 
+   * Below this margin Stage 1 falls back to the chat prompt.
+   * Only used when stage1Embeddings is enabled.
+   */
+  stage1EmbeddingMargin?: number;
+
+  /**
+   * Maximum number of chat completion responses kept for reuse.
+   * Default: 10000 (0 disables the response cache)
+   * 
+   * With temperature 0, an identical request gets an identical answer, so
+   * the navigator can answer repeated requests from memory. This pays off
+   * even for different product lines as soon as their summaries match:
+   * every later stage prompt is then the same.
+   * Entries are keyed by a hash of the full request (model and prompt) and
+   * the least recently used ones are evicted first.
+   * For results that persist across runs, see ClassificationCache.
+   */
+  responseCacheSize?: number;
+
+  /**
+   * Maximum number of open connections to the OpenAI API.
+   * Default: 64
+   * 
+   * Connections are kept alive and reused across requests, so concurrent
+   * Stage 2 batches and bulk classification don't pay a TCP/TLS handshake
+   * per call. Requests beyond this limit wait for a free connection.
+   */
+  maxConnections?: number;
+
+  /**
+   * Constrain the Stage 2 and 3 answers with OpenAI Structured Outputs.
+   * Default: false
+   * 
+   * When enabled, these stages send a strict JSON schema, so the model can
+   * only answer with integers ({"picks": [3, 7]} / {"choice": 2}) instead
+   * of free text that has to be validated line by line.
+   */
+  structuredOutputs?: boolean;
+
+  /**
+   * Skip Stage 1 for taxonomies with at most this many leaf categories.
+   * Default: 0 (never skip)
+   * 
+   * For small (e.g. domain-specific) taxonomies, narrowing to 2 L1
+   * categories saves little in Stage 2 but still costs a full API round
+   * trip. At or below this size, Stage 2 searches the leaves of all L1
+   * categories instead (e.g. 200 = at most two Stage 2 batches).
+   * The packed pipeline (classifyProducts) only skips Stage 1 when the
+   * taxonomy has at most 2 L1 categories.
+   */
+  skipStage1MaxLeaves?: number;
+
+  /**
+   * Maximum number of Stage 2 batch calls of one classification in flight
+   * at the same time.
+   * Default: 20
+   * 
+   * The batches are independent and network-bound, so a product's Stage 2
+   * takes about one round trip as long as its batches fit in this limit.
+   * The bound keeps very large taxonomies from bursting past rate limits.
+   */
+  maxConcurrentBatches?: number;
+
+  /**
+   * Maximum number of products sent in one packed prompt by
+   * classifyProducts(). Larger inputs are split into chunks of this size.
+   * Default: 20
+   * 
+   * Packing cuts the request count (the usual bottleneck under load) by
+   * about this factor, but the model has to keep more products apart in
+   * one context as it grows.
+   */
+  maxPackedProducts?: number;
+
+  /**
+   * OpenAI client to use for all API calls.
+   * Default: null (a client shared by all navigators with the same API key
+   * and maxConnections)
+   * 
+   * Sharing one client shares its pool of keep-alive connections, so
+   * several navigators in one process don't each open their own.
+   */
+  client?: OpenAI | null;
+}
+
+/**
+ * A single chat completion request made by a classification stage.
+ * Mirrors the body of OpenAI's /v1/chat/completions endpoint.
+ */
+export interface CompletionRequest {
+  /** Model to use (e.g., 'gpt-4.1-nano') */
+  model: string;
+
+  /** System message followed by the stage prompt */
+  messages: { role: 'system' | 'user'; content: string }[];
+
+  /** Always 0 for deterministic results */
+  temperature: number;
+
+  /** Always 0 for deterministic results */
+  top_p: number;
+
+  /** Maximum response length */
+  max_tokens: number;
+
+  /** Strict JSON schema for the answer (only with structuredOutputs) */
+  response_format?: {
+    type: 'json_schema';
+    json_schema: { name: string; strict: boolean; schema: Record<string, unknown> };
   };
 }
 
+/**
+ * Sends a completion request and resolves with the response text.
+ */
+export type CompletionHandler = (request: CompletionRequest) => Promise<string>;
+
+/**
+ * Receives progress while a product is classified.
+ * 
+ * @param stage - Finished stage ('Stage 0', 'Stage 1', 'Stage 2A', 'Stage 2B', 'Stage 3')
+ * @param info - Short description of the stage result (summary, L1s, candidate count, selection)
+ */
+export type StageProgressCallback = (stage: string, info: string) => void;
+
 /**
  * Represents a node in the taxonomy hierarchy tree.
  * 
@@ -162,7 +343,7 @@ export interface TaxonomyNode {
  */
 export interface TaxonomyPath {
   /**
-   * The complete path as it appears in the taxonomy file.
+   * The complete path, i.e. parts joined with " > ".
    * Example: "Electronics > Video > Televisions"
    */
   fullPath: string;
@@ -202,7 +383,7 @@ export interface ClassificationResult {
   /** Leaf category name only (e.g., "Laptops") */
   leafCategory: string;
   
-  /** Time taken in milliseconds */
+  /** Time taken in milliseconds (measured with the monotonic clock) */
   processingTime: number;
   
   /** Number of OpenAI API calls made */
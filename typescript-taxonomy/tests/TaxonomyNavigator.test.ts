@@ -20,6 +20,7 @@
  */
 
 import { TaxonomyNavigator } from '../src/TaxonomyNavigator';
+import OpenAI, { APIConnectionTimeoutError } from 'openai';
 import { TaxonomyNavigatorConfig } from '../src/types';
 import * as fs from 'fs';
 
@@ -35,8 +36,13 @@ import * as fs from 'fs';
  * return different responses based on the input prompts.
  */
 jest.mock('openai', () => {
+  // The real error classes, so retries can be tested with SDK errors
+  const { APIConnectionError, APIConnectionTimeoutError } = jest.requireActual('openai');
   return {
-    OpenAI: jest.fn().mockImplementation(() => ({
+    __esModule: true,
+    APIConnectionError,
+    APIConnectionTimeoutError,
+    default: jest.fn().mockImplementation(() => ({
       chat: {
         completions: {
           create: jest.fn().mockResolvedValue({
@@ -63,6 +69,13 @@ jest.mock('openai', () => {
 describe('TaxonomyNavigator', () => {
   // Shared test instance
   let navigator: TaxonomyNavigator;
+
+  /**
+   * Wraps a chat.completions.create mock as an OpenAI client.
+   * Only the chat completions endpoint is provided; other endpoints fail loudly.
+   */
+  const chatClient = (create: jest.Mock): OpenAI =>
+    ({ chat: { completions: { create } } }) as unknown as OpenAI;
   
   /**
    * Mock taxonomy data representing a minimal taxonomy structure.
@@ -80,7 +93,9 @@ Home & Garden > Kitchen & Dining > Kitchen Appliances > Blenders`;
    * Setup before each test:
    * - Mock file system to return our test taxonomy data
    * - Mock file existence checks to return true
-   * - This ensures consistent test environment
+   * - The mock taxonomy is parsed once and then reused from the shared
+   *   taxonomy cache; tests with their own taxonomy data pass their own
+   *   taxonomyFile name, so they never replace the shared entry
    */
   beforeEach(() => {
     // Mock file system for taxonomy file
@@ -113,6 +128,7 @@ Home & Garden > Kitchen & Dining > Kitchen Appliances > Blenders`;
      * using all default configuration values.
      */
     it('should initialize with default configuration', () => {
+      jest.spyOn(console, 'log').mockImplementation(() => undefined); // default config logs its setup
       navigator = new TaxonomyNavigator();
       expect(navigator).toBeDefined();
     });
@@ -136,6 +152,39 @@ Home & Garden > Kitchen & Dining > Kitchen Appliances > Blenders`;
       expect(navigator).toBeDefined();
     });
 
+    /**
+     * Test: Connection pooling
+     * 
+     * Verifies that the OpenAI client gets a keep-alive agent bounded by
+     * maxConnections, so API calls reuse connections.
+     */
+    it('should create the OpenAI client with a keep-alive connection pool', () => {
+      new TaxonomyNavigator({ apiKey: 'test-key', enableLogging: false, maxConnections: 16 });
+
+      const calls = (OpenAI as unknown as jest.Mock).mock.calls;
+      const options = calls[calls.length - 1][0];
+      expect(options.httpAgent.keepAlive).toBe(true);
+      expect(options.httpAgent.maxSockets).toBe(16);
+    });
+
+    /**
+     * Test: Shared OpenAI client
+     * 
+     * Verifies that navigators with the same API key reuse one client
+     * (and its connection pool) unless a client is passed in.
+     */
+    it('should share one OpenAI client per API key', () => {
+      const first = new TaxonomyNavigator({ apiKey: 'shared-key', enableLogging: false });
+      const second = new TaxonomyNavigator({ apiKey: 'shared-key', enableLogging: false });
+      const other = new TaxonomyNavigator({ apiKey: 'other-key', enableLogging: false });
+      const client = {} as OpenAI;
+      const custom = new TaxonomyNavigator({ apiKey: 'shared-key', enableLogging: false, client });
+
+      expect(first['openai']).toBe(second['openai']);
+      expect(other['openai']).not.toBe(first['openai']);
+      expect(custom['openai']).toBe(client);
+    });
+
     /**
      * Test: Missing taxonomy file
      * 
@@ -149,6 +198,32 @@ Home & Garden > Kitchen & Dining > Kitchen Appliances > Blenders`;
       // Expect constructor to throw with specific message
       expect(() => new TaxonomyNavigator()).toThrow('Taxonomy file not found');
     });
+
+    /**
+     * Test: Leaf detection
+     * 
+     * Verifies that a path is a leaf exactly when no other path extends it,
+     * including intermediate categories listed after their children.
+     */
+    it('should mark only paths without children as leaves', () => {
+      jest.spyOn(fs, 'readFileSync').mockReturnValue(`# Google_Product_Taxonomy_Version: test
+Electronics
+Electronics > Video
+Electronics > Video > Televisions
+Electronics > Audio
+Home & Garden > Kitchen & Dining > Blenders
+Home & Garden`);
+      navigator = new TaxonomyNavigator({ taxonomyFile: 'leaf-detection.txt', enableLogging: false });
+
+      const leaves = navigator['allPaths'].filter(p => p.isLeaf).map(p => p.fullPath);
+      expect(leaves).toEqual([
+        'Electronics > Video > Televisions',
+        'Electronics > Audio',
+        'Home & Garden > Kitchen & Dining > Blenders'
+      ]);
+      expect(navigator.leafCategoryCount).toBe(3);
+      expect(navigator.l1CategoryCount).toBe(2);
+    });
   });
 
   /**
@@ -184,11 +259,9 @@ Home & Garden > Kitchen & Dining > Kitchen Appliances > Blenders`;
       const result = await navigator.classifyProduct('iPhone 14: Smartphone');
       
       // Verify all required fields are present
-      expect(result).toHaveProperty('success');
-      expect(result).toHaveProperty('bestMatch');
-      expect(result).toHaveProperty('leafCategory');
-      expect(result).toHaveProperty('processingTime');
-      expect(result).toHaveProperty('apiCalls');
+      expect(Object.keys(result)).toEqual(expect.arrayContaining([
+        'success', 'bestMatch', 'leafCategory', 'processingTime', 'apiCalls'
+      ]));
     });
 
     /**
@@ -231,6 +304,775 @@ Home & Garden > Kitchen & Dining > Kitchen Appliances > Blenders`;
       // Processing time should be positive number
       expect(result.processingTime).toBeGreaterThan(0);
     });
+
+    /**
+     * Test: Concurrent Stage 2 batches
+     * 
+     * Verifies that all Stage 2 batches of both selected L1 categories are
+     * in flight at the same time, and that the result still combines them
+     * in list order. Each L1 has 150 leaves: one full batch each, plus the
+     * two 50-leaf tails sent together as one shared batch.
+     */
+    it('should send the Stage 2 batches of both L1 categories concurrently', async () => {
+      const leaves = (l1: string) => Array.from({ length: 150 }, (_, i) => `${l1} > Leaf ${l1[0]}${i + 1}`);
+      jest.spyOn(fs, 'readFileSync').mockReturnValue(
+        ['# Google_Product_Taxonomy_Version: test', ...leaves('Electronics'), ...leaves('Home & Garden')].join('\n')
+      );
+
+      let inFlight = 0;
+      let maxInFlight = 0;
+      const stage2Prompts: string[] = [];
+      navigator = new TaxonomyNavigator({
+        enableLogging: false,
+        taxonomyFile: 'concurrent-batches.txt',
+        apiKey: 'test-key',
+        completionHandler: async ({ messages }) => {
+          const prompt = messages[1].content;
+          if (prompt.startsWith('Summarize')) return 'Smartphone';
+          if (prompt.startsWith('Select exactly 2')) return 'Electronics\nHome & Garden';
+          if (!prompt.startsWith('Select up to')) return '1';
+
+          stage2Prompts.push(prompt);
+          inFlight++;
+          maxInFlight = Math.max(maxInFlight, inFlight);
+          await new Promise(resolve => setTimeout(resolve, 5));
+          inFlight--;
+          // Shared batch: 1-50 are Electronics 101-150, 51-100 Home & Garden 101-150
+          return prompt.includes('last batches') ? '1\n51' : prompt.includes('. Leaf E') ? '1' : '100';
+        }
+      });
+
+      const result = await navigator.classifyProduct('iPhone 14: Smartphone');
+
+      expect(maxInFlight).toBe(3);
+      expect(stage2Prompts).toHaveLength(3);
+      expect(result.success).toBe(true);
+      expect(result.stageDetails?.stage2aLeaves).toEqual(['Leaf E1', 'Leaf E101']);
+      expect(result.stageDetails?.stage2bLeaves).toEqual(['Leaf H100', 'Leaf H101']);
+    });
+
+    /**
+     * Test: Bounded Stage 2 concurrency
+     * 
+     * Verifies that maxConcurrentBatches caps the Stage 2 calls of one
+     * product that are in flight at once. Both L1s have 250 leaves: two
+     * full batches each, plus two 50-leaf tails sent as one shared batch.
+     */
+    it('should keep at most maxConcurrentBatches Stage 2 calls in flight', async () => {
+      const leaves = (l1: string) => Array.from({ length: 250 }, (_, i) => `${l1} > Leaf ${l1[0]}${i + 1}`);
+      jest.spyOn(fs, 'readFileSync').mockReturnValue(
+        ['# Google_Product_Taxonomy_Version: test', ...leaves('Electronics'), ...leaves('Home & Garden')].join('\n')
+      );
+
+      let inFlight = 0;
+      let maxInFlight = 0;
+      let stage2Calls = 0;
+      navigator = new TaxonomyNavigator({
+        enableLogging: false,
+        taxonomyFile: 'bounded-batches.txt',
+        apiKey: 'test-key',
+        maxConcurrentBatches: 2,
+        completionHandler: async ({ messages }) => {
+          const prompt = messages[1].content;
+          if (prompt.startsWith('Summarize')) return 'Smartphone';
+          if (prompt.startsWith('Select exactly 2')) return 'Electronics\nHome & Garden';
+          if (!prompt.startsWith('Select up to')) return '1';
+
+          stage2Calls++;
+          inFlight++;
+          maxInFlight = Math.max(maxInFlight, inFlight);
+          await new Promise(resolve => setTimeout(resolve, 5));
+          inFlight--;
+          return 'NONE';
+        }
+      });
+
+      await navigator.classifyProduct('iPhone 14: Smartphone');
+
+      expect(stage2Calls).toBe(5);
+      expect(maxInFlight).toBe(2);
+    });
+
+    /**
+     * Test: Packed Stage 2A/2B in one round
+     * 
+     * Verifies that classifyProducts() sends Stage 2A and 2B together, so a
+     * product's second L1 shares the batch call of another product's first
+     * L1, and that 2A's leaves are still removed from 2B.
+     */
+    it('should run packed Stage 2A and 2B as one round', async () => {
+      const stage2Prompts: string[] = [];
+      navigator = new TaxonomyNavigator({
+        enableLogging: false,
+        apiKey: 'test-key',
+        completionHandler: async ({ messages }) => {
+          const prompt = messages[1].content;
+          if (prompt.startsWith('Summarize')) {
+            return JSON.stringify([{ product: 1, summary: 'Laptop computer' }, { product: 2, summary: 'Kitchen blender' }]);
+          }
+          if (prompt.startsWith('For EACH product listed at the end, select exactly 2')) {
+            return JSON.stringify([
+              { product: 1, categories: ['Electronics', 'Home & Garden'] },
+              { product: 2, categories: ['Home & Garden', 'Electronics'] }
+            ]);
+          }
+          if (prompt.startsWith('For EACH product listed at the end, select up to')) {
+            stage2Prompts.push(prompt);
+            // Electronics: only the laptop matches; Home & Garden: both pick Blenders
+            return prompt.includes('1. Laptops')
+              ? JSON.stringify([{ product: 1, categories: [1] }, { product: 2, categories: [] }])
+              : JSON.stringify([{ product: 1, categories: [1] }, { product: 2, categories: [1] }]);
+          }
+          return JSON.stringify([{ product: 1, selection: 1 }]);
+        }
+      });
+
+      const results = await navigator.classifyProducts(['MacBook Air', 'Vitamix 5200']);
+
+      expect(stage2Prompts).toHaveLength(2);
+      expect(results.map(r => r.leafCategory)).toEqual(['Laptops', 'Blenders']);
+      expect(results[0].stageDetails?.stage2bLeaves).toEqual(['Blenders']);
+      expect(results[1].stageDetails?.stage2aLeaves).toEqual(['Blenders']);
+      expect(results[1].stageDetails?.stage2bLeaves).toEqual([]);
+    });
+
+    /**
+     * Test: Packed chunk size
+     * 
+     * Verifies that classifyProducts() splits its input into chunks of at
+     * most maxPackedProducts: three products with a limit of 2 make one
+     * packed chunk and one single-product classification.
+     */
+    it('should pack at most maxPackedProducts products per prompt', async () => {
+      const summaryPrompts: string[] = [];
+      navigator = new TaxonomyNavigator({
+        enableLogging: false,
+        apiKey: 'test-key',
+        maxPackedProducts: 2,
+        completionHandler: async ({ messages }) => {
+          const prompt = messages[1].content;
+          if (prompt.startsWith('Summarize')) summaryPrompts.push(prompt);
+          return 'NONE';
+        }
+      });
+
+      const results = await navigator.classifyProducts(['MacBook Air', 'Vitamix 5200', 'Nike Air Max']);
+
+      expect(results).toHaveLength(3);
+      expect(summaryPrompts).toHaveLength(2);
+      expect(summaryPrompts.filter(prompt => prompt.startsWith('Summarize EACH'))).toHaveLength(1);
+      expect(summaryPrompts.some(prompt => prompt.includes('Nike Air Max') && !prompt.includes('MacBook Air'))).toBe(true);
+    });
+
+    /**
+     * Test: Shared last batch
+     * 
+     * Verifies that small L1 categories are searched with a single Stage 2
+     * call and that each selection is attributed to its own L1.
+     */
+    it('should send the last batches of both L1 categories together', async () => {
+      const stage2Prompts: string[] = [];
+      navigator = new TaxonomyNavigator({
+        enableLogging: false,
+        apiKey: 'test-key',
+        completionHandler: async ({ messages }) => {
+          const prompt = messages[1].content;
+          if (prompt.startsWith('Summarize')) return 'Smartphone';
+          if (prompt.startsWith('Select exactly 2')) return 'Electronics\nHome & Garden';
+          if (prompt.startsWith('Select up to')) stage2Prompts.push(prompt);
+          return prompt.startsWith('Select up to') ? '1\n2' : '1';
+        }
+      });
+
+      const result = await navigator.classifyProduct('iPhone 14: Smartphone');
+
+      expect(stage2Prompts).toHaveLength(1);
+      expect(stage2Prompts[0]).toContain('Select up to 30 categories');
+      expect(result.stageDetails?.stage2aLeaves).toEqual(['Laptops']);
+      expect(result.stageDetails?.stage2bLeaves).toEqual(['Blenders']);
+    });
+
+    /**
+     * Test: Compact, cache-friendly Stage 2 prompts
+     * 
+     * Verifies that Stage 2 lists bare leaf names (no L1 or path prefix) and
+     * that two different products get byte-identical prompts up to the
+     * trailing product line, so OpenAI can reuse the cached prefix.
+     */
+    it('should build Stage 2 prompts with a shared prefix and bare leaf names', async () => {
+      const stage2Prompts: string[] = [];
+      navigator = new TaxonomyNavigator({
+        enableLogging: false,
+        apiKey: 'test-key',
+        completionHandler: async ({ messages }) => {
+          const prompt = messages[1].content;
+          if (prompt.startsWith('Summarize')) return prompt.includes('Blender') ? 'Blender' : 'Laptop';
+          if (prompt.startsWith('Select exactly 2')) return 'Electronics';
+          if (prompt.startsWith('Select up to')) stage2Prompts.push(prompt);
+          return '1';
+        }
+      });
+
+      await navigator.classifyProduct('Blender');
+      await navigator.classifyProduct('Laptop');
+
+      const [blender, laptop] = stage2Prompts.map(prompt => prompt.split('\nProduct: '));
+      expect(blender[0]).toBe(laptop[0]);
+      expect([blender[1], laptop[1]]).toEqual(['Blender', 'Laptop']);
+      expect(blender[0]).toContain('\n1. Laptops\n');
+      expect(blender[0]).not.toContain('Electronics >');
+    });
+
+    /**
+     * Test: Streamed Stage 3
+     * 
+     * Verifies that Stage 3 streams its answer and closes the stream as
+     * soon as the number is complete, ignoring any further tokens.
+     */
+    it('should stop reading the Stage 3 stream once the number is complete', async () => {
+      const received: string[] = [];
+      let streamedMaxTokens = 0;
+      const abort = jest.fn();
+      const create = jest.fn(async (request: { stream?: boolean; max_tokens: number; messages: { content: string }[] }) => {
+        const prompt = request.messages[1].content;
+        if (request.stream && prompt.startsWith('Select up to')) {
+          // Stage 2 streams too; two picks end the stream on their own
+          return {
+            controller: { abort },
+            async *[Symbol.asyncIterator]() {
+              yield { choices: [{ delta: { content: '1\n2' } }] };
+            }
+          };
+        }
+        if (request.stream) {
+          streamedMaxTokens = request.max_tokens;
+          return {
+            controller: { abort },
+            async *[Symbol.asyncIterator]() {
+              for (const content of ['2', '\n', 'Because blenders...']) {
+                received.push(content);
+                yield { choices: [{ delta: { content } }] };
+              }
+            }
+          };
+        }
+        const content = prompt.startsWith('Summarize') ? 'Blender' : 'Electronics\nHome & Garden';
+        return { choices: [{ message: { content } }] };
+      });
+      navigator = new TaxonomyNavigator({
+        enableLogging: false,
+        apiKey: 'test-key',
+        client: chatClient(create)
+      });
+
+      const result = await navigator.classifyProduct('Vitamix blender');
+
+      expect(result.leafCategory).toBe('Blenders');
+      expect(received).toEqual(['2', '\n']);
+      expect(abort).toHaveBeenCalledTimes(1);
+      expect(streamedMaxTokens).toBe(5);
+    });
+
+    /**
+     * Test: Streamed Stage 2
+     * 
+     * Verifies that a Stage 2 answer is cut off once it holds as many lines
+     * as the batch allows selections: the shared last batch of both L1s
+     * allows 30, so the 31st line (which would add Blenders) is never read.
+     */
+    it('should stop reading a Stage 2 stream after the maximum number of selections', async () => {
+      const received: string[] = [];
+      const abort = jest.fn();
+      const create = jest.fn(async (request: { stream?: boolean; messages: { content: string }[] }) => {
+        const prompt = request.messages[1].content;
+        if (request.stream) {
+          return {
+            controller: { abort },
+            async *[Symbol.asyncIterator]() {
+              for (const content of [...Array(30).fill('1\n'), '2\n']) {
+                received.push(content);
+                yield { choices: [{ delta: { content } }] };
+              }
+            }
+          };
+        }
+        const content = prompt.startsWith('Summarize') ? 'Laptop' : 'Electronics\nHome & Garden';
+        return { choices: [{ message: { content } }] };
+      });
+      navigator = new TaxonomyNavigator({
+        enableLogging: false,
+        apiKey: 'test-key',
+        client: chatClient(create)
+      });
+
+      const result = await navigator.classifyProduct('MacBook Air');
+
+      expect(received).toHaveLength(30);
+      expect(abort).toHaveBeenCalledTimes(1);
+      expect(result.leafCategory).toBe('Laptops');
+      expect(result.stageDetails?.stage2bLeaves).toEqual([]);
+    });
+
+    /**
+     * Test: Structured Outputs
+     * 
+     * Verifies that Stages 2 and 3 send their JSON schemas when
+     * structuredOutputs is enabled and read the JSON answers.
+     */
+    it('should request and parse structured answers in Stages 2 and 3', async () => {
+      const schemas: string[] = [];
+      navigator = new TaxonomyNavigator({
+        enableLogging: false,
+        apiKey: 'test-key',
+        structuredOutputs: true,
+        completionHandler: async ({ messages, response_format }) => {
+          const prompt = messages[1].content;
+          if (response_format) schemas.push(response_format.json_schema.name);
+          if (prompt.startsWith('Summarize')) return 'Blender';
+          if (prompt.startsWith('Select exactly 2')) return 'Electronics\nHome & Garden';
+          if (prompt.startsWith('Select up to')) return '{"picks": [1, 2, 99]}';
+          return '{"choice": 2}';
+        }
+      });
+
+      const result = await navigator.classifyProduct('Vitamix blender');
+
+      expect(schemas).toEqual(['category_selection', 'final_selection']);
+      expect(result.stageDetails?.stage2aLeaves).toEqual(['Laptops']);
+      expect(result.stageDetails?.stage2bLeaves).toEqual(['Blenders']);
+      expect(result.leafCategory).toBe('Blenders');
+    });
+
+    /**
+     * Test: Same leaf from both L1 categories
+     * 
+     * A leaf name found under both selected L1s counts as one candidate,
+     * so Stage 3 is skipped instead of choosing between two equal options.
+     */
+    it('should skip Stage 3 when 2A and 2B find the same leaf', async () => {
+      jest.spyOn(fs, 'readFileSync').mockReturnValue(
+        ['# Google_Product_Taxonomy_Version: test', 'Electronics > Computers > Laptops', 'Office Supplies > Laptops'].join('\n')
+      );
+
+      const prompts: string[] = [];
+      navigator = new TaxonomyNavigator({
+        enableLogging: false,
+        taxonomyFile: 'duplicate-leaf.txt',
+        apiKey: 'test-key',
+        completionHandler: async ({ messages }) => {
+          const prompt = messages[1].content;
+          prompts.push(prompt);
+          if (prompt.startsWith('Summarize')) return 'Laptop';
+          if (prompt.startsWith('Select exactly 2')) return 'Electronics\nOffice Supplies';
+          return '1\n2';
+        }
+      });
+
+      const result = await navigator.classifyProduct('MacBook Air');
+
+      expect(result.bestMatch).toBe('Electronics > Computers > Laptops');
+      expect(result.stageDetails?.stage3Skipped).toBe(true);
+      expect(prompts).toHaveLength(3);
+    });
+
+    /**
+     * Test: Smaller model for clear-cut Stage 3 choices
+     * 
+     * Two candidates under the same L2 category are asked of stage2Model
+     * first; its invalid answer falls back to stage3Model.
+     */
+    it('should ask stage2Model first when few Stage 3 candidates share an L2', async () => {
+      jest.spyOn(fs, 'readFileSync').mockReturnValue(
+        ['# Google_Product_Taxonomy_Version: test', 'Electronics > Computers > Laptops', 'Electronics > Computers > Desktops', 'Home & Garden > Blenders'].join('\n')
+      );
+
+      const stage3Models: string[] = [];
+      navigator = new TaxonomyNavigator({
+        enableLogging: false,
+        taxonomyFile: 'shared-l2.txt',
+        apiKey: 'test-key',
+        stage3SmallModelMaxCandidates: 3,
+        completionHandler: async ({ model, messages }) => {
+          const prompt = messages[1].content;
+          if (prompt.startsWith('Summarize')) return 'Desktop computer';
+          if (prompt.startsWith('Select exactly 2')) return 'Electronics\nHome & Garden';
+          if (prompt.startsWith('Select up to')) return '1\n2';
+          stage3Models.push(model);
+          return stage3Models.length === 1 ? 'not sure' : '2';
+        }
+      });
+
+      const result = await navigator.classifyProduct('Dell OptiPlex');
+
+      expect(result.bestMatch).toBe('Electronics > Computers > Desktops');
+      expect(stage3Models).toEqual(['gpt-4.1-nano', 'gpt-4.1-mini']);
+    });
+
+    /**
+     * Test: Stage 2 answer parsing
+     * 
+     * Only the number leading each line counts as a selection, so an
+     * option echoed with its name is accepted and numbers inside the
+     * model's remarks are ignored.
+     */
+    it('should read only the leading number of each Stage 2 answer line', async () => {
+      navigator = new TaxonomyNavigator({
+        enableLogging: false,
+        apiKey: 'test-key',
+        completionHandler: async ({ messages }) => {
+          const prompt = messages[1].content;
+          if (prompt.startsWith('Summarize')) return 'Running shoe';
+          if (prompt.startsWith('Select exactly 2')) return 'Apparel & Accessories\nElectronics';
+          const shoes = /(\d+)\. Athletic Shoes/.exec(prompt)![1];
+          return ` ${shoes}. Athletic Shoes\nOption 1 and 3 don't fit\n`;
+        }
+      });
+
+      const result = await navigator.classifyProduct('Nike Pegasus 40');
+
+      expect(result.bestMatch).toBe('Apparel & Accessories > Shoes > Athletic Shoes');
+      expect(result.stageDetails?.stage3Skipped).toBe(true);
+    });
+
+    /**
+     * Test: Stage 1 answer validation
+     * 
+     * Verifies that L1 names differing only in case or spacing are mapped to
+     * the taxonomy spelling, and that a repeated L1 doesn't take the place
+     * of the second one.
+     */
+    it('should match Stage 1 answers regardless of case and repeats', async () => {
+      navigator = new TaxonomyNavigator({
+        enableLogging: false,
+        apiKey: 'test-key',
+        completionHandler: async ({ messages }) => {
+          const prompt = messages[1].content;
+          if (prompt.startsWith('Summarize')) return 'Blender';
+          if (prompt.startsWith('Select exactly 2')) return 'home  & garden\nHome & Garden\nELECTRONICS';
+          return '1';
+        }
+      });
+
+      const result = await navigator.classifyProduct('Vitamix 5200');
+
+      expect(result.stageDetails?.stage1L1Categories).toEqual(['Home & Garden', 'Electronics']);
+    });
+
+    /**
+     * Test: Skipping Stage 1 for small taxonomies
+     * 
+     * The 3-leaf mock taxonomy fits in one Stage 2 batch, so with
+     * skipStage1MaxLeaves every L1 is searched at once and no Stage 1
+     * prompt is sent.
+     */
+    it('should skip Stage 1 and search all L1 categories for small taxonomies', async () => {
+      const prompts: string[] = [];
+      navigator = new TaxonomyNavigator({
+        enableLogging: false,
+        apiKey: 'test-key',
+        skipStage1MaxLeaves: 200,
+        completionHandler: async ({ messages }) => {
+          const prompt = messages[1].content;
+          prompts.push(prompt);
+          if (prompt.startsWith('Summarize')) return 'Running shoes';
+          return prompt.startsWith('Select up to') ? '2' : '1';
+        }
+      });
+
+      const result = await navigator.classifyProduct('Nike Air Max');
+
+      expect(prompts.some(prompt => prompt.startsWith('Select exactly 2'))).toBe(false);
+      expect(result.stageDetails?.stage1L1Categories).toEqual(['Electronics', 'Apparel & Accessories', 'Home & Garden']);
+      expect(result.leafCategory).toBe('Athletic Shoes');
+      expect(result.apiCalls).toBe(2);
+    });
+
+    /**
+     * Test: Skipping Stage 1 in packed mode
+     * 
+     * classifyProducts() follows classifyProduct() on small taxonomies: no
+     * Stage 1 prompt, one Stage 2A list over all L1 categories, no 2B.
+     */
+    it('should skip packed Stage 1 and search all L1 categories for small taxonomies', async () => {
+      const prompts: string[] = [];
+      navigator = new TaxonomyNavigator({
+        enableLogging: false,
+        apiKey: 'test-key',
+        skipStage1MaxLeaves: 200,
+        completionHandler: async ({ messages }) => {
+          const prompt = messages[1].content;
+          prompts.push(prompt);
+          if (prompt.startsWith('Summarize')) {
+            return JSON.stringify([{ product: 1, summary: 'Running shoes' }, { product: 2, summary: 'Kitchen blender' }]);
+          }
+          return JSON.stringify([{ product: 1, categories: [2] }, { product: 2, categories: [3] }]);
+        }
+      });
+
+      const results = await navigator.classifyProducts(['Nike Air Max', 'Vitamix 5200']);
+
+      expect(prompts.some(prompt => prompt.includes('select exactly 2'))).toBe(false);
+      expect(prompts.filter(prompt => prompt.startsWith('For EACH product listed at the end, select up to'))).toHaveLength(1);
+      expect(results.map(r => r.leafCategory)).toEqual(['Athletic Shoes', 'Blenders']);
+      expect(results[0].stageDetails?.stage1L1Categories).toEqual(['Electronics', 'Apparel & Accessories', 'Home & Garden']);
+      expect(results.every(r => r.stageDetails?.stage2bSkipped)).toBe(true);
+    });
+
+    /**
+     * Test: Concurrent bulk classification
+     * 
+     * Verifies that classifyProductsConcurrently overlaps products up to the
+     * concurrency limit, keeps input order, and counts API calls per product
+     * even though the products share one navigator.
+     */
+    it('should classify products concurrently with per-product API call counts', async () => {
+      let inFlight = 0;
+      let maxInFlight = 0;
+      navigator = new TaxonomyNavigator({
+        enableLogging: false,
+        apiKey: 'test-key',
+        responseCacheSize: 0, // Same summaries: every product makes its own calls
+        completionHandler: async ({ messages }) => {
+          const prompt = messages[1].content;
+          inFlight++;
+          maxInFlight = Math.max(maxInFlight, inFlight);
+          await new Promise(resolve => setTimeout(resolve, 5));
+          inFlight--;
+          if (prompt.startsWith('Summarize')) return prompt.includes('Blender') ? 'Blender' : 'Laptop';
+          if (prompt.startsWith('Select exactly 2')) return prompt.endsWith('Blender') ? 'Home & Garden' : 'Electronics';
+          return '1';
+        }
+      });
+
+      const results = await navigator.classifyProductsConcurrently(['Blender', 'Laptop', 'Vitamix Blender', 'Dell Laptop'], 2);
+
+      expect(maxInFlight).toBe(2);
+      expect(results.map(r => r.leafCategory)).toEqual(['Blenders', 'Laptops', 'Blenders', 'Laptops']);
+      // Summary, Stage 1 and one Stage 2A batch per product
+      expect(results.map(r => r.apiCalls)).toEqual([3, 3, 3, 3]);
+    });
+
+    /**
+     * Test: Duplicate products in bulk classification
+     * 
+     * Verifies that inputs differing only in case or spacing are classified
+     * once and that the repeats reuse the result without API calls.
+     */
+    it('should classify duplicate products only once', async () => {
+      const summaryPrompts: string[] = [];
+      navigator = new TaxonomyNavigator({
+        enableLogging: false,
+        apiKey: 'test-key',
+        completionHandler: async ({ messages }) => {
+          const prompt = messages[1].content;
+          if (prompt.startsWith('Summarize')) {
+            summaryPrompts.push(prompt);
+            return prompt.includes('Blender') ? 'Blender' : 'Laptop';
+          }
+          if (prompt.startsWith('Select exactly 2')) return prompt.endsWith('Blender') ? 'Home & Garden' : 'Electronics';
+          return '1';
+        }
+      });
+
+      const results = await navigator.classifyProductsConcurrently(['Blender', 'Laptop', ' blender ', 'Blender']);
+
+      expect(summaryPrompts).toHaveLength(2);
+      expect(results.map(r => r.leafCategory)).toEqual(['Blenders', 'Laptops', 'Blenders', 'Blenders']);
+      expect(results.map(r => r.apiCalls)).toEqual([3, 3, 0, 0]);
+    });
+  });
+
+  /**
+   * Retry Test Suite
+   * 
+   * Random jitter is pinned to 0 so retries happen without waiting.
+   */
+  describe('Retries', () => {
+    const apiError = (status: number) => Object.assign(new Error(`HTTP ${status}`), { status });
+
+    beforeEach(() => {
+      jest.spyOn(Math, 'random').mockReturnValue(0);
+    });
+
+    /**
+     * Test: Transient failures are retried
+     * 
+     * A rate-limited Stage 1 call succeeds on the third attempt; each
+     * attempt counts as an API call.
+     */
+    it('should retry rate-limited calls with backoff', async () => {
+      let stage1Attempts = 0;
+      navigator = new TaxonomyNavigator({
+        enableLogging: false,
+        apiKey: 'test-key',
+        completionHandler: async ({ messages }) => {
+          const prompt = messages[1].content;
+          if (prompt.startsWith('Summarize')) return 'Laptop';
+          if (prompt.startsWith('Select exactly 2')) {
+            if (++stage1Attempts < 3) throw apiError(429);
+            return 'Electronics';
+          }
+          return '1';
+        }
+      });
+
+      const result = await navigator.classifyProduct('MacBook Air');
+
+      expect(result.success).toBe(true);
+      expect(result.leafCategory).toBe('Laptops');
+      expect(stage1Attempts).toBe(3);
+      expect(result.apiCalls).toBe(5);
+    });
+
+    /**
+     * Test: Connection failures are retried
+     * 
+     * SDK connection errors (here a client-side timeout, a subclass of
+     * APIConnectionError) carry no HTTP status but are transient.
+     */
+    it('should retry connection errors', async () => {
+      let attempts = 0;
+      navigator = new TaxonomyNavigator({
+        enableLogging: false,
+        apiKey: 'test-key',
+        completionHandler: async ({ messages }) => {
+          const prompt = messages[1].content;
+          if (prompt.startsWith('Summarize')) {
+            if (++attempts < 2) throw new APIConnectionTimeoutError();
+            return 'Laptop';
+          }
+          return prompt.startsWith('Select exactly 2') ? 'Electronics' : '1';
+        }
+      });
+
+      const result = await navigator.classifyProduct('MacBook Air');
+
+      expect(result.success).toBe(true);
+      expect(attempts).toBe(2);
+    });
+
+    /**
+     * Test: Permanent failures are not retried
+     */
+    it('should not retry client errors', async () => {
+      let attempts = 0;
+      navigator = new TaxonomyNavigator({
+        enableLogging: false,
+        apiKey: 'test-key',
+        completionHandler: async () => {
+          attempts++;
+          throw apiError(401);
+        }
+      });
+
+      const result = await navigator.classifyProduct('MacBook Air');
+
+      expect(result.success).toBe(false);
+      expect(attempts).toBe(1);
+    });
+  });
+
+  /**
+   * Response Cache Test Suite
+   */
+  describe('Response Cache', () => {
+    /**
+     * Test: Reusing responses of identical requests
+     * 
+     * Two listings of the same laptop get the same summary, so every later
+     * stage request of the second listing is answered from the cache and
+     * only its Stage 0 call reaches the API.
+     */
+    it('should answer repeated stage requests from the response cache', async () => {
+      const prompts: string[] = [];
+      navigator = new TaxonomyNavigator({
+        enableLogging: false,
+        apiKey: 'test-key',
+        responseCacheSize: 100,
+        completionHandler: async ({ messages }) => {
+          const prompt = messages[1].content;
+          prompts.push(prompt);
+          if (prompt.startsWith('Summarize')) return 'Laptop';
+          if (prompt.startsWith('Select exactly 2')) return 'Electronics';
+          return '1';
+        }
+      });
+
+      const first = await navigator.classifyProduct('MacBook Air 13"');
+      const second = await navigator.classifyProduct('Apple MacBook Air laptop');
+
+      expect(first.apiCalls).toBe(3);
+      expect(second.apiCalls).toBe(1);
+      expect(second.bestMatch).toBe(first.bestMatch);
+      expect(prompts).toHaveLength(4);
+    });
+  });
+
+  /**
+   * Embedding-based Stage 1 Test Suite
+   * 
+   * Tests the optional L1 shortlist by embedding similarity, with the
+   * chat prompt as fallback for ambiguous shortlists.
+   */
+  describe('Embedding Stage 1', () => {
+    /**
+     * Test: Embedding shortlist with prompt fallback
+     * 
+     * Fake embeddings put each L1 on its own axis. The laptop summary is
+     * clearly closest to Electronics, then Apparel; the blender summary
+     * is closest to Home & Garden but ties Electronics and Apparel for
+     * second place, so only it goes through the Stage 1 prompt. The L1 embeddings are created once.
+     */
+    it('should shortlist L1 categories by embedding similarity', async () => {
+      const vectors: Record<string, number[]> = {
+        'Electronics': [1, 0, 0],
+        'Apparel & Accessories': [0, 1, 0],
+        'Home & Garden': [0, 0, 1],
+        'Laptop': [1, 0.5, 0],
+        'Blender': [0.3, 0.3, 1]
+      };
+      const embeddingRequests: string[][] = [];
+      const stage1Prompts: string[] = [];
+
+      const client = {
+        embeddings: {
+          create: async ({ input }: { input: string[] }) => {
+            embeddingRequests.push(input);
+            return { data: input.map((text, index) => ({ index, embedding: vectors[text] })) };
+          }
+        }
+      };
+
+      navigator = new TaxonomyNavigator({
+        enableLogging: false,
+        apiKey: 'test-key',
+        stage1Embeddings: true,
+        client: client as unknown as OpenAI,
+        completionHandler: async ({ messages }) => {
+          const prompt = messages[1].content;
+          if (prompt.startsWith('Summarize')) return prompt.includes('Blender') ? 'Blender' : 'Laptop';
+          if (prompt.startsWith('Select exactly 2')) {
+            stage1Prompts.push(prompt);
+            return 'Home & Garden';
+          }
+          return '1';
+        }
+      });
+
+      const laptop = await navigator.classifyProduct('Laptop');
+      const blender = await navigator.classifyProduct('Blender');
+
+      expect(laptop.stageDetails?.stage1L1Categories).toEqual(['Electronics', 'Apparel & Accessories']);
+      expect(laptop.leafCategory).toBe('Laptops');
+      expect(blender.stageDetails?.stage1L1Categories).toEqual(['Home & Garden']);
+      expect(stage1Prompts).toHaveLength(1);
+      expect(stage1Prompts[0]).toContain('Product: Blender');
+      expect(embeddingRequests).toEqual([
+        ['Electronics', 'Apparel & Accessories', 'Home & Garden'],
+        ['Laptop'],
+        ['Blender']
+      ]);
+    });
   });
 
   /**
@@ -248,6 +1090,8 @@ Home & Garden > Kitchen & Dining > Kitchen Appliances > Blenders`;
      * of the classification process.
      */
     it('should include stage details when requested', async () => {
+      jest.spyOn(console, 'log').mockImplementation(() => undefined); // keep the stage log out of the test output
+
       // Create navigator with logging enabled
       navigator = new TaxonomyNavigator({
         enableLogging: true,
@@ -259,10 +1103,9 @@ Home & Garden > Kitchen & Dining > Kitchen Appliances > Blenders`;
       // Verify stage details are included
       if (result.stageDetails) {
         // Check all stage information is present
-        expect(result.stageDetails).toHaveProperty('aiSummary');
-        expect(result.stageDetails).toHaveProperty('stage1L1Categories');
-        expect(result.stageDetails).toHaveProperty('stage2aLeaves');
-        expect(result.stageDetails).toHaveProperty('totalCandidates');
+        expect(Object.keys(result.stageDetails)).toEqual(expect.arrayContaining([
+          'aiSummary', 'stage1L1Categories', 'stage2aLeaves', 'totalCandidates'
+        ]));
       }
     });
   });
@@ -0,0 +1,254 @@
+/**
+ * Unit Tests for TaxonomyBatchRunner
+ *
+ * This test suite validates batch mode, which collects the stage prompts of
+ * many products into OpenAI Batch API jobs.
+ *
+ * WHAT IS TESTED:
+ * - Products are classified with one batch job per pipeline round
+ * - Identical requests (duplicate products) are submitted only once
+ * - All Stage 2 batches of a product share one batch job
+ * - Rounds above the per-job request or size limit are split into several jobs
+ * - A finished run is replayed from the state file without new batch jobs
+ * - An interrupted split round is resumed from all of its saved jobs
+ * - Batch mode restarted with the same input resumes without an output file
+ *
+ * MOCKING APPROACH:
+ * - The OpenAI module is replaced by an in-memory Batch API that answers
+ *   each request from its prompt, so no API calls are made
+ * - The taxonomy and state files are written to a temporary directory
+ */
+
+import { BatchRunnerOptions, TaxonomyBatchRunner } from '../src/batchRunner';
+import { runBatchMode } from '../src/interactiveInterface';
+import * as fs from 'fs';
+import * as os from 'os';
+import * as path from 'path';
+
+/**
+ * Answers a chat completion request of the pipeline by its prompt.
+ */
+function mockAnswer(body: { messages: { content: string }[] }): string {
+  const prompt = body.messages[1].content;
+  if (prompt.startsWith('Summarize')) return prompt.includes('Product: Sony TV') ? 'Television' : 'Running shoes';
+  if (prompt.startsWith('Select exactly 2')) return prompt.endsWith('Television') ? 'Electronics' : 'Apparel & Accessories';
+  return '1';
+}
+
+/**
+ * In-memory Batch API shared by all mocked clients.
+ */
+const mockBatchApi = {
+  files: new Map<string, string>(),
+  submittedRequests: [] as number[],
+  nextId: 0,
+  /** Makes status checks fail, simulating a run interrupted while waiting */
+  failRetrieve: false
+};
+
+jest.mock('openai', () => ({
+  __esModule: true,
+  APIConnectionError: jest.requireActual('openai').APIConnectionError,
+  toFile: async (content: Buffer) => content.toString('utf-8'),
+  default: jest.fn().mockImplementation(() => ({
+    files: {
+      create: async ({ file }: { file: string }) => {
+        const id = `file-${mockBatchApi.nextId++}`;
+        mockBatchApi.files.set(id, file);
+        return { id };
+      },
+      content: async (id: string) => ({ text: async () => mockBatchApi.files.get(id) })
+    },
+    batches: {
+      create: async ({ input_file_id }: { input_file_id: string }) => {
+        const lines = mockBatchApi.files.get(input_file_id)!.trim().split('\n').map(line => JSON.parse(line));
+        mockBatchApi.submittedRequests.push(lines.length);
+
+        const output = lines.map(line => JSON.stringify({
+          custom_id: line.custom_id,
+          response: { status_code: 200, body: { choices: [{ message: { content: mockAnswer(line.body) } }] } }
+        })).join('\n');
+        const outputId = `file-${mockBatchApi.nextId++}`;
+        mockBatchApi.files.set(outputId, output);
+
+        return { id: `batch-${outputId}`, status: 'validating' };
+      },
+      retrieve: async (id: string) => {
+        if (mockBatchApi.failRetrieve) throw new Error('Connection error.');
+        return { id, status: 'completed', output_file_id: id.replace('batch-', '') };
+      }
+    }
+  }))
+}));
+
+describe('TaxonomyBatchRunner', () => {
+  let tempDir: string;
+  let taxonomyFile: string;
+  let stateFile: string;
+
+  const createRunner = (file: string = taxonomyFile, options: BatchRunnerOptions = {}) => new TaxonomyBatchRunner({
+    taxonomyFile: file,
+    apiKey: 'sk-test-key-12345678901234567890',
+    stateFile,
+    pollIntervalMs: 1,
+    onProgress: () => undefined,
+    ...options
+  });
+
+  // One directory and taxonomy file for the whole suite; tests only reset the state file
+  beforeAll(() => {
+    tempDir = fs.mkdtempSync(path.join(os.tmpdir(), 'taxonomy-batch-'));
+    taxonomyFile = path.join(tempDir, 'taxonomy.txt');
+    stateFile = path.join(tempDir, 'state.json');
+    fs.writeFileSync(taxonomyFile, [
+      '# Google_Product_Taxonomy_Version: test',
+      'Electronics > Video > Televisions',
+      'Apparel & Accessories > Shoes'
+    ].join('\n'));
+  });
+
+  beforeEach(() => {
+    fs.rmSync(stateFile, { force: true });
+    mockBatchApi.files.clear();
+    mockBatchApi.submittedRequests = [];
+    mockBatchApi.failRetrieve = false;
+  });
+
+  afterAll(() => {
+    fs.rmSync(tempDir, { recursive: true, force: true });
+  });
+
+  /**
+   * Test: Round-based classification
+   *
+   * Stage 0, Stage 1 and Stage 2A each form one batch job; the duplicate
+   * TV listing shares every request with the first one.
+   */
+  it('should classify products with one batch job per round', async () => {
+    const runner = createRunner();
+    const results = await runner.run(['Sony TV', 'Nike Air Max', 'Sony TV']);
+
+    expect(results.map(r => r.bestMatch)).toEqual([
+      'Electronics > Video > Televisions',
+      'Apparel & Accessories > Shoes',
+      'Electronics > Video > Televisions'
+    ]);
+    expect(runner.batchCount).toBe(3);
+    expect(mockBatchApi.submittedRequests).toEqual([2, 2, 2]);
+  });
+
+  /**
+   * Test: All Stage 2 batches in one round
+   *
+   * A 2,100-leaf L1 needs 21 Stage 2 batches; they are all submitted in
+   * the same batch job rather than in several rounds.
+   */
+  it('should submit all Stage 2 batches of a product in one round', async () => {
+    const largeTaxonomyFile = path.join(tempDir, 'large-taxonomy.txt');
+    fs.writeFileSync(largeTaxonomyFile, [
+      '# Google_Product_Taxonomy_Version: test',
+      ...Array.from({ length: 2100 }, (_, i) => `Electronics > Video > Display ${i + 1}`),
+      'Apparel & Accessories > Shoes'
+    ].join('\n'));
+
+    const runner = createRunner(largeTaxonomyFile);
+    const [result] = await runner.run(['Sony TV']);
+
+    expect(result.bestMatch).toBe('Electronics > Video > Display 1');
+    expect(mockBatchApi.submittedRequests).toEqual([1, 1, 21]);
+  });
+
+  /**
+   * Test: Splitting rounds at the per-job limits
+   *
+   * With the limits lowered to one request (or one request's worth of
+   * bytes), every round of two products is submitted as two jobs.
+   */
+  it('should split rounds above the request or size limit into several jobs', async () => {
+    for (const limits of [{ maxRequestsPerBatch: 1 }, { maxBatchBytes: 1 }]) {
+      mockBatchApi.submittedRequests = [];
+      fs.rmSync(stateFile, { force: true });
+
+      const runner = createRunner(taxonomyFile, limits);
+      const results = await runner.run(['Sony TV', 'Nike Air Max']);
+
+      expect(results.map(r => r.bestMatch)).toEqual([
+        'Electronics > Video > Televisions',
+        'Apparel & Accessories > Shoes'
+      ]);
+      expect(runner.batchCount).toBe(6);
+      expect(mockBatchApi.submittedRequests).toEqual([1, 1, 1, 1, 1, 1]);
+    }
+  });
+
+  /**
+   * Test: Resuming from the state file
+   *
+   * A second run over the same input is answered entirely from the
+   * responses saved by the first run.
+   */
+  it('should replay saved responses without submitting new batches', async () => {
+    await createRunner().run(['Sony TV', 'Nike Air Max']);
+    mockBatchApi.submittedRequests = [];
+
+    const runner = createRunner();
+    const results = await runner.run(['Sony TV', 'Nike Air Max']);
+
+    expect(results.every(r => r.success)).toBe(true);
+    expect(runner.batchCount).toBe(0);
+    expect(mockBatchApi.submittedRequests).toEqual([]);
+  });
+
+  /**
+   * Test: Resuming a split round
+   *
+   * A run interrupted while waiting on a round of two jobs leaves both in
+   * the state file; the next run polls them again instead of resubmitting.
+   */
+  it('should resume every saved job of an interrupted round', async () => {
+    mockBatchApi.failRetrieve = true;
+    const interrupted = await createRunner(taxonomyFile, { maxRequestsPerBatch: 1 }).run(['Sony TV', 'Nike Air Max']);
+    expect(interrupted.some(r => r.success)).toBe(false);
+    expect(JSON.parse(fs.readFileSync(stateFile, 'utf-8')).pendingBatches).toHaveLength(2);
+
+    mockBatchApi.failRetrieve = false;
+    mockBatchApi.submittedRequests = [];
+    const runner = createRunner(taxonomyFile, { maxRequestsPerBatch: 1 });
+    const results = await runner.run(['Sony TV', 'Nike Air Max']);
+
+    expect(results.every(r => r.success)).toBe(true);
+    expect(runner.batchCount).toBe(6);
+    expect(mockBatchApi.submittedRequests).toEqual([1, 1, 1, 1]);
+  });
+
+  /**
+   * Test: Restarting batch mode
+   *
+   * Without --output-file the results file name changes on every run; the
+   * state file follows the input file, so the restart still resumes.
+   */
+  it('should resume batch mode started again with the same input', async () => {
+    const inputFile = path.join(tempDir, 'products.txt');
+    fs.writeFileSync(inputFile, 'Sony TV\nNike Air Max\n');
+    fs.rmSync(`${inputFile}.batch-state.json`, { force: true });
+    const workingDir = process.cwd();
+    process.chdir(tempDir);
+    jest.spyOn(console, 'log').mockImplementation(() => undefined);
+
+    try {
+      mockBatchApi.failRetrieve = true;
+      await runBatchMode(taxonomyFile, 'sk-test-key-12345678901234567890', undefined, inputFile, undefined);
+
+      mockBatchApi.failRetrieve = false;
+      mockBatchApi.submittedRequests = [];
+      await runBatchMode(taxonomyFile, 'sk-test-key-12345678901234567890', undefined, inputFile, undefined);
+    } finally {
+      process.chdir(workingDir);
+      jest.restoreAllMocks();
+    }
+
+    // Stage 0 was resumed from the saved job; only Stages 1 and 2A were submitted
+    expect(mockBatchApi.submittedRequests).toEqual([2, 2]);
+    expect(fs.existsSync(`${inputFile}.batch-state.json`)).toBe(true);
+  });
+});
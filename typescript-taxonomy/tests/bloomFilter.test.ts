@@ -0,0 +1,57 @@
+/**
+ * Unit Tests for BloomFilter
+ *
+ * This test suite validates the Bloom filter used to skip the pipeline for
+ * inputs that are known to fail.
+ *
+ * WHAT IS TESTED:
+ * - Added strings are always reported (no false negatives)
+ * - The false-positive rate stays near the configured target
+ * - A filter survives a toBuffer/fromBuffer round-trip
+ */
+
+import { BloomFilter } from '../src/bloomFilter';
+
+describe('BloomFilter', () => {
+  const added = Array.from({ length: 1000 }, (_, i) => `garbled input ${i}`);
+
+  /**
+   * Test: No false negatives
+   */
+  it('should report every added string', () => {
+    const filter = new BloomFilter(1000, 0.01);
+    added.forEach(item => filter.add(item));
+
+    expect(added.every(item => filter.has(item))).toBe(true);
+  });
+
+  /**
+   * Test: False-positive rate
+   *
+   * At capacity, strings that were never added should only rarely be
+   * reported (target 1%, allow some slack).
+   */
+  it('should keep false positives near the target rate', () => {
+    const filter = new BloomFilter(1000, 0.01);
+    added.forEach(item => filter.add(item));
+
+    let falsePositives = 0;
+    for (let i = 0; i < 10_000; i++) {
+      if (filter.has(`product ${i}`)) falsePositives++;
+    }
+    expect(falsePositives / 10_000).toBeLessThan(0.02);
+  });
+
+  /**
+   * Test: Serialization
+   */
+  it('should restore a filter from its buffer', () => {
+    const filter = new BloomFilter(100, 0.001);
+    filter.add('Sony TV');
+
+    const restored = BloomFilter.fromBuffer(filter.toBuffer());
+    expect(restored.has('Sony TV')).toBe(true);
+    expect(restored.has('Nike Air Max')).toBe(false);
+    expect(() => BloomFilter.fromBuffer(Buffer.alloc(3))).toThrow('Invalid Bloom filter data');
+  });
+});
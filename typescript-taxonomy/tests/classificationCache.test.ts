@@ -0,0 +1,186 @@
+/**
+ * Unit Tests for ClassificationCache
+ *
+ * This test suite validates the two-tier (exact + semantic) cache used to
+ * skip the classification pipeline for previously seen products.
+ *
+ * WHAT IS TESTED:
+ * - Exact hits for identical product lines, and for lines differing only in case or spacing
+ * - Semantic hits for similar product lines (with a fake embedding function)
+ * - Persistence: save() followed by a fresh cache instance
+ * - Expiry: entries older than maxAgeMs are dropped on load
+ *
+ * TEST APPROACH:
+ * - Embeddings are faked with fixed vectors, so no API calls are made
+ * - Cache files are written to a temporary directory
+ */
+
+import { ClassificationCache } from '../src/classificationCache';
+import * as fs from 'fs';
+import * as os from 'os';
+import * as path from 'path';
+
+/**
+ * Fake embeddings: the two TV listings point in almost the same
+ * direction, the blender points elsewhere.
+ */
+const FAKE_EMBEDDINGS: { [text: string]: number[] } = {
+  'Samsung 65" QLED Smart TV': [1, 0, 0],
+  'Samsung 65 inch QLED Smart TV': [0.99, 0.1, 0],
+  'Ninja Professional Blender': [0, 0, 1]
+};
+
+const fakeEmbed = async (text: string) =>
+  Object.entries(FAKE_EMBEDDINGS).find(([line]) => ClassificationCache.normalize(line) === text)![1];
+
+const TV_RESULT = {
+  leafCategory: 'Televisions',
+  bestMatch: 'Electronics > Video > Televisions'
+};
+
+describe('ClassificationCache', () => {
+  let tempDir: string;
+
+  // One directory for the whole suite; each persistence test uses its own file
+  beforeAll(() => {
+    tempDir = fs.mkdtempSync(path.join(os.tmpdir(), 'taxonomy-cache-'));
+  });
+
+  afterEach(() => {
+    jest.restoreAllMocks();
+  });
+
+  afterAll(() => {
+    fs.rmSync(tempDir, { recursive: true, force: true });
+  });
+
+  /**
+   * Test: Exact tier
+   *
+   * An identical product line must hit without calling the embedding function.
+   */
+  it('should return exact hits without embedding', async () => {
+    const embed = jest.fn(fakeEmbed);
+    const cache = new ClassificationCache({ embed });
+
+    await cache.set('Samsung 65" QLED Smart TV', TV_RESULT);
+    embed.mockClear();
+
+    const hit = await cache.get('Samsung 65" QLED Smart TV');
+    expect(hit?.matchType).toBe('exact');
+    expect(hit?.entry.leafCategory).toBe('Televisions');
+    expect(embed).not.toHaveBeenCalled();
+  });
+
+  /**
+   * Test: Normalized keys
+   *
+   * Lines differing only in case or spacing share one entry, and the
+   * embedding function only ever sees the normalized line.
+   */
+  it('should normalize product lines before hashing and embedding', async () => {
+    const embed = jest.fn(fakeEmbed);
+    const cache = new ClassificationCache({ embed });
+
+    await cache.set('Samsung 65" QLED Smart TV', TV_RESULT);
+    const hit = await cache.get('  samsung 65"   qled smart tv ');
+
+    expect(hit?.matchType).toBe('exact');
+    expect(ClassificationCache.hashKey('Samsung 65" QLED Smart TV')).toBe(ClassificationCache.hashKey('samsung 65" qled smart tv'));
+    expect(embed.mock.calls).toEqual([['samsung 65" qled smart tv']]);
+  });
+
+  /**
+   * Test: Semantic tier
+   *
+   * A similar listing reuses the cached result; a dissimilar one misses.
+   */
+  it('should return semantic hits only above the threshold', async () => {
+    const cache = new ClassificationCache({ embed: fakeEmbed });
+    await cache.set('Samsung 65" QLED Smart TV', TV_RESULT);
+
+    const similar = await cache.get('Samsung 65 inch QLED Smart TV');
+    expect(similar?.matchType).toBe('semantic');
+    expect(similar?.entry.bestMatch).toBe(TV_RESULT.bestMatch);
+
+    expect(await cache.get('Ninja Professional Blender')).toBeNull();
+  });
+
+  /**
+   * Test: Bounded lookup embeddings
+   *
+   * Misses that are never followed by set() (failed classifications) must
+   * not keep their embeddings for the rest of the run.
+   */
+  it('should keep only the most recent missed-lookup embeddings', async () => {
+    const cache = new ClassificationCache({ embed: async () => [0, 1, 0] });
+    for (let i = 0; i <= 1000; i++) {
+      await cache.get(`Unknown product ${i}`);
+    }
+
+    const pending = cache['pendingEmbeddings'];
+    expect(pending.size).toBe(1000);
+    expect(pending.has(ClassificationCache.hashKey('Unknown product 0'))).toBe(false);
+    expect(pending.has(ClassificationCache.hashKey('Unknown product 1000'))).toBe(true);
+  });
+
+  /**
+   * Test: Persistence
+   *
+   * Entries (including embeddings) must survive a save/load round-trip.
+   */
+  it('should reload saved entries from the cache file', async () => {
+    const cacheFile = path.join(tempDir, 'cache.json');
+    const cache = new ClassificationCache({ cacheFile, embed: fakeEmbed });
+    await cache.set('Samsung 65" QLED Smart TV', TV_RESULT);
+    expect(cache.save()).toBe(true);
+    expect(cache.save()).toBe(false);
+
+    const reloaded = new ClassificationCache({ cacheFile, embed: fakeEmbed });
+    expect(reloaded.size).toBe(1);
+    const hit = await reloaded.get('Samsung 65 inch QLED Smart TV');
+    expect(hit?.matchType).toBe('semantic');
+  });
+
+  /**
+   * Test: Fingerprint
+   *
+   * A file saved for another taxonomy or model must not serve its results.
+   */
+  it('should ignore cache files saved with another fingerprint', async () => {
+    const taxonomyFile = path.join(tempDir, 'taxonomy.txt');
+    fs.writeFileSync(taxonomyFile, 'Electronics > Video > Televisions');
+    const nano = ClassificationCache.fingerprint(taxonomyFile, ['gpt-4.1-nano']);
+    const mini = ClassificationCache.fingerprint(taxonomyFile, ['gpt-4.1-mini']);
+    expect(nano).not.toBe(mini);
+
+    const cacheFile = path.join(tempDir, 'fingerprint.json');
+    const cache = new ClassificationCache({ cacheFile, fingerprint: nano });
+    await cache.set('Samsung 65" QLED Smart TV', TV_RESULT);
+    cache.save();
+
+    expect(new ClassificationCache({ cacheFile, fingerprint: nano }).size).toBe(1);
+    expect(new ClassificationCache({ cacheFile, fingerprint: mini }).size).toBe(0);
+
+    fs.writeFileSync(taxonomyFile, 'Electronics > Video > Projectors');
+    const otherTaxonomy = ClassificationCache.fingerprint(taxonomyFile, ['gpt-4.1-nano']);
+    expect(new ClassificationCache({ cacheFile, fingerprint: otherTaxonomy }).size).toBe(0);
+  });
+
+  /**
+   * Test: Expiry
+   *
+   * Entries saved longer ago than maxAgeMs are not loaded.
+   */
+  it('should drop expired entries on load', async () => {
+    const cacheFile = path.join(tempDir, 'expiry.json');
+    const cache = new ClassificationCache({ cacheFile });
+    await cache.set('Samsung 65" QLED Smart TV', TV_RESULT);
+    cache.save();
+
+    expect(new ClassificationCache({ cacheFile, maxAgeMs: 60_000 }).size).toBe(1);
+
+    jest.spyOn(Date, 'now').mockReturnValue(Date.now() + 120_000);
+    expect(new ClassificationCache({ cacheFile, maxAgeMs: 60_000 }).size).toBe(0);
+  });
+});
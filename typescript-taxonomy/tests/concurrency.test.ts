@@ -0,0 +1,108 @@
+/**
+ * Unit Tests for Concurrency Module
+ *
+ * This test suite validates createLimiter, which bounds how many
+ * classification tasks run at the same time, and createRateLimiter,
+ * which paces requests to per-minute budgets.
+ *
+ * WHAT IS TESTED:
+ * - Results are returned per task, in submission order
+ * - No more than `concurrency` tasks are ever in flight
+ * - A failing task rejects only its own promise
+ * - Requests within the budgets start at once; later ones wait for the refill
+ */
+
+import { createLimiter, createRateLimiter } from '../src/concurrency';
+
+/**
+ * Resolves after the given number of milliseconds.
+ * Used to simulate network-bound tasks of different durations.
+ */
+const delay = (ms: number) => new Promise(resolve => setTimeout(resolve, ms));
+
+describe('createLimiter', () => {
+  /**
+   * Test: Results keep submission order
+   *
+   * Later tasks finish first here, but each promise must still
+   * resolve with its own task's value.
+   */
+  it('should resolve each task with its own result', async () => {
+    const limit = createLimiter(3);
+    const pending = [30, 10, 20].map((ms, i) => limit(async () => {
+      await delay(ms);
+      return i;
+    }));
+
+    expect(await Promise.all(pending)).toEqual([0, 1, 2]);
+  });
+
+  /**
+   * Test: Concurrency bound
+   *
+   * Tracks the number of simultaneously running tasks and verifies
+   * it never exceeds the configured limit.
+   */
+  it('should never run more tasks than the limit', async () => {
+    const limit = createLimiter(2);
+    let active = 0;
+    let maxActive = 0;
+
+    await Promise.all([1, 2, 3, 4, 5].map(() => limit(async () => {
+      active++;
+      maxActive = Math.max(maxActive, active);
+      await delay(5);
+      active--;
+    })));
+
+    expect(maxActive).toBe(2);
+  });
+
+  /**
+   * Test: Error isolation
+   *
+   * A rejected task must not block the queue or affect other tasks.
+   */
+  it('should keep processing after a task fails', async () => {
+    const limit = createLimiter(1);
+    const failing = limit(async () => {
+      throw new Error('boom');
+    });
+    const succeeding = limit(async () => 'ok');
+
+    await expect(failing).rejects.toThrow('boom');
+    await expect(succeeding).resolves.toBe('ok');
+  });
+});
+
+describe('createRateLimiter', () => {
+  /**
+   * Test: Token bucket pacing
+   *
+   * 60,000 tokens per minute refill one token per millisecond. The first
+   * request empties the bucket at once; the next 50 tokens take ~50ms.
+   */
+  it('should start requests within the budget at once and pace the rest', async () => {
+    const throttle = createRateLimiter({ requestsPerMinute: 1000, tokensPerMinute: 60_000 });
+
+    const start = Date.now();
+    await throttle(60_000);
+    expect(Date.now() - start).toBeLessThan(20);
+
+    await throttle(50);
+    expect(Date.now() - start).toBeGreaterThanOrEqual(45);
+  });
+
+  /**
+   * Test: No limits
+   *
+   * Without budgets, the limiter never waits.
+   */
+  it('should not wait when no limits are set', async () => {
+    const throttle = createRateLimiter({});
+
+    const start = Date.now();
+    await Promise.all(Array.from({ length: 100 }, () => throttle(1_000_000)));
+    expect(Date.now() - start).toBeLessThan(20);
+  });
+});
@@ -24,7 +24,7 @@
  * npm install --save-dev jest @types/jest ts-jest
  */
 
-import { getApiKey } from '../src/config';
+import { getApiKey, clearApiKeyCache, validateApiKeyFormat } from '../src/config';
 import * as fs from 'fs';
 import * as path from 'path';
 
@@ -47,6 +47,7 @@ describe('Config Module', () => {
    * - Reset Node.js module cache (important for config modules)
    * - Create clean environment copy
    * - Remove any existing OPENAI_API_KEY to start fresh
+   * - Clear the cached api_key.txt content
    * 
    * This ensures each test starts with predictable state.
    */
@@ -55,6 +56,7 @@ describe('Config Module', () => {
     jest.resetModules();
     process.env = { ...originalEnv };
     delete process.env.OPENAI_API_KEY;
+    clearApiKeyCache();
   });
 
   /**
@@ -196,6 +198,44 @@ describe('Config Module', () => {
       // Should return null, not throw
       expect(result).toBeNull();
     });
+
+    /**
+     * Test: Key file is read only once
+     * 
+     * The file content is cached after the first successful lookup,
+     * so repeated calls (e.g. one per navigator) don't hit the disk.
+     */
+    it('should cache the file-based key between calls', () => {
+      const existsSpy = jest.spyOn(fs, 'existsSync').mockReturnValue(true);
+      const readSpy = jest.spyOn(fs, 'readFileSync').mockReturnValue('sk-file-key');
+
+      expect(getApiKey()).toBe('sk-file-key');
+      expect(getApiKey()).toBe('sk-file-key');
+      expect(existsSpy).toHaveBeenCalledTimes(1);
+      expect(readSpy).toHaveBeenCalledTimes(1);
+    });
+  });
+
+  /**
+   * validateApiKeyFormat Test Suite
+   * 
+   * Format-only validation: 'sk-' prefix, 20+ characters,
+   * key characters only (letters, digits, '-' and '_').
+   */
+  describe('validateApiKeyFormat', () => {
+    it('should accept well-formed keys', () => {
+      expect(validateApiKeyFormat('sk-abcdefghijklmnopqrstuvwxyz012345')).toBe(true);
+      expect(validateApiKeyFormat('sk-proj-abc_DEF-123456789')).toBe(true);
+    });
+
+    it('should reject missing, short or malformed keys', () => {
+      expect(validateApiKeyFormat(null)).toBe(false);
+      expect(validateApiKeyFormat(undefined)).toBe(false);
+      expect(validateApiKeyFormat('')).toBe(false);
+      expect(validateApiKeyFormat('sk-short')).toBe(false);
+      expect(validateApiKeyFormat('pk-abcdefghijklmnopqrstuvwxyz')).toBe(false);
+      expect(validateApiKeyFormat('sk-abcdefghijklmnopqrst uvwxyz')).toBe(false);
+    });
   });
 });
 
@@ -0,0 +1,20 @@
+/**
+ * Unit Tests for the text formatting helpers
+ *
+ * WHAT IS TESTED:
+ * - shorten() keeps short text, collapses whitespace and cuts at a word
+ *   boundary within the width (placeholder included)
+ */
+
+import { shorten } from '../src/formatting';
+
+describe('shorten', () => {
+  it('should collapse whitespace and keep text that fits', () => {
+    expect(shorten('  Sony   65" TV  ', 20)).toBe('Sony 65" TV');
+  });
+
+  it('should cut at a word boundary within the width', () => {
+    expect(shorten('Samsung 65 inch QLED Smart TV', 20)).toBe('Samsung 65 inch...');
+    expect(shorten('Supercalifragilistic', 10)).toBe('Superca...');
+  });
+});